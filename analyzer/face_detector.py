@@ -6,6 +6,7 @@ import cv2
 import numpy as np
 import time
 import os
+import threading
 from typing import List, Dict, Any, Optional
 from rich.console import Console
 
@@ -18,6 +19,10 @@ class FaceDetector:
     Detector de rostros usando YOLOv8 y modelos adicionales
     """
     
+    # Modelos ya cargados por (ruta, dispositivo): evita recargar pesos en GPU
+    _model_cache = {}
+    _model_lock = threading.Lock()
+    
     def __init__(self, model_path: str = None, use_gpu: bool = None):
         """
         Inicializa el detector de rostros
@@ -35,7 +40,14 @@ class FaceDetector:
         self._load_model()
         
     def _load_model(self):
-        """Carga el modelo YOLO"""
+        """Carga el modelo YOLO (reutiliza el de la caché si ya está cargado)"""
+        cache_key = (self.model_path, self.use_gpu)
+        with self._model_lock:
+            cached = self._model_cache.get(cache_key)
+        if cached is not None:
+            self.model = cached
+            return
+        
         try:
             from ultralytics import YOLO
             
@@ -61,6 +73,9 @@ class FaceDetector:
             self.model.to(device)
             console.print(f"    [green]✓ Modelo YOLO cargado en {device}[/green]")
             
+            with self._model_lock:
+                self._model_cache.setdefault(cache_key, self.model)
+            
         except Exception as e:
             console.print(f"    [red]✗ Error cargando modelo YOLO: {str(e)}[/red]")
             self.model = None
@@ -79,51 +94,12 @@ class FaceDetector:
             return []
         
         try:
-            # PREPROCESAMIENTO ULTRA MEGA RÁPIDO
-            # Redimensionar frame para velocidad máxima (máximo 320px)
-            height, width = frame.shape[:2]
-            if width > 320:
-                scale = 320 / width
-                new_width = 320
-                new_height = int(height * scale)
-                frame = cv2.resize(frame, (new_width, new_height))
-            
             # Ejecutar detección con configuración optimizada
-            results = self.model(
-                frame, 
-                conf=0.7,  # Confianza más alta para evitar falsos positivos
-                iou=0.5,   # NMS más agresivo
-                max_det=5,  # Máximo 5 detecciones
-                verbose=False,
-                half=True   # Usar FP16 para velocidad
-            )
+            results = self._run_model(self._prepare_frame(frame))
             
             faces = []
             for result in results:
-                if result.boxes is not None:
-                    for box in result.boxes:
-                        # Obtener coordenadas y confianza
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = box.conf[0].cpu().numpy()
-                        class_id = int(box.cls[0].cpu().numpy())
-                        
-                        # FILTRAR SOLO ROSTROS (clase 0) con confianza alta
-                        if class_id == 0 and confidence >= 0.7:
-                            # VALIDACIÓN ADICIONAL: Verificar proporciones del rostro
-                            bbox_width = x2 - x1
-                            bbox_height = y2 - y1
-                            aspect_ratio = bbox_width / bbox_height if bbox_height > 0 else 0
-                            
-                            # Los rostros humanos tienen proporciones específicas (0.7-1.3)
-                            if 0.7 <= aspect_ratio <= 1.3:
-                                # VALIDACIÓN DE TAMAÑO: Rostros no pueden ser muy pequeños
-                                if bbox_width > 20 and bbox_height > 20:
-                                    faces.append({
-                                        'bbox': [int(x1), int(y1), int(bbox_width), int(bbox_height)],
-                                        'confidence': float(confidence),
-                                        'class': 'face',
-                                        'aspect_ratio': aspect_ratio
-                                    })
+                faces.extend(self._parse_result(result))
             
             return faces
             
@@ -131,6 +107,159 @@ class FaceDetector:
             console.print(f"    [red]Error detectando rostros en frame: {str(e)}[/red]")
             return []
     
+    def detect_faces_on_frames(self, frames: List[np.ndarray]) -> List[List[Dict]]:
+        """
+        Detecta rostros en varios frames con una sola inferencia por lotes
+        
+        Args:
+            frames: Lista de frames como arrays numpy
+            
+        Returns:
+            Lista (alineada con frames) de listas de rostros detectados
+        """
+        if self.model is None or not frames:
+            return [[] for _ in frames]
+        
+        try:
+            results = self._run_model([self._prepare_frame(frame) for frame in frames])
+            return [self._parse_result(result) for result in results]
+            
+        except Exception as e:
+            console.print(f"    [red]Error detectando rostros en lote: {str(e)}[/red]")
+            return [[] for _ in frames]
+    
+    def _prepare_frame(self, frame: np.ndarray) -> np.ndarray:
+        """Redimensiona el frame a un máximo de 320px de ancho"""
+        # PREPROCESAMIENTO ULTRA MEGA RÁPIDO
+        height, width = frame.shape[:2]
+        if width > 320:
+            scale = 320 / width
+            frame = cv2.resize(frame, (320, int(height * scale)))
+        return frame
+    
+    def _run_model(self, source):
+        """Ejecuta YOLO sobre un frame o una lista de frames"""
+        return self.model(
+            source,
+            conf=0.7,  # Confianza más alta para evitar falsos positivos
+            iou=0.5,   # NMS más agresivo
+            max_det=5,  # Máximo 5 detecciones
+            verbose=False,
+            half=True   # Usar FP16 para velocidad
+        )
+    
+    def _parse_result(self, result) -> List[Dict]:
+        """
+        Convierte un resultado de YOLO en la lista de rostros válidos
+        
+        Args:
+            result: Resultado de YOLO para un frame
+            
+        Returns:
+            Lista de diccionarios con información de rostros detectados
+        """
+        faces = []
+        if result.boxes is None:
+            return faces
+        
+        for box in result.boxes:
+            # Obtener coordenadas y confianza
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+            confidence = box.conf[0].cpu().numpy()
+            class_id = int(box.cls[0].cpu().numpy())
+            
+            # FILTRAR SOLO ROSTROS (clase 0) con confianza alta
+            if class_id == 0 and confidence >= 0.7:
+                # VALIDACIÓN ADICIONAL: Verificar proporciones del rostro
+                bbox_width = x2 - x1
+                bbox_height = y2 - y1
+                aspect_ratio = bbox_width / bbox_height if bbox_height > 0 else 0
+                
+                # Los rostros humanos tienen proporciones específicas (0.7-1.3)
+                if 0.7 <= aspect_ratio <= 1.3:
+                    # VALIDACIÓN DE TAMAÑO: Rostros no pueden ser muy pequeños
+                    if bbox_width > 20 and bbox_height > 20:
+                        faces.append({
+                            'bbox': [int(x1), int(y1), int(bbox_width), int(bbox_height)],
+                            'confidence': float(confidence),
+                            'class': 'face',
+                            'aspect_ratio': aspect_ratio
+                        })
+        
+        return faces
+    
+    def sample_frames(self, path: str, max_frames: int = 3) -> tuple:
+        """
+        Extrae los frames de muestra de un video (uno cada 10 segundos)
+        
+        Args:
+            path: Ruta al archivo de video
+            max_frames: Número máximo de frames a extraer
+            
+        Returns:
+            Tupla (frames, índices de frame, fps)
+        """
+        frames, indices = [], []
+        cap = cv2.VideoCapture(path)
+        try:
+            if not cap.isOpened():
+                return frames, indices, 0
+            
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            sample_rate = max(1, int(fps * 10))  # Cada 10 segundos de video
+            frame_count = 0
+            
+            while len(frames) < max_frames:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if frame_count % sample_rate == 0:
+                    frames.append(frame)
+                    indices.append(frame_count)
+                frame_count += 1
+            
+            return frames, indices, fps
+        finally:
+            cap.release()
+    
+    def detect_faces_on_videos(self, paths: List[str]) -> List[List[Dict]]:
+        """
+        Detecta rostros en varios videos con una sola inferencia por lotes
+        
+        Mismo muestreo que detect_faces_on_video, pero los frames de todos los
+        videos se procesan juntos en la GPU.
+        
+        Args:
+            paths: Rutas a los archivos de video
+            
+        Returns:
+            Lista (alineada con paths) de detecciones del primer frame con rostros
+        """
+        if self.model is None:
+            return [[] for _ in paths]
+        
+        all_frames, owners = [], []
+        for video_index, path in enumerate(paths):
+            try:
+                frames, indices, fps = self.sample_frames(path)
+            except Exception as e:
+                console.print(f"    [red]✗ Error leyendo video: {str(e)}[/red]")
+                continue
+            for frame, frame_index in zip(frames, indices):
+                all_frames.append(frame)
+                owners.append((video_index, frame_index, fps))
+        
+        detections = [[] for _ in paths]
+        for (video_index, frame_index, fps), faces in zip(owners, self.detect_faces_on_frames(all_frames)):
+            # Igual que el análisis individual: solo cuenta el primer frame con rostros
+            if faces and not detections[video_index]:
+                for face in faces:
+                    face['frame'] = frame_index
+                    face['timestamp'] = float(frame_index / fps) if fps > 0 else 0.0
+                detections[video_index] = faces
+        
+        return detections
+    
     def detect_faces_on_video(self, path: str, sample_strategy: dict) -> List[Dict]:
         """
         Detecta rostros en un video completo - ULTRA RÁPIDO Y PRECISO
@@ -182,7 +311,7 @@ class FaceDetector:
                     if faces:
                         for face in faces:
                             face['frame'] = frame_count
-                            face['timestamp'] = frame_count / fps if fps > 0 else 0
+                            face['timestamp'] = float(frame_count / fps) if fps > 0 else 0.0
                             detections.append(face)
                         
                         # SALIDA TEMPRANA INMEDIATA - si detectamos rostros, parar inmediatamente
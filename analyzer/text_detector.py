@@ -6,18 +6,81 @@ import cv2
 import numpy as np
 import time
 import os
-from typing import List, Dict, Any, Optional
+import queue
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from rich.console import Console
 
-from config import OCR_CONFIDENCE, MIN_TEXT_LENGTH, TESSERACT_CMD, USE_GPU, MODEL_CONFIGS
+from config import OCR_CONFIDENCE, OCR_BATCH_SIZE, TEXT_BLUR_THRESHOLD, MIN_TEXT_LENGTH, TESSERACT_CMD, USE_GPU, MODEL_CONFIGS
 
 console = Console()
 
+def _prefetch_sampled_frames(cap, sample_rate: int, buffer_size: int = 4):
+    """
+    Decodifica el video en un hilo y entrega solo los frames muestreados
+    
+    La cola acotada limita los frames decodificados en memoria. Al cerrar el
+    generador el hilo se detiene y se espera a que termine, de modo que el
+    llamador puede liberar `cap` a continuación.
+    
+    Args:
+        cap: cv2.VideoCapture ya abierto
+        sample_rate: Se entrega uno de cada `sample_rate` frames
+        buffer_size: Máximo de frames decodificados por adelantado
+        
+    Yields:
+        Pares (índice de frame, frame) en orden
+    """
+    buffer = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def producer():
+        try:
+            frame_count = 0
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if frame_count % sample_rate == 0 and not put((frame_count, frame)):
+                    return
+                frame_count += 1
+            put(done)
+        except Exception as e:
+            put(e)
+    
+    thread = threading.Thread(target=producer, name="text-frames", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
 class TextDetector:
     """
     Detector de texto usando EasyOCR y Tesseract
     """
     
+    # Lector de EasyOCR compartido entre instancias (la carga es costosa)
+    _reader_cache = {}
+    _reader_lock = threading.Lock()
+    
     def __init__(self, use_easyocr: bool = True):
         """
         Inicializa el detector de texto
@@ -55,7 +118,14 @@ class TextDetector:
             console.print(f"    [red]✗ Error configurando Tesseract: {str(e)}[/red]")
     
     def _setup_easyocr(self):
-        """Configura EasyOCR"""
+        """Configura EasyOCR (reutiliza el lector de la caché si existe)"""
+        cache_key = (tuple(MODEL_CONFIGS['easyocr']['languages']), USE_GPU)
+        with self._reader_lock:
+            cached = self._reader_cache.get(cache_key)
+        if cached is not None:
+            self.easyocr_reader = cached
+            return
+        
         try:
             import easyocr
             
@@ -92,6 +162,9 @@ class TextDetector:
             
             console.print(f"    [green]✓ EasyOCR inicializado (GPU: {gpu})[/green]")
             
+            with self._reader_lock:
+                self._reader_cache.setdefault(cache_key, self.easyocr_reader)
+            
         except Exception as e:
             console.print(f"    [red]✗ Error inicializando EasyOCR: {str(e)}[/red]")
             self.easyocr_reader = None
@@ -164,32 +237,31 @@ class TextDetector:
                 output_type=pytesseract.Output.DICT
             )
             
-            detections = []
-            n_boxes = len(data['level'])
+            # Filtros numéricos vectorizados (Tesseract devuelve cientos de cajas
+            # por frame); solo los textos de las cajas que pasan se recorren en Python
+            confidences = np.asarray(data['conf'], dtype=np.float64).astype(np.int64)
+            boxes = np.column_stack([
+                np.asarray(data[key], dtype=np.int64) for key in ('left', 'top', 'width', 'height')
+            ])
             
-            for i in range(n_boxes):
-                # Filtrar por confianza MÁS ESTRICTO
-                confidence = int(data['conf'][i])
-                if confidence < self.confidence_threshold * 100:
-                    continue
-                
-                # Obtener texto y coordenadas
-                text = data['text'][i].strip()
-                
+            # Filtrar por confianza MÁS ESTRICTO y validar solo dimensiones
+            # básicas - SIN área mínima (cualquier tamaño de texto)
+            mask = (confidences >= self.confidence_threshold * 100) & (boxes[:, 2] > 0) & (boxes[:, 3] > 0)
+            
+            detections = []
+            texts = data['text']
+            for i in np.flatnonzero(mask):
                 # Validación básica de longitud
+                text = texts[i].strip()
                 if len(text) < self.min_text_length:
                     continue
                 
-                x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
-                
-                # Validar solo dimensiones básicas - SIN área mínima
-                if w > 0 and h > 0:  # Cualquier tamaño de texto
-                    detections.append({
-                        'text': text,
-                        'bbox': [x, y, w, h],
-                        'confidence': float(confidence / 100.0),
-                        'method': 'tesseract'
-                    })
+                detections.append({
+                    'text': text,
+                    'bbox': boxes[i].tolist(),
+                    'confidence': float(confidences[i] / 100.0),
+                    'method': 'tesseract'
+                })
             
             return detections
             
@@ -217,36 +289,73 @@ class TextDetector:
             # Ejecutar detección
             results = self.easyocr_reader.readtext(processed_frame)
             
-            detections = []
-            for (bbox, text, confidence) in results:
-                # Filtrar por confianza MÁS ESTRICTO
-                if confidence < self.confidence_threshold:
-                    continue
-                
-                text = text.strip()
-                if len(text) < self.min_text_length:
-                    continue
-                
-                # Convertir bbox a formato estándar
-                x1, y1 = bbox[0]
-                x2, y2 = bbox[2]
-                x, y, w, h = int(x1), int(y1), int(x2-x1), int(y2-y1)
-                
-                # Validar solo dimensiones básicas - SIN área mínima
-                if w > 0 and h > 0:  # Cualquier tamaño de texto
-                    detections.append({
-                        'text': text,
-                        'bbox': [x, y, w, h],
-                        'confidence': float(confidence),
-                        'method': 'easyocr'
-                    })
-            
-            return detections
+            return self._parse_easyocr_results(results)
             
         except Exception as e:
             console.print(f"    [red]Error con EasyOCR: {str(e)}[/red]")
             return []
     
+    def detect_text_with_easyocr_batch(self, frames: List[np.ndarray]) -> List[List[Dict]]:
+        """
+        Detecta texto en varios frames con una sola llamada a EasyOCR
+        
+        El lector procesa el lote de una vez (readtext_batched), repartiendo
+        el coste de cada pasada del modelo entre todos los frames.
+        
+        Args:
+            frames: Frames de video (del mismo tamaño, p. ej. del mismo video)
+            
+        Returns:
+            Lista de detecciones por frame, en el mismo orden
+        """
+        if self.easyocr_reader is None:
+            return [[] for _ in frames]
+        
+        try:
+            processed_frames = [self.preprocess_frame(frame) for frame in frames]
+            batch_results = self.easyocr_reader.readtext_batched(processed_frames)
+            return [self._parse_easyocr_results(results) for results in batch_results]
+            
+        except Exception as e:
+            console.print(f"    [yellow]Error con EasyOCR por lotes, frame a frame: {str(e)}[/yellow]")
+            return [self.detect_text_with_easyocr(frame) for frame in frames]
+    
+    def _parse_easyocr_results(self, results) -> List[Dict]:
+        """
+        Convierte la salida de EasyOCR (bbox, texto, confianza) a detecciones
+        
+        Args:
+            results: Resultados de readtext para un frame
+            
+        Returns:
+            Lista de detecciones de texto
+        """
+        detections = []
+        for (bbox, text, confidence) in results:
+            # Filtrar por confianza MÁS ESTRICTO
+            if confidence < self.confidence_threshold:
+                continue
+            
+            text = text.strip()
+            if len(text) < self.min_text_length:
+                continue
+            
+            # Convertir bbox a formato estándar
+            x1, y1 = bbox[0]
+            x2, y2 = bbox[2]
+            x, y, w, h = int(x1), int(y1), int(x2-x1), int(y2-y1)
+            
+            # Validar solo dimensiones básicas - SIN área mínima
+            if w > 0 and h > 0:  # Cualquier tamaño de texto
+                detections.append({
+                    'text': text,
+                    'bbox': [x, y, w, h],
+                    'confidence': float(confidence),
+                    'method': 'easyocr'
+                })
+        
+        return detections
+    
     def _is_valid_text(self, text: str) -> bool:
         """
         FILTRO ULTRA PROFESIONAL - Detecta CUALQUIER texto visible
@@ -517,13 +626,16 @@ class TextDetector:
         
         return detections
 
-    def detect_text_on_frame(self, frame: np.ndarray) -> List[Dict]:
+    def detect_text_on_frame(self, frame: np.ndarray,
+                             easyocr_detections: Optional[List[Dict]] = None) -> List[Dict]:
         """
         DETECCIÓN ULTRA PROFESIONAL - Múltiples capas de detección
         Sistema extremadamente estricto para rechazar CUALQUIER texto
         
         Args:
             frame: Frame de video
+            easyocr_detections: Resultado de EasyOCR ya calculado para este
+                frame (p. ej. en lote); None = ejecutarlo aquí
             
         Returns:
             Lista de detecciones de texto
@@ -536,7 +648,8 @@ class TextDetector:
         
         # CAPA 2: EasyOCR (siempre, no importa si Tesseract encuentra algo)
         if self.easyocr_reader is not None:
-            easyocr_detections = self.detect_text_with_easyocr(frame)
+            if easyocr_detections is None:
+                easyocr_detections = self.detect_text_with_easyocr(frame)
             all_detections.extend(easyocr_detections)
         
         # CAPA 3: Detección de patrones visuales
@@ -599,34 +712,38 @@ class TextDetector:
             console.print(f"    [blue]Muestreo: cada {sample_rate} frames[/blue]")
             
             detections = []
-            frame_count = 0
             processed_frames = 0
             max_frames = 15  # OPTIMIZADO para velocidad masiva
             
-            while processed_frames < max_frames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Aplicar muestreo ultra agresivo
-                if frame_count % sample_rate == 0:
-                    text_detections = self.detect_text_on_frame(frame)
+            # Frames muestreados pendientes de OCR: (índice, frame)
+            batch = []
+            
+            # Un hilo decodifica (cv2 libera el GIL) mientras aquí se hace el OCR
+            frames = _prefetch_sampled_frames(cap, sample_rate)
+            try:
+                for frame_index, frame in frames:
+                    if self._is_blurry(frame):
+                        # Sin bordes nítidos no hay texto legible: se omite el OCR
+                        processed_frames += 1
+                    else:
+                        batch.append((frame_index, frame))
                     
-                    if text_detections:
-                        for detection in text_detections:
-                            detection['frame'] = frame_count
-                            detection['timestamp'] = float(frame_count / fps if fps > 0 else 0)
-                            detections.append(detection)
-                        
-                        # SALIDA TEMPRANA INMEDIATA - si detectamos texto, parar inmediatamente
-                        console.print(f"    [yellow]⚠️  Texto detectado en frame {frame_count}[/yellow]")
-                        break
+                    if len(batch) == OCR_BATCH_SIZE:
+                        detections, analyzed = self._detect_text_on_batch(batch, fps)
+                        processed_frames += analyzed
+                        batch = []
                     
-                    processed_frames += 1
+                    if detections or processed_frames + len(batch) >= max_frames:
+                        break
                 
-                frame_count += 1
-            
-            cap.release()
+                # Último lote incompleto
+                if batch and not detections:
+                    detections, analyzed = self._detect_text_on_batch(batch, fps)
+                    processed_frames += analyzed
+            finally:
+                # Detener el decodificador antes de liberar el video
+                frames.close()
+                cap.release()
             
             console.print(f"    [green]✓ Procesados {processed_frames} frames, {len(detections)} textos detectados[/green]")
             return detections
@@ -635,6 +752,64 @@ class TextDetector:
             console.print(f"    [red]✗ Error analizando video: {str(e)}[/red]")
             return []
     
+    def _is_blurry(self, frame: np.ndarray, threshold: float = TEXT_BLUR_THRESHOLD) -> bool:
+        """
+        Verifica si un frame está demasiado borroso (o liso) para contener texto
+        
+        Usa la varianza del Laplaciano sobre una versión reducida a 256x256:
+        sobre el frame completo cuesta ~15 veces más.
+        
+        Args:
+            frame: Frame de video
+            threshold: Varianza mínima para considerar el frame nítido
+            
+        Returns:
+            True si el frame puede omitirse del OCR
+        """
+        try:
+            small = cv2.resize(frame, (256, 256))
+            if len(small.shape) == 3:
+                small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            return cv2.Laplacian(small, cv2.CV_64F).var() < threshold
+        except Exception:
+            # Ante la duda, se analiza
+            return False
+    
+    def _detect_text_on_batch(self, batch: List[Tuple[int, np.ndarray]], fps: float) -> Tuple[List[Dict], int]:
+        """
+        Analiza un lote de frames muestreados, con EasyOCR en una sola llamada
+        
+        Los frames se revisan en orden y se para en el primero con texto
+        (SALIDA TEMPRANA), igual que frame a frame.
+        
+        Args:
+            batch: Pares (índice de frame, frame)
+            fps: Frames por segundo del video
+            
+        Returns:
+            (detecciones del primer frame con texto, frames analizados sin texto)
+        """
+        if self.easyocr_reader is not None:
+            easyocr_results = self.detect_text_with_easyocr_batch([frame for _, frame in batch])
+        else:
+            easyocr_results = [None] * len(batch)
+        
+        analyzed = 0
+        for (frame_index, frame), easyocr_detections in zip(batch, easyocr_results):
+            text_detections = self.detect_text_on_frame(frame, easyocr_detections)
+            
+            if text_detections:
+                for detection in text_detections:
+                    detection['frame'] = frame_index
+                    detection['timestamp'] = float(frame_index / fps if fps > 0 else 0)
+                
+                console.print(f"    [yellow]⚠️  Texto detectado en frame {frame_index}[/yellow]")
+                return text_detections, analyzed
+            
+            analyzed += 1
+        
+        return [], analyzed
+    
     def _calculate_sample_rate(self, duration: float, sample_strategy: dict, fps: float) -> int:
         """
         Calcula la tasa de muestreo basada en la duración del video
@@ -662,6 +837,11 @@ class TextDetector:
         """
         Elimina detecciones duplicadas basadas en proximidad espacial
         
+        Una detección es duplicada si su intersección con alguna ya conservada
+        supera la mitad del área de la menor de las dos. Cada candidata se
+        compara de una vez con numpy contra las conservadas hasta ese momento
+        (memoria O(n), no una matriz n x n de todos los pares).
+        
         Args:
             detections: Lista de detecciones
             
@@ -671,37 +851,30 @@ class TextDetector:
         if not detections:
             return []
         
-        unique_detections = []
-        
-        for detection in detections:
-            is_duplicate = False
-            bbox1 = detection['bbox']
-            
-            for unique_detection in unique_detections:
-                bbox2 = unique_detection['bbox']
-                
-                # Calcular intersección
-                x1, y1, w1, h1 = bbox1
-                x2, y2, w2, h2 = bbox2
-                
-                # Calcular área de intersección
-                x_overlap = max(0, min(x1 + w1, x2 + w2) - max(x1, x2))
-                y_overlap = max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
-                overlap_area = x_overlap * y_overlap
-                
-                # Calcular áreas
-                area1 = w1 * h1
-                area2 = w2 * h2
+        boxes = np.asarray([detection['bbox'] for detection in detections], dtype=np.float64)
+        x1, y1 = boxes[:, 0], boxes[:, 1]
+        x2, y2 = x1 + boxes[:, 2], y1 + boxes[:, 3]
+        areas = boxes[:, 2] * boxes[:, 3]
+        
+        # Coordenadas de las conservadas, contiguas para comparar por filas
+        kept = np.empty((len(detections), 5), dtype=np.float64)
+        kept_idx = []
+        for i in range(len(detections)):
+            k = len(kept_idx)
+            if k:
+                kx1, ky1, kx2, ky2, karea = kept[:k].T
+                x_overlap = np.minimum(kx2, x2[i]) - np.maximum(kx1, x1[i])
+                y_overlap = np.minimum(ky2, y2[i]) - np.maximum(ky1, y1[i])
                 
                 # Si hay superposición significativa, es duplicado
-                if overlap_area > 0.5 * min(area1, area2):
-                    is_duplicate = True
-                    break
+                overlap = np.clip(x_overlap, 0, None) * np.clip(y_overlap, 0, None)
+                if (overlap > 0.5 * np.minimum(karea, areas[i])).any():
+                    continue
             
-            if not is_duplicate:
-                unique_detections.append(detection)
+            kept[k] = (x1[i], y1[i], x2[i], y2[i], areas[i])
+            kept_idx.append(i)
         
-        return unique_detections
+        return [detections[i] for i in kept_idx]
     
     def get_detector_info(self) -> Dict[str, Any]:
         """
@@ -4,15 +4,28 @@ Enhanced Video Analyzer - Análisis optimizado de videos completos
 
 import time
 import os
+import cv2
+import hashlib
+import json
 from typing import Dict, List, Any
 from rich.console import Console
 
 from .face_detector import FaceDetector
 from .text_detector import TextDetector
-from config import VIDEO_SAMPLE_STRATEGY, ANALYSIS_CONFIG
+from config import (
+    VIDEO_SAMPLE_STRATEGY, ANALYSIS_CONFIG, FACE_CONFIDENCE,
+    OCR_CONFIDENCE, MIN_TEXT_LENGTH, TEXT_BLUR_THRESHOLD, MODEL_CONFIGS
+)
 
 console = Console()
 
+# Filtros de contenido en orden de evaluación:
+# (filtro, bandera del análisis, clave de detalles, método, razón de descarte)
+FILTER_CHECKS = (
+    ('faces', 'has_face', 'face_details', '_analyze_faces', 'rostro detectado'),
+    ('text', 'has_text', 'text_details', '_analyze_text', 'texto detectado'),
+)
+
 class EnhancedVideoAnalyzer:
     """
     Analizador de video optimizado que combina detección de rostros y texto
@@ -93,13 +106,53 @@ class EnhancedVideoAnalyzer:
             console.print(f"    [red]✗ Error analizando video: {str(e)}[/red]")
             return self._create_error_result(str(e))
     
-    def analyze_video_optimized(self, path: str, filters: dict) -> Dict:
+    @staticmethod
+    def enabled_checks(filters: dict) -> frozenset:
+        """
+        Calcula qué detectores deben ejecutarse según los filtros
+        
+        Args:
+            filters: Diccionario con filtros activos
+            
+        Returns:
+            Conjunto de claves de filtro activas
+        """
+        return frozenset(key for key, *_ in FILTER_CHECKS if filters.get(key, True))
+    
+    def cache_signature(self, enabled_checks: frozenset) -> str:
+        """
+        Firma de todo lo que determina el resultado del análisis
+        
+        Args:
+            enabled_checks: Detectores activos
+            
+        Returns:
+            Hash SHA1 (hex) de filtros, umbrales, muestreo y modelos
+        """
+        relevant = {
+            'checks': sorted(enabled_checks),
+            'face_confidence': FACE_CONFIDENCE,
+            'ocr_confidence': OCR_CONFIDENCE,
+            'min_text_length': MIN_TEXT_LENGTH,
+            'text_blur_threshold': TEXT_BLUR_THRESHOLD,
+            'sample_strategy': self.sample_strategy,
+            'analysis_config': self.analysis_config,
+            'face_model': self.face_detector.model_path,
+            'ocr_languages': MODEL_CONFIGS['easyocr']['languages'],
+        }
+        encoded = json.dumps(relevant, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha1(encoded).hexdigest()
+    
+    def analyze_video_optimized(self, path: str, filters: dict, enabled_checks: frozenset = None,
+                                precomputed: Dict[str, Dict] = None) -> Dict:
         """
         Analiza un video con flujo optimizado de filtros - descarta inmediatamente si no pasa un filtro
         
         Args:
             path: Ruta al archivo de video
             filters: Diccionario con filtros activos
+            enabled_checks: Detectores activos precalculados (ver enabled_checks)
+            precomputed: Resultados ya calculados por método (p. ej. de analyze_batch)
             
         Returns:
             Diccionario con resultados del análisis o descarte inmediato
@@ -129,49 +182,37 @@ class EnhancedVideoAnalyzer:
             # Calcular estrategia de muestreo
             sample_strategy = self._calculate_sample_strategy(video_info['duration'])
             
-            # FILTRO 1: Análisis de rostros (si está activo)
-            if filters.get('faces', True):
-                console.print("    [blue]Detectando rostros...[/blue]")
-                face_analysis = self._analyze_faces(path, sample_strategy)
+            # Filtros en orden; el primero que detecta algo descarta el video
+            if enabled_checks is None:
+                enabled_checks = self.enabled_checks(filters)
+            
+            analysis = {}
+            for filter_key, flag, details_key, method, reason in FILTER_CHECKS:
+                if filter_key not in enabled_checks:
+                    analysis[flag] = False
+                    analysis[details_key] = []
+                    continue
                 
-                if face_analysis.get('has_face', False):
-                    # DESCARTO INMEDIATO - no procesar texto
-                    analysis_time = int((time.time() - start_time) * 1000)
-                    console.print("    [yellow]⚠️  Rostros detectados - DESCARTANDO INMEDIATAMENTE[/yellow]")
-                    return {
-                        'estado': 'descartado',
-                        'razones': ['rostro detectado'],
-                        'has_face': True,
-                        'face_details': face_analysis.get('details', []),
-                        'analysis_time_ms': analysis_time,
-                        'video_info': video_info
-                    }
+                if precomputed and method in precomputed:
+                    check = precomputed[method]
                 else:
-                    console.print("    [green]✓ Sin rostros detectados[/green]")
-            else:
-                face_analysis = {'has_face': False, 'details': []}
-            
-            # FILTRO 2: Análisis de texto (solo si no hay rostros y está activo)
-            if filters.get('text', True):
-                console.print("    [blue]Detectando texto...[/blue]")
-                text_analysis = self._analyze_text(path, sample_strategy)
+                    check = getattr(self, method)(path, sample_strategy)
+                analysis[flag] = check.get(flag, False)
+                analysis[details_key] = check.get('details', [])
                 
-                if text_analysis.get('has_text', False):
-                    # DESCARTO INMEDIATO
+                if analysis[flag]:
+                    # DESCARTO INMEDIATO - no procesar los filtros restantes
                     analysis_time = int((time.time() - start_time) * 1000)
-                    console.print("    [yellow]⚠️  Texto detectado - DESCARTANDO INMEDIATAMENTE[/yellow]")
+                    console.print(f"    [yellow]⚠️  {reason.capitalize()} - DESCARTANDO INMEDIATAMENTE[/yellow]")
                     return {
                         'estado': 'descartado',
-                        'razones': ['texto detectado'],
-                        'has_text': True,
-                        'text_details': text_analysis.get('details', []),
+                        'razones': [reason],
+                        flag: True,
+                        details_key: analysis[details_key],
                         'analysis_time_ms': analysis_time,
                         'video_info': video_info
                     }
-                else:
-                    console.print("    [green]✓ Sin texto detectado[/green]")
-            else:
-                text_analysis = {'has_text': False, 'details': []}
+                console.print(f"    [green]✓ Sin {reason}[/green]")
             
             # VIDEO ACEPTADO
             analysis_time = int((time.time() - start_time) * 1000)
@@ -179,10 +220,7 @@ class EnhancedVideoAnalyzer:
             
             return {
                 'estado': 'aceptado',
-                'has_face': face_analysis.get('has_face', False),
-                'face_details': face_analysis.get('details', []),
-                'has_text': text_analysis.get('has_text', False),
-                'text_details': text_analysis.get('details', []),
+                **analysis,
                 'analysis_time_ms': analysis_time,
                 'video_info': video_info,
                 'sample_strategy': sample_strategy
@@ -196,6 +234,49 @@ class EnhancedVideoAnalyzer:
                 'analysis_time_ms': int((time.time() - start_time) * 1000)
             }
     
+    def analyze_batch(self, paths: List[str], filters: dict,
+                      enabled_checks: frozenset = None) -> List[Dict]:
+        """
+        Analiza varios videos agrupando la detección de rostros en un lote de GPU
+        
+        Args:
+            paths: Rutas a los archivos de video
+            filters: Diccionario con filtros activos
+            enabled_checks: Detectores activos precalculados (ver enabled_checks)
+            
+        Returns:
+            Lista de resultados alineada con paths
+        """
+        if enabled_checks is None:
+            enabled_checks = self.enabled_checks(filters)
+        
+        # El lote solo aplica al muestreo simple (sin ventana deslizante)
+        batch_faces = (
+            len(paths) > 1
+            and 'faces' in enabled_checks
+            and not self.analysis_config.get('enable_sliding_window', True)
+        )
+        if not batch_faces:
+            return [self.analyze_video_optimized(path, filters, enabled_checks) for path in paths]
+        
+        try:
+            face_detections = self.face_detector.detect_faces_on_videos(paths)
+        except Exception as e:
+            console.print(f"    [red]✗ Error en detección por lotes: {str(e)}[/red]")
+            return [self.analyze_video_optimized(path, filters, enabled_checks) for path in paths]
+        
+        results = []
+        for path, detections in zip(paths, face_detections):
+            precomputed = {
+                '_analyze_faces': {
+                    'has_face': len(detections) > 0,
+                    'details': detections,
+                    'count': len(detections)
+                }
+            }
+            results.append(self.analyze_video_optimized(path, filters, enabled_checks, precomputed))
+        return results
+    
     def _get_video_info(self, path: str) -> Dict:
         """
         Obtiene información básica del video
@@ -207,8 +288,6 @@ class EnhancedVideoAnalyzer:
             Diccionario con información del video
         """
         try:
-            import cv2
-            
             cap = cv2.VideoCapture(path)
             if not cap.isOpened():
                 return None
@@ -377,8 +456,6 @@ class EnhancedVideoAnalyzer:
             Resultado del análisis del frame
         """
         try:
-            import cv2
-            
             frame = cv2.imread(frame_path)
             if frame is None:
                 return self._create_error_result("No se pudo cargar el frame")
@@ -71,17 +71,21 @@ def main():
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeElapsedColumn(),
             console=console,
-            expand=True
+            expand=True,
+            refresh_per_second=4
         ) as progress:
             
-            # Crear tarea de progreso
-            task = progress.add_task("Buscando videos masivamente (automático)...", total=100)
+            # Crear tarea de progreso (el total se conoce tras la búsqueda)
+            task = progress.add_task("Buscando videos masivamente (automático)...", total=None)
             
-            # Ejecutar el trabajo
-            results = run_job(config)
+            # Ejecutar el trabajo con avance real por video
+            results = run_job(
+                config,
+                progress_cb=lambda done, total: progress.update(task, completed=done, total=total)
+            )
             
             # Completar progreso
-            progress.update(task, completed=100)
+            progress.update(task, completed=len(results), total=len(results) or 1)
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -3,6 +3,7 @@ Simple Cleaner para limpieza de archivos temporales
 """
 
 import os
+import shutil
 import time
 from typing import List, Optional
 from rich.console import Console
@@ -215,7 +216,6 @@ class SimpleCleaner:
                         deleted_count += 1
                         console.print(f"    [yellow]🗑️  Eliminado: {filename}[/yellow]")
                     elif os.path.isdir(file_path):
-                        import shutil
                         shutil.rmtree(file_path)
                         deleted_count += 1
                         console.print(f"    [yellow]🗑️  Eliminado directorio: {filename}[/yellow]")
@@ -2,6 +2,7 @@
 Configuración central del VideoFinder AI Bot
 """
 import os
+import shutil
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
@@ -11,7 +12,12 @@ load_dotenv()
 TEMP_DIR = os.getenv("TEMP_DIR", "tmp")
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", "outputs")
 OUTPUT_JSON = os.path.join(OUTPUT_DIR, "results.json")
+OUTPUT_JSONL = os.path.join(OUTPUT_DIR, "results.jsonl")  # Una línea por resultado, escrita al vuelo
 ACCEPTED_LIST = os.path.join(OUTPUT_DIR, "accepted_list.txt")
+RAW_METADATA_JSONL = os.path.join(OUTPUT_DIR, "raw_metadata.jsonl")
+ANALYSIS_CACHE_FILE = os.getenv("ANALYSIS_CACHE_FILE", os.path.join(OUTPUT_DIR, "analysis_cache.sqlite"))  # Vacío = deshabilitada
+PROBE_CACHE_FILE = os.path.join(TEMP_DIR, ".probe_cache.json")  # Caché persistente de metadatos
+SCRAPE_CACHE_FILE = os.getenv("SCRAPE_CACHE_FILE", os.path.join(TEMP_DIR, "scrape_cache.sqlite"))
 
 # Configuración de análisis de video - ULTRA MEGA VELOCIDAD
 # Forzar valores ultra optimizados para velocidad máxima
@@ -25,6 +31,8 @@ VIDEO_SAMPLE_STRATEGY = {
 FACE_CONFIDENCE = float(os.getenv("FACE_CONFIDENCE", "0.45"))
 OCR_CONFIDENCE = float(os.getenv("OCR_CONFIDENCE", "0.1"))  # EXTREMO - detecta TODO
 MIN_TEXT_LENGTH = int(os.getenv("MIN_TEXT_LENGTH", "1"))  # Mínimo 1 carácter
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", "8"))  # Frames por llamada de EasyOCR
+TEXT_BLUR_THRESHOLD = float(os.getenv("TEXT_BLUR_THRESHOLD", "100.0"))  # Varianza del Laplaciano mínima para hacer OCR (0 = sin filtro)
 
 # Configuración de GPU - FORZAR SIEMPRE GPU
 def _check_gpu_availability():
@@ -51,10 +59,31 @@ TESSERACT_CMD = os.getenv("TESSERACT_CMD", "C:\\Program Files\\Tesseract-OCR\\te
 # Configuración de descarga - ULTRA RÁPIDO
 DOWNLOAD_TIMEOUT = 30  # ULTRA REDUCIDO - forzar valor
 MAX_DURATION = int(os.getenv("MAX_DURATION", "600"))
+THUMBNAIL_TIMEOUT_MIN = float(os.getenv("THUMBNAIL_TIMEOUT_MIN", "5.0"))
+THUMBNAIL_TIMEOUT_MAX = float(os.getenv("THUMBNAIL_TIMEOUT_MAX", "30.0"))
 
 # Configuración de scraping
 REQUEST_DELAY = float(os.getenv("REQUEST_DELAY", "1.0"))
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+PREFILTER_MAX_WORKERS = int(os.getenv("PREFILTER_MAX_WORKERS", "16"))  # Sondas de metadatos concurrentes
+PROBE_BATCH_SIZE = int(os.getenv("PROBE_BATCH_SIZE", "20"))  # URLs por invocación de yt-dlp
+METADATA_SOCKET_TIMEOUT = float(os.getenv("METADATA_SOCKET_TIMEOUT", "5"))  # Timeout de red de las sondas de metadatos
+METADATA_RETRIES = int(os.getenv("METADATA_RETRIES", "1"))  # Reintentos de yt-dlp en sondas (URLs caídas fallan rápido)
+SCRAPE_CACHE = os.getenv("SCRAPE_CACHE", "true").lower() == "true"  # false = sin caché de búsquedas
+SCRAPE_CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", "3600"))  # Validez de búsquedas/metadatos cacheados
+SCRAPE_CACHE_EMPTY_TTL = float(os.getenv("SCRAPE_CACHE_EMPTY_TTL", "300"))  # Validez de metadatos vacíos
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "604800"))  # Validez en disco de metadatos por URL (7 días)
+KEEP_RAW = os.getenv("KEEP_RAW", "false").lower() == "true"  # true = raw_data completo (formats, thumbnails...)
+# Descargas simultáneas: son I/O (red + yt-dlp), por eso se permite superar
+# el número de núcleos. 0 = automático, min(32, núcleos + 4)
+DOWNLOAD_WORKERS = int(os.getenv("DOWNLOAD_WORKERS", "0")) or min(32, (os.cpu_count() or 4) + 4)
+ANALYZER_WORKERS = int(os.getenv("ANALYZER_WORKERS", "1"))  # Hilos de análisis (GPU)
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))  # Videos descargados en espera de análisis
+ANALYZE_BATCH_SIZE = int(os.getenv("ANALYZE_BATCH_SIZE", "4"))  # Videos por lote de inferencia en GPU
+TIKTOK_CONCURRENCY = int(os.getenv("TIKTOK_CONCURRENCY", "20"))  # Tarjetas de TikTok extraídas a la vez
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))  # Navegadores de playwright reutilizables
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "50"))  # Usos antes de reciclar un navegador
+BROWSER_MAX_AGE = float(os.getenv("BROWSER_MAX_AGE", "900"))  # Segundos de vida de un navegador
 
 # Configuración de filtros
 REJECT_ON_PERSON_CLASS = False
@@ -101,6 +130,7 @@ PLATFORM_CONFIGS = {
 # Configuración de logging
 LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+VERBOSE = os.getenv("VERBOSE", "false").lower() == "true"  # Mensajes detallados por operación
 
 # Configuración de análisis optimizado - ULTRA MEGA VELOCIDAD
 ANALYSIS_CONFIG = {
@@ -128,8 +158,6 @@ OUTPUT_CONFIG = {
 # Validación de configuración
 def validate_config():
     """Valida la configuración y crea directorios necesarios"""
-    import os
-    
     # Crear directorios si no existen
     os.makedirs(TEMP_DIR, exist_ok=True)
     os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -139,12 +167,8 @@ def validate_config():
         print(f"⚠️  Advertencia: Tesseract no encontrado en {TESSERACT_CMD}")
         print("   Asegúrate de instalar Tesseract OCR y configurar TESSERACT_CMD en .env")
     
-    # Validar FFmpeg
-    import subprocess
-    try:
-        subprocess.run(['ffmpeg', '-version'], capture_output=True, check=True)
-        subprocess.run(['ffprobe', '-version'], capture_output=True, check=True)
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    # Validar FFmpeg (se busca en el PATH sin lanzar los ejecutables)
+    if not (shutil.which('ffmpeg') and shutil.which('ffprobe')):
         print("⚠️  Advertencia: FFmpeg no encontrado en PATH")
         print("   Asegúrate de instalar FFmpeg y agregarlo al PATH")
     
@@ -2,25 +2,100 @@
 Video Downloader usando yt-dlp
 """
 
+import glob
+import itertools
+import atexit
+import json
+import logging
 import os
+import queue
 import subprocess
 import tempfile
+import threading
 import time
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, Dict, Any
 from rich.console import Console
+from rich.logging import RichHandler
 
 from config import (
     TEMP_DIR, DOWNLOAD_TIMEOUT, MAX_DURATION, 
-    YT_DLP_OPTIONS, REQUEST_DELAY
+    YT_DLP_OPTIONS, REQUEST_DELAY,
+    THUMBNAIL_TIMEOUT_MIN, THUMBNAIL_TIMEOUT_MAX, VERBOSE, LOG_LEVEL
 )
 
 console = Console()
 
+# Los workers solo encolan mensajes; un hilo listener los imprime sin
+# que las descargas paralelas compitan por el lock de la consola
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger(__name__)
+logger.addHandler(QueueHandler(_log_queue))
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+
+# El listener arranca con el primer mensaje (importar el módulo no crea hilos)
+_log_listener = None
+_log_listener_lock = threading.Lock()
+
+def _ensure_log_listener():
+    """Arranca el hilo listener del log la primera vez que se necesita"""
+    global _log_listener
+    if _log_listener is not None:
+        return
+    with _log_listener_lock:
+        if _log_listener is None:
+            listener = QueueListener(
+                _log_queue,
+                RichHandler(console=console, markup=True, show_path=False, show_time=False, show_level=False)
+            )
+            listener.start()
+            atexit.register(listener.stop)
+            _log_listener = listener
+
+def _report(message: str):
+    """
+    Emite el mensaje de resultado de una operación
+    
+    Args:
+        message: Mensaje con markup de rich
+    """
+    if VERBOSE:
+        console.print(message)
+    else:
+        _ensure_log_listener()
+        logger.info(message)
+
+# Equivalencia entre opciones de YT_DLP_OPTIONS y flags de línea de comandos
+_YT_DLP_FLAGS = {
+    'quiet': '--quiet',
+    'no_warnings': '--no-warnings',
+    'ignoreerrors': '--ignore-errors',
+    'no_check_certificate': '--no-check-certificate',
+}
+
+def _options_to_argv(options: Dict[str, Any]) -> tuple:
+    """Convierte las opciones de yt-dlp de la configuración en argumentos de CLI"""
+    argv = [flag for key, flag in _YT_DLP_FLAGS.items() if options.get(key)]
+    if options.get('user_agent'):
+        argv.extend(['--user-agent', options['user_agent']])
+    return tuple(argv)
+
+# Fragmento de argv común, calculado una sola vez al importar
+YT_DLP_ARGV = _options_to_argv(YT_DLP_OPTIONS)
+
 class VideoDownloader:
     """
     Descargador de videos usando yt-dlp
     """
     
+    # Contador compartido por todas las instancias: sufijos únicos sin syscalls
+    _counter = itertools.count()
+    
+    # Directorios temporales ya creados en este proceso (evita un stat por instancia)
+    _dirs_initialized = set()
+    _init_lock = threading.Lock()
+    
     def __init__(self, temp_dir: str = TEMP_DIR):
         """
         Inicializa el descargador
@@ -29,7 +104,47 @@ class VideoDownloader:
             temp_dir: Directorio temporal para descargas
         """
         self.temp_dir = temp_dir
-        os.makedirs(temp_dir, exist_ok=True)
+        with self._init_lock:
+            if temp_dir not in self._dirs_initialized:
+                os.makedirs(temp_dir, exist_ok=True)
+                self._dirs_initialized.add(temp_dir)
+        
+        # Media móvil exponencial de la latencia de descargas de thumbnails
+        self._recent_rtt_ema = None
+        
+        # Prefijo de rutas temporales y comandos base precalculados
+        self._temp_prefix = os.path.join(temp_dir, 'temp_')
+        self._base_cmd_temporal = (
+            'yt-dlp',
+            '--format', 'worst[height<=480]',  # ULTRA BAJA RESOLUCIÓN para velocidad máxima
+            '--no-playlist',
+            *YT_DLP_ARGV,
+            '--concurrent-fragments', '1',  # Un fragmento a la vez para velocidad
+            '--fragment-retries', '1',  # Menos reintentos
+            '--retries', '1',  # Menos reintentos
+            '--socket-timeout', '10',  # Timeout más corto
+        )
+        self._base_cmd_section = (
+            'yt-dlp',
+            '--format', 'best[height<=1080]',
+            '--no-playlist',
+            '--no-warnings',
+            '--quiet',
+        )
+        self._base_cmd_thumb = (
+            'yt-dlp',
+            '--write-thumbnail',
+            '--skip-download',
+            '--no-playlist',
+            '--no-warnings',
+            '--quiet',
+        )
+        self._base_cmd_info = (
+            'yt-dlp',
+            '--dump-json',
+            '--no-warnings',
+            '--quiet',
+        )
         
     def download_temporal(self, url: str, max_duration: int = None) -> Optional[str]:
         """
@@ -43,38 +158,20 @@ class VideoDownloader:
             Ruta al archivo descargado o None si falla
         """
         try:
-            console.print(f"    [blue]Descargando: {url[:50]}...[/blue]")
+            if VERBOSE:
+                console.print(f"    [blue]Descargando: {url[:50]}...[/blue]")
             
             # Generar nombre de archivo único
-            timestamp = int(time.time() * 1000)
-            filename = f"temp_video_{timestamp}.%(ext)s"
-            output_path = os.path.join(self.temp_dir, filename)
+            output_path = f"{self._temp_prefix}video_{self._unique_suffix()}.%(ext)s"
             
             # Construir comando yt-dlp ULTRA OPTIMIZADO para velocidad máxima
             cmd = [
-                'yt-dlp',
+                *self._base_cmd_temporal,
                 '--output', output_path,
-                '--format', 'worst[height<=480]',  # ULTRA BAJA RESOLUCIÓN para velocidad máxima
-                '--no-playlist',
-                '--no-warnings',
-                '--quiet',
-                '--ignore-errors',
-                '--no-check-certificate',
-                '--concurrent-fragments', '1',  # Un fragmento a la vez para velocidad
-                '--fragment-retries', '1',  # Menos reintentos
-                '--retries', '1',  # Menos reintentos
-                '--socket-timeout', '10',  # Timeout más corto
-                '--user-agent', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                '--match-filter', f'duration <= {max_duration or MAX_DURATION}',
+                url
             ]
             
-            # Agregar límite de duración si se especifica
-            if max_duration:
-                cmd.extend(['--match-filter', f'duration <= {max_duration}'])
-            else:
-                cmd.extend(['--match-filter', f'duration <= {MAX_DURATION}'])
-            
-            cmd.append(url)
-            
             # Ejecutar descarga
             result = subprocess.run(
                 cmd,
@@ -87,20 +184,20 @@ class VideoDownloader:
             # Buscar el archivo descargado
             downloaded_file = self._find_downloaded_file(output_path)
             if downloaded_file and os.path.exists(downloaded_file):
-                console.print(f"    [green]OK - Descargado: {os.path.basename(downloaded_file)}[/green]")
+                _report(f"    [green]OK - Descargado: {os.path.basename(downloaded_file)}[/green]")
                 return downloaded_file
             else:
-                console.print(f"    [red]ERROR - No se pudo encontrar el archivo descargado[/red]")
+                _report("    [red]ERROR - No se pudo encontrar el archivo descargado[/red]")
                 return None
                 
         except subprocess.TimeoutExpired:
-            console.print(f"    [red]ERROR - Timeout en descarga[/red]")
+            _report("    [red]ERROR - Timeout en descarga[/red]")
             return None
         except subprocess.CalledProcessError as e:
-            console.print(f"    [red]ERROR - Error en descarga: {e}[/red]")
+            _report(f"    [red]ERROR - Error en descarga: {e}[/red]")
             return None
         except Exception as e:
-            console.print(f"    [red]ERROR - Error inesperado: {str(e)}[/red]")
+            _report(f"    [red]ERROR - Error inesperado: {str(e)}[/red]")
             return None
         finally:
             # Delay entre descargas
@@ -119,21 +216,16 @@ class VideoDownloader:
             Ruta al archivo descargado o None si falla
         """
         try:
-            console.print(f"    [blue]Descargando sección: {start}s-{start+duration}s[/blue]")
+            if VERBOSE:
+                console.print(f"    [blue]Descargando sección: {start}s-{start+duration}s[/blue]")
             
             # Generar nombre de archivo único
-            timestamp = int(time.time() * 1000)
-            filename = f"temp_section_{timestamp}.%(ext)s"
-            output_path = os.path.join(self.temp_dir, filename)
+            output_path = f"{self._temp_prefix}section_{self._unique_suffix()}.%(ext)s"
             
             # Construir comando yt-dlp con segmento
             cmd = [
-                'yt-dlp',
+                *self._base_cmd_section,
                 '--output', output_path,
-                '--format', 'best[height<=1080]',
-                '--no-playlist',
-                '--no-warnings',
-                '--quiet',
                 '--download-sections', f'*{start}:{start+duration}',
                 url
             ]
@@ -150,14 +242,14 @@ class VideoDownloader:
             # Buscar el archivo descargado
             downloaded_file = self._find_downloaded_file(output_path)
             if downloaded_file and os.path.exists(downloaded_file):
-                console.print(f"    [green]OK - Sección descargada: {os.path.basename(downloaded_file)}[/green]")
+                _report(f"    [green]OK - Sección descargada: {os.path.basename(downloaded_file)}[/green]")
                 return downloaded_file
             else:
-                console.print(f"    [red]ERROR - No se pudo encontrar la sección descargada[/red]")
+                _report("    [red]ERROR - No se pudo encontrar la sección descargada[/red]")
                 return None
                 
         except Exception as e:
-            console.print(f"    [red]ERROR - Error descargando sección: {str(e)}[/red]")
+            _report(f"    [red]ERROR - Error descargando sección: {str(e)}[/red]")
             return None
     
     def download_thumbnail(self, url: str) -> Optional[str]:
@@ -171,47 +263,66 @@ class VideoDownloader:
             Ruta al thumbnail descargado o None si falla
         """
         try:
-            console.print(f"    [blue]Descargando thumbnail: {url[:50]}...[/blue]")
+            if VERBOSE:
+                console.print(f"    [blue]Descargando thumbnail: {url[:50]}...[/blue]")
             
             # Generar nombre de archivo único
-            timestamp = int(time.time() * 1000)
-            filename = f"temp_thumb_{timestamp}.%(ext)s"
-            output_path = os.path.join(self.temp_dir, filename)
+            output_path = f"{self._temp_prefix}thumb_{self._unique_suffix()}.%(ext)s"
             
             # Construir comando yt-dlp para thumbnail
-            cmd = [
-                'yt-dlp',
-                '--output', output_path,
-                '--write-thumbnail',
-                '--skip-download',
-                '--no-playlist',
-                '--no-warnings',
-                '--quiet',
-                url
-            ]
+            cmd = [*self._base_cmd_thumb, '--output', output_path, url]
             
-            # Ejecutar descarga
+            # Ejecutar descarga con timeout ajustado a la latencia observada
+            started = time.monotonic()
             result = subprocess.run(
                 cmd,
                 capture_output=True,
                 text=True,
-                timeout=30,
+                timeout=self._thumbnail_timeout(),
                 check=True
             )
+            self._update_rtt(time.monotonic() - started)
             
             # Buscar el thumbnail descargado
             thumbnail_file = self._find_downloaded_file(output_path)
             if thumbnail_file and os.path.exists(thumbnail_file):
-                console.print(f"    [green]OK - Thumbnail descargado: {os.path.basename(thumbnail_file)}[/green]")
+                _report(f"    [green]OK - Thumbnail descargado: {os.path.basename(thumbnail_file)}[/green]")
                 return thumbnail_file
             else:
-                console.print(f"    [red]ERROR - No se pudo encontrar el thumbnail[/red]")
+                _report("    [red]ERROR - No se pudo encontrar el thumbnail[/red]")
                 return None
                 
+        except subprocess.TimeoutExpired:
+            # Sin reintento: en modo batch es preferible descartar y seguir
+            _report("    [red]ERROR - Timeout descargando thumbnail[/red]")
+            return None
         except Exception as e:
-            console.print(f"    [red]ERROR - Error descargando thumbnail: {str(e)}[/red]")
+            _report(f"    [red]ERROR - Error descargando thumbnail: {str(e)}[/red]")
             return None
     
+    def _thumbnail_timeout(self) -> float:
+        """
+        Calcula el timeout de thumbnails a partir de la latencia reciente
+        
+        Returns:
+            Timeout en segundos acotado a [THUMBNAIL_TIMEOUT_MIN, THUMBNAIL_TIMEOUT_MAX]
+        """
+        if self._recent_rtt_ema is None:
+            return THUMBNAIL_TIMEOUT_MAX
+        return max(THUMBNAIL_TIMEOUT_MIN, min(THUMBNAIL_TIMEOUT_MAX, 4 * self._recent_rtt_ema))
+    
+    def _update_rtt(self, measured: float):
+        """
+        Actualiza la media móvil de latencia con una nueva medición
+        
+        Args:
+            measured: Duración de la última descarga exitosa en segundos
+        """
+        if self._recent_rtt_ema is None:
+            self._recent_rtt_ema = measured
+        else:
+            self._recent_rtt_ema = 0.7 * self._recent_rtt_ema + 0.3 * measured
+    
     def get_video_info(self, url: str) -> Optional[Dict[str, Any]]:
         """
         Obtiene información del video sin descargarlo
@@ -223,13 +334,7 @@ class VideoDownloader:
             Diccionario con información del video o None si falla
         """
         try:
-            cmd = [
-                'yt-dlp',
-                '--dump-json',
-                '--no-warnings',
-                '--quiet',
-                url
-            ]
+            cmd = [*self._base_cmd_info, url]
             
             result = subprocess.run(
                 cmd,
@@ -239,11 +344,10 @@ class VideoDownloader:
                 check=True
             )
             
-            import json
             return json.loads(result.stdout)
             
         except Exception as e:
-            console.print(f"    [red]ERROR - Error obteniendo info: {str(e)}[/red]")
+            _report(f"    [red]ERROR - Error obteniendo info: {str(e)}[/red]")
             return None
     
     def remove(self, file_path: str) -> bool:
@@ -259,11 +363,11 @@ class VideoDownloader:
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
-                console.print(f"    [yellow]DELETED  Eliminado: {os.path.basename(file_path)}[/yellow]")
+                _report(f"    [yellow]DELETED  Eliminado: {os.path.basename(file_path)}[/yellow]")
                 return True
             return False
         except Exception as e:
-            console.print(f"    [red]ERROR - Error eliminando archivo: {str(e)}[/red]")
+            _report(f"    [red]ERROR - Error eliminando archivo: {str(e)}[/red]")
             return False
     
     def cleanup(self) -> int:
@@ -285,14 +389,23 @@ class VideoDownloader:
                         continue
             
             if count > 0:
-                console.print(f"    [yellow]DELETED  Limpiados {count} archivos temporales[/yellow]")
+                _report(f"    [yellow]DELETED  Limpiados {count} archivos temporales[/yellow]")
             
             return count
             
         except Exception as e:
-            console.print(f"    [red]ERROR - Error en limpieza: {str(e)}[/red]")
+            _report(f"    [red]ERROR - Error en limpieza: {str(e)}[/red]")
             return 0
     
+    def _unique_suffix(self) -> str:
+        """
+        Genera un sufijo único para archivos temporales
+        
+        Returns:
+            Sufijo con PID y contador (único entre procesos y llamadas)
+        """
+        return f"{os.getpid()}_{next(self._counter)}"
+    
     def _find_downloaded_file(self, output_pattern: str) -> Optional[str]:
         """
         Busca el archivo descargado basado en el patrón de salida
@@ -306,7 +419,6 @@ class VideoDownloader:
         try:
             # Buscar archivos que coincidan con el patrón
             base_pattern = output_pattern.replace('%(ext)s', '*')
-            import glob
             
             files = glob.glob(base_pattern)
             if files:
@@ -326,12 +438,12 @@ class VideoDownloader:
             Tamaño en bytes
         """
         try:
+            # El directorio temporal es plano: basta un scandir (d_type + stat cacheado)
             total_size = 0
-            for dirpath, dirnames, filenames in os.walk(self.temp_dir):
-                for filename in filenames:
-                    file_path = os.path.join(dirpath, filename)
-                    if os.path.exists(file_path):
-                        total_size += os.path.getsize(file_path)
+            with os.scandir(self.temp_dir) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        total_size += entry.stat(follow_symlinks=False).st_size
             return total_size
         except Exception:
             return 0
@@ -11,7 +11,7 @@ from datetime import datetime
 # Agregar el directorio padre al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from orchestrator import run_job
+from orchestrator import run_job, partition_results
 from analyzer.video_analyzer import EnhancedVideoAnalyzer
 from downloader import VideoDownloader
 from utils.ffprobe_utils import get_video_metadata
@@ -50,8 +50,7 @@ def demo_basic_usage():
         print("📋 RESULTADOS:")
         print("-" * 40)
         
-        accepted = [r for r in results if r.get('estado') == 'aceptado']
-        discarded = [r for r in results if r.get('estado') == 'descartado']
+        accepted, discarded, _ = partition_results(results)
         
         print(f"✅ Aceptados: {len(accepted)}")
         print(f"❌ Descartados: {len(discarded)}")
@@ -6,6 +6,7 @@ Automatizador de contenido vertical sin rostros ni texto
 
 import sys
 import os
+import re
 from datetime import datetime
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
@@ -21,6 +22,15 @@ from orchestrator import run_job
 
 console = Console()
 
+# Opciones válidas (tupla para mensajes ordenados, frozenset para búsquedas O(1))
+_FILTER_NAMES = ('vertical', 'faces', 'text')
+_PLATFORM_NAMES = ('youtube', 'instagram', 'tiktok')
+_VALID_FILTERS = frozenset(_FILTER_NAMES)
+_VALID_PLATFORMS = frozenset(_PLATFORM_NAMES)
+
+# Separador de listas separadas por comas (absorbe espacios alrededor)
+_SEP = re.compile(r'\s*,\s*')
+
 def print_banner():
     """Muestra el banner de bienvenida"""
     banner = """============================================================
@@ -59,21 +69,20 @@ def validate_duration_range(duration_str: str) -> tuple:
 
 def validate_filters(filters_str: str) -> dict:
     """Valida y parsea los filtros"""
-    if not filters_str or filters_str.lower() == 'none':
+    filters_str = (filters_str or '').strip().lower()
+    if not filters_str or filters_str == 'none':
         return {'vertical': False, 'faces': False, 'text': False}
     
-    if filters_str.lower() == 'todos':
+    if filters_str == 'todos':
         return {'vertical': True, 'faces': True, 'text': True}
     
     filters = {}
-    filter_options = ['vertical', 'faces', 'text']
     
-    for option in filters_str.split(','):
-        option = option.strip().lower()
-        if option in filter_options:
+    for option in _SEP.split(filters_str):
+        if option in _VALID_FILTERS:
             filters[option] = True
         else:
-            raise ValueError(f"Filtro inválido: {option}. Opciones válidas: {', '.join(filter_options)}")
+            raise ValueError(f"Filtro inválido: {option}. Opciones válidas: {', '.join(_FILTER_NAMES)}")
     
     # Validar que al menos un filtro esté activo
     if not any(filters.values()):
@@ -84,14 +93,13 @@ def validate_filters(filters_str: str) -> dict:
 def validate_platforms(platforms_str: str) -> list:
     """Valida las plataformas"""
     if not platforms_str:
-        return ['youtube', 'instagram', 'tiktok']
+        return list(_PLATFORM_NAMES)
     
-    valid_platforms = ['youtube', 'instagram', 'tiktok']
-    platforms = [p.strip().lower() for p in platforms_str.split(',')]
+    platforms = _SEP.split(platforms_str.strip().lower())
     
     for platform in platforms:
-        if platform not in valid_platforms:
-            raise ValueError(f"Plataforma inválida: {platform}. Opciones válidas: {', '.join(valid_platforms)}")
+        if platform not in _VALID_PLATFORMS:
+            raise ValueError(f"Plataforma inválida: {platform}. Opciones válidas: {', '.join(_PLATFORM_NAMES)}")
     
     return platforms
 
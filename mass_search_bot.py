@@ -15,7 +15,7 @@ from rich import print as rprint
 # Agregar el directorio actual al path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from orchestrator import run_job
+from orchestrator import run_job, partition_results
 from config import validate_config
 
 console = Console()
@@ -102,17 +102,18 @@ def main():
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeElapsedColumn(),
             console=console,
-            expand=True
+            expand=True,
+            refresh_per_second=4
         ) as progress:
             
-            # Crear tarea de progreso
-            task = progress.add_task("Buscando videos masivamente...", total=100)
+            # Crear tarea de progreso (el total se conoce tras la búsqueda)
+            task = progress.add_task("Buscando videos masivamente...", total=None)
             
-            # Ejecutar el trabajo
-            results = run_job(config)
-            
-            # Completar progreso
-            progress.update(task, completed=100)
+            # Ejecutar el trabajo con avance real por video
+            results = run_job(
+                config,
+                progress_cb=lambda done, total: progress.update(task, total=total, completed=done)
+            )
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -122,7 +123,8 @@ def main():
         console.print("[bold green]🎉 BÚSQUEDA MASIVA COMPLETADA[/bold green]")
         console.print("="*80)
         
-        accepted_count = len([r for r in results if r.get('estado') == 'aceptado'])
+        accepted, discarded, reasons = partition_results(results)
+        accepted_count = len(accepted)
         total_count = len(results)
         discarded_count = total_count - accepted_count
         
@@ -136,12 +138,6 @@ def main():
         # Razones de descarte
         if discarded_count > 0:
             console.print(f"\n[bold yellow]Razones de descarte:[/bold yellow]")
-            reasons = {}
-            for result in results:
-                if result.get('estado') == 'descartado':
-                    for reason in result.get('razones', []):
-                        reasons[reason] = reasons.get(reason, 0) + 1
-            
             for reason, count in reasons.items():
                 console.print(f"  • {reason}: {count} videos")
         
@@ -4,35 +4,94 @@ Coordina scrapers, downloader y analyzer
 """
 
 import os
+import gc
+import atexit
 import json
+import math
+import queue
+import threading
 import time
 import numpy as np
-from datetime import datetime
-from typing import Dict, List, Any
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Callable, Optional, Tuple
 from rich.console import Console
 from rich.progress import Progress, TaskID
 from rich import print as rprint
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from config import (
-    TEMP_DIR, OUTPUT_JSON, ACCEPTED_LIST, 
-    validate_config, OUTPUT_DIR
+    TEMP_DIR, OUTPUT_JSON, OUTPUT_JSONL, ACCEPTED_LIST, RAW_METADATA_JSONL, ANALYSIS_CACHE_FILE,
+    validate_config, OUTPUT_DIR, OUTPUT_CONFIG, PREFILTER_MAX_WORKERS, PROBE_CACHE_FILE,
+    PROBE_BATCH_SIZE,
+    DOWNLOAD_WORKERS, ANALYZER_WORKERS, PIPELINE_QUEUE_SIZE, ANALYZE_BATCH_SIZE
 )
 from scrapers.youtube_scraper import search_youtube
 from scrapers.instagram_scraper import search_instagram
 from scrapers.tiktok_scraper import search_tiktok
 from downloader import VideoDownloader
 from analyzer.video_analyzer import EnhancedVideoAnalyzer
-from utils.ffprobe_utils import get_video_metadata, get_basic_duration_and_resolution
+from utils.ffprobe_utils import get_video_metadata, get_metadata_batch
+from utils.analysis_cache import AnalysisCache
+from utils.stage_stats import StageStats, track, timed
 from cleaners import SimpleCleaner
 
 console = Console()
 
-def run_job(config: dict) -> List[Dict]:
+# Los objetos creados al importar (módulos, modelos, config) viven todo el
+# proceso: congelarlos evita que cada recolección del GC los vuelva a recorrer
+gc.freeze()
+
+# Repintados por segundo de las barras de progreso (el default de rich es 10)
+PROGRESS_REFRESH_PER_SECOND = 4
+
+# Componentes reutilizables entre llamadas a run_job (evita recargar modelos)
+_ANALYZER_CACHE: Dict[frozenset, EnhancedVideoAnalyzer] = {}
+_DOWNLOADER_CACHE: Dict[str, VideoDownloader] = {}
+_components_lock = threading.Lock()
+
+# Escritura concurrente de raw_metadata.jsonl (solo si include_raw_metadata)
+_raw_metadata_lock = threading.Lock()
+
+# Campos que el pre-filtro necesita de cada candidato
+_PROBE_FIELDS = ('duration', 'width', 'height')
+
+# Búfer de escritura de OUTPUT_JSONL (bytes)
+_RESULTS_STREAM_BUFFER = 1 << 20
+
+# Caché de sondas de metadatos por video, persistida en PROBE_CACHE_FILE
+_probe_cache: Dict[str, Dict] = {}
+_probe_cache_lock = threading.Lock()
+
+# Borrado de temporales fuera del camino crítico de los consumidores
+_cleanup_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cleanup")
+_pending_removals = set()
+_pending_removals_lock = threading.Lock()
+atexit.register(_cleanup_pool.shutdown, wait=True)
+
+# Función de búsqueda por plataforma
+SEARCH_FN: Dict[str, Callable[[str, int], List[Dict]]] = {
+    'youtube': search_youtube,
+    'instagram': search_instagram,
+    'tiktok': search_tiktok,
+}
+
+def run_job(config: dict, progress_cb: Callable[[int, int], None] = None,
+            stage_stats: StageStats = None) -> List[Dict]:
     """
     Orquesta todo el flujo del VideoFinder AI Bot
     
     Args:
         config: Configuración del usuario
+        progress_cb: Callback opcional progress_cb(procesados, total) invocado
+            tras cada candidato resuelto (pre-filtro o análisis)
+        stage_stats: Si se indica, acumula tiempo ocupado y concurrencia de
+            búsqueda, metadatos, descarga y análisis
         
     Returns:
         Lista de resultados finales
@@ -43,47 +102,43 @@ def run_job(config: dict) -> List[Dict]:
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     os.makedirs(TEMP_DIR, exist_ok=True)
     
-    # Inicializar componentes
-    downloader = VideoDownloader(TEMP_DIR)
-    analyzer = EnhancedVideoAnalyzer(config)
+    # Inicializar componentes (reutilizados entre ejecuciones)
+    downloader = get_downloader(TEMP_DIR)
+    analyzer = get_analyzer(config)
     cleaner = SimpleCleaner(TEMP_DIR)
+    analysis_cache = AnalysisCache(ANALYSIS_CACHE_FILE) if ANALYSIS_CACHE_FILE else None
+    
+    # Marca de tiempo única para todos los resultados de esta ejecución
+    run_ts = _run_timestamp()
+    results_stream = None
     
     try:
+        load_probe_cache()
+        
         # Paso 1: Buscar candidatos en todas las plataformas
         console.print("\n[bold yellow]Buscando videos candidatos...[/bold yellow]")
-        candidates = []
+        with track(stage_stats, 'búsqueda'):
+            candidates = search_platforms(config['platforms'], config['keyword'], config['max_results'])
         
-        for platform in config['platforms']:
-            console.print(f"  Buscando en {platform}...")
-            try:
-                if platform == 'youtube':
-                    platform_candidates = search_youtube(
-                        config['keyword'], 
-                        config['max_results']
-                    )
-                elif platform == 'instagram':
-                    platform_candidates = search_instagram(
-                        config['keyword'], 
-                        config['max_results']
-                    )
-                elif platform == 'tiktok':
-                    platform_candidates = search_tiktok(
-                        config['keyword'], 
-                        config['max_results']
-                    )
-                else:
-                    console.print(f"  [red]Plataforma no soportada: {platform}[/red]")
-                    continue
-                
-                candidates.extend(platform_candidates)
-                console.print(f"  [green]OK {platform}: {len(platform_candidates)} candidatos encontrados[/green]")
-                
-            except Exception as e:
-                console.print(f"  [red]ERROR {platform}: Error - {str(e)}[/red]")
-                continue
+        # Eliminar duplicados (mismo video encontrado más de una vez)
+        total_found = len(candidates)
+        candidates = dedupe_candidates(candidates)
+        if len(candidates) < total_found:
+            console.print(f"[yellow]Duplicados eliminados: {total_found - len(candidates)}[/yellow]")
         
         console.print(f"[green]Total candidatos encontrados: {len(candidates)}[/green]")
         
+        total_candidates = len(candidates)
+        
+        def report_progress(done: int):
+            """Notifica el avance al llamador sin afectar al trabajo"""
+            if progress_cb is None:
+                return
+            try:
+                progress_cb(done, total_candidates)
+            except Exception:
+                pass
+        
         if not candidates:
             console.print("[yellow]No se encontraron candidatos. Terminando.[/yellow]")
             return []
@@ -92,133 +147,67 @@ def run_job(config: dict) -> List[Dict]:
         console.print("\n[bold yellow]Pre-filtrando por metadatos (ultra rápido)...[/bold yellow]")
         metadata_pass = []
         results = []
+        # Conteos al vuelo para el resumen final; cada resultado va además
+        # a OUTPUT_JSONL según se resuelve (sirve aunque la ejecución se corte).
+        # Con 1 MiB de búfer las líneas se agrupan en muy pocas llamadas write
+        results_stream = open(OUTPUT_JSONL, 'wb', buffering=_RESULTS_STREAM_BUFFER)
+        tally = ResultTally(stream=results_stream)
         
-        # FILTRADO ULTRA RÁPIDO - sin barra de progreso
-        for candidate in candidates:
-            try:
-                # USAR SOLO INFORMACIÓN YA DISPONIBLE DE LOS SCRAPERS
-                # No hacer llamadas adicionales a APIs
-                
-                # Verificar orientación vertical usando información del scraper
-                if config['filters'].get('vertical', True):
-                    width = candidate.get('width', 0)
-                    height = candidate.get('height', 0)
-                    if width > 0 and height > 0:
-                        if not (height > width):  # No es vertical
-                            results.append(create_result(
-                                candidate, candidate, "descartado",
-                                ["orientacion horizontal"]
-                            ))
-                            continue
-                
-                # Verificar duración usando información del scraper
-                duration = candidate.get('duration', 0)
-                if duration > 0:
-                    if not duration_in_range(duration, config['duration_range']):
-                        results.append(create_result(
-                            candidate, candidate, "descartado",
-                            ["duracion fuera de rango"]
-                        ))
-                        continue
-                
-                # Si no tenemos información suficiente, pasar al siguiente paso
-                # (se verificará durante el análisis de video)
+        # Completar en paralelo los metadatos que los scrapers no trajeron
+        candidates = probe_candidates(
+            candidates, required_probe_fields(config['filters']), stage_stats=stage_stats
+        )
+        
+        # FILTRADO ULTRA RÁPIDO - una pasada con la configuración ya resuelta
+        reasons = classify_candidates(
+            candidates,
+            config['filters'].get('vertical', True),
+            config['duration_range']
+        )
+        for candidate, reason in zip(candidates, reasons):
+            if reason is None:
+                # Pasa (o sin información suficiente: se verificará en el análisis)
                 metadata_pass.append(candidate)
-                
-            except Exception as e:
-                console.print(f"[red]Error procesando candidato: {str(e)}[/red]")
-                results.append(create_result(
-                    candidate, candidate, "descartado",
-                    [f"error: {str(e)}"]
-                ))
+            else:
+                result = create_result(
+                    candidate, candidate, "descartado", [reason], processed_at=run_ts
+                )
+                results.append(result)
+                tally.add(result)
+        report_progress(len(results))
         
         console.print(f"[green]Candidatos que pasaron pre-filtro: {len(metadata_pass)}[/green]")
         
         if not metadata_pass:
             console.print("[yellow]Ningún candidato pasó el pre-filtro. Terminando.[/yellow]")
-            save_results(results)
+            save_results(results, tally.partition())
             return results
         
         # Paso 3: Descargar y analizar videos - PROCESAMIENTO EN PARALELO ULTRA RÁPIDO
         console.print("\n[bold yellow]Descargando y analizando videos (paralelo ultra rápido)...[/bold yellow]")
         
-        # PROCESAMIENTO EN PARALELO para velocidad máxima
-        import concurrent.futures
-        import threading
+        # Pipeline productor/consumidor: descargas (red) solapadas con análisis (GPU)
+        prefilter_done = len(results)
+        results.extend(process_videos(
+            metadata_pass, downloader, analyzer, config['filters'], processed_at=run_ts,
+            on_result=lambda done: report_progress(prefilter_done + done),
+            analysis_cache=analysis_cache,
+            max_workers=config.get('max_workers'),
+            tally=tally,
+            target_accepted=config.get('target_accepted'),
+            stage_stats=stage_stats
+        ))
         
-        def process_single_video(item):
-            """Procesa un solo video de forma optimizada"""
-            try:
-                # Descargar video temporal
-                temp_path = downloader.download_temporal(item['url'])
-                if not temp_path:
-                    return create_result(
-                        item, item, "descartado",
-                        ["error descarga"]
-                    )
-                
-                # Analizar video con filtros optimizados
-                analysis = analyzer.analyze_video_optimized(temp_path, config['filters'])
-                
-                # Limpiar archivo temporal inmediatamente
-                downloader.remove(temp_path)
-                
-                # Si el análisis retorna un resultado directo (descartado), usarlo
-                if analysis.get('estado') == 'descartado':
-                    return create_result(
-                        item, item, "descartado", 
-                        analysis.get('razones', []), analysis
-                    )
-                
-                # Video aceptado
-                return create_result(
-                    item, item, "aceptado", [], analysis
-                )
-                
-            except Exception as e:
-                return create_result(
-                    item, item, "descartado",
-                    [f"error: {str(e)}"]
-                )
-        
-        # PROCESAR EN PARALELO - máximo 8 videos simultáneos para búsqueda masiva
-        max_workers = min(8, len(metadata_pass))
-        results = []
-        
-        # LIMPIEZA DE MEMORIA antes del procesamiento paralelo
-        import gc
+        # LIMPIEZA DE MEMORIA una sola vez, con el pipeline ya drenado
         gc.collect()
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Enviar todos los trabajos
-            future_to_item = {
-                executor.submit(process_single_video, item): item 
-                for item in metadata_pass
-            }
-            
-            # Recoger resultados conforme se completan
-            with Progress() as progress:
-                task = progress.add_task("Analizando...", total=len(metadata_pass))
-                
-                for future in concurrent.futures.as_completed(future_to_item):
-                    try:
-                        result = future.result()
-                        results.append(result)
-                        progress.update(task, advance=1)
-                        
-                        # LIMPIEZA DE MEMORIA después de cada video
-                        gc.collect()
-                        
-                    except Exception as e:
-                        console.print(f"[red]Error en procesamiento paralelo: {str(e)}[/red]")
-                        progress.update(task, advance=1)
-        
-        # Paso 4: Guardar resultados
+        # Paso 4: Guardar resultados (agregados ya acumulados durante el proceso)
         console.print("\n[bold yellow]Guardando resultados...[/bold yellow]")
-        save_results(results)
+        partition = tally.partition()
+        save_results(results, partition)
         
         # Paso 5: Mostrar resumen
-        show_summary(results)
+        show_summary(results, partition)
         
         return results
         
@@ -226,9 +215,646 @@ def run_job(config: dict) -> List[Dict]:
         console.print(f"[bold red]Error en el orquestador: {str(e)}[/bold red]")
         raise
     finally:
-        # Limpiar archivos temporales
+        if results_stream is not None:
+            results_stream.close()
+        save_probe_cache()
+        if analysis_cache is not None:
+            analysis_cache.close()
+        
+        # Limpiar archivos temporales (después de los borrados en curso)
+        wait_removals()
         cleaner.cleanup()
 
+def search_platforms(platforms: List[str], keyword: str, max_results: int) -> List[Dict]:
+    """
+    Busca candidatos en todas las plataformas a la vez
+    
+    Cada búsqueda pasa casi todo su tiempo esperando a la red, así que se
+    lanzan en paralelo: la latencia total es la de la plataforma más lenta.
+    
+    Args:
+        platforms: Plataformas a consultar
+        keyword: Palabra clave de búsqueda
+        max_results: Máximo de resultados por plataforma
+        
+    Returns:
+        Candidatos de todas las plataformas, en el orden de `platforms`
+    """
+    supported = []
+    for platform in platforms:
+        if platform in SEARCH_FN:
+            supported.append(platform)
+        else:
+            console.print(f"  [red]Plataforma no soportada: {platform}[/red]")
+    
+    if not supported:
+        return []
+    
+    found: Dict[str, List[Dict]] = {}
+    with ThreadPoolExecutor(max_workers=len(supported)) as executor:
+        futures = {}
+        for platform in supported:
+            console.print(f"  Buscando en {platform}...")
+            futures[executor.submit(SEARCH_FN[platform], keyword, max_results)] = platform
+        
+        for future in as_completed(futures):
+            platform = futures[future]
+            try:
+                found[platform] = future.result() or []
+                console.print(f"  [green]OK {platform}: {len(found[platform])} candidatos encontrados[/green]")
+            except Exception as e:
+                console.print(f"  [red]ERROR {platform}: Error - {str(e)}[/red]")
+    
+    # Orden estable entre ejecuciones, independiente de qué plataforma respondió antes
+    candidates = []
+    for platform in supported:
+        candidates.extend(found.get(platform, []))
+    return candidates
+
+def get_analyzer(config: dict) -> EnhancedVideoAnalyzer:
+    """
+    Obtiene el analizador para la configuración de filtros dada
+    
+    Args:
+        config: Configuración del usuario
+        
+    Returns:
+        Analizador cacheado (se crea en la primera llamada)
+    """
+    filters = config.get('filters', {})
+    key = frozenset((name, bool(filters.get(name, True))) for name in ('faces', 'text'))
+    with _components_lock:
+        analyzer = _ANALYZER_CACHE.get(key)
+        if analyzer is None:
+            analyzer = _ANALYZER_CACHE[key] = EnhancedVideoAnalyzer(config)
+    return analyzer
+
+def get_downloader(temp_dir: str = TEMP_DIR) -> VideoDownloader:
+    """
+    Obtiene el descargador asociado a un directorio temporal
+    
+    Args:
+        temp_dir: Directorio temporal
+        
+    Returns:
+        Descargador cacheado (se crea en la primera llamada)
+    """
+    with _components_lock:
+        downloader = _DOWNLOADER_CACHE.get(temp_dir)
+        if downloader is None:
+            downloader = _DOWNLOADER_CACHE[temp_dir] = VideoDownloader(temp_dir)
+    return downloader
+
+def required_probe_fields(filters: dict) -> tuple:
+    """
+    Campos de metadatos que el pre-filtro necesita según los filtros activos
+    
+    Args:
+        filters: Filtros activos
+        
+    Returns:
+        Tupla de campos (la duración siempre; dimensiones solo si se filtra vertical)
+    """
+    if filters.get('vertical', True):
+        return _PROBE_FIELDS
+    return ('duration',)
+
+def _needs_probe(candidate: dict, fields: tuple = _PROBE_FIELDS) -> bool:
+    """Verifica si al candidato le falta alguno de los campos requeridos (o no es numérico)"""
+    return not all(_to_number(candidate.get(field)) > 0 for field in fields)
+
+def _candidate_key(candidate: dict) -> str:
+    """Clave canónica de un candidato: plataforma + ID, o la URL normalizada si no hay ID"""
+    video_id = candidate.get('id')
+    if video_id:
+        return f"{candidate.get('platform', 'unknown')}:{video_id}"
+    # Misma URL con fragmento o barra final distintos => mismo video
+    return (candidate.get('url') or '').strip().split('#', 1)[0].rstrip('/')
+
+def dedupe_candidates(candidates: List[Dict]) -> List[Dict]:
+    """
+    Elimina candidatos duplicados conservando la primera aparición
+    
+    Args:
+        candidates: Candidatos de todas las plataformas
+        
+    Returns:
+        Candidatos únicos por (plataforma, ID) o URL, en el orden original
+    """
+    unique = {}
+    for candidate in candidates:
+        # Sin ID ni URL no hay forma de identificarlo: se conserva tal cual
+        unique.setdefault(_candidate_key(candidate) or id(candidate), candidate)
+    return list(unique.values())
+
+def load_probe_cache():
+    """Carga la caché de metadatos persistida en disco"""
+    try:
+        if os.path.exists(PROBE_CACHE_FILE):
+            with open(PROBE_CACHE_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                with _probe_cache_lock:
+                    _probe_cache.update(data)
+    except Exception as e:
+        console.print(f"[yellow]No se pudo cargar la caché de metadatos: {str(e)}[/yellow]")
+
+def save_probe_cache():
+    """Persiste la caché de metadatos (escritura atómica)"""
+    try:
+        with _probe_cache_lock:
+            snapshot = dict(_probe_cache)
+        if not snapshot:
+            return
+        tmp_path = PROBE_CACHE_FILE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, PROBE_CACHE_FILE)
+    except Exception as e:
+        console.print(f"[yellow]No se pudo guardar la caché de metadatos: {str(e)}[/yellow]")
+
+def _cached_probe(candidate: dict) -> Optional[Dict]:
+    """Devuelve los metadatos cacheados de un candidato, si existen"""
+    key = _candidate_key(candidate)
+    if not key:
+        return None
+    with _probe_cache_lock:
+        return _probe_cache.get(key)
+
+def _store_probe(candidate: dict, basic: dict) -> Dict:
+    """Guarda en caché solo los campos necesarios para el pre-filtro"""
+    basic = {k: basic[k] for k in _PROBE_FIELDS if basic.get(k)}
+    key = _candidate_key(candidate)
+    if key and basic:
+        with _probe_cache_lock:
+            _probe_cache[key] = basic
+    return basic
+
+def _probe(candidate: dict) -> tuple:
+    """Obtiene duración y resolución de un candidato (caché o llamada de red)"""
+    cached = _cached_probe(candidate)
+    if cached is not None:
+        return candidate, cached
+    
+    url = candidate.get('url', '')
+    basic = get_video_metadata(url, fields=_PROBE_FIELDS) or {}
+    return candidate, _store_probe(candidate, basic)
+
+def probe_candidates(candidates: List[Dict], fields: tuple = _PROBE_FIELDS,
+                     stage_stats: StageStats = None) -> List[Dict]:
+    """
+    Completa en paralelo los metadatos faltantes de los candidatos
+    
+    Orden de resolución: caché, lotes de yt-dlp (PROBE_BATCH_SIZE URLs por
+    proceso) y, para lo que el lote no resolvió, sonda individual.
+    
+    Args:
+        candidates: Candidatos devueltos por los scrapers
+        fields: Campos requeridos; los candidatos que ya los traen no se sondean
+        stage_stats: Acumulador opcional de tiempos (etapa 'metadatos')
+        
+    Returns:
+        Candidatos en el mismo orden, con duración/resolución completadas
+    """
+    to_probe = [i for i, candidate in enumerate(candidates) if _needs_probe(candidate, fields)]
+    if not to_probe:
+        return candidates
+    
+    probed = list(candidates)
+    
+    def apply(index, basic):
+        # Solo sobrescribir con valores útiles
+        updates = {key: basic[key] for key in _PROBE_FIELDS if basic.get(key)}
+        if updates:
+            probed[index] = {**candidates[index], **updates}
+    
+    # 1) Caché
+    pending = []
+    for index in to_probe:
+        cached = _cached_probe(candidates[index])
+        if cached:
+            apply(index, cached)
+        else:
+            pending.append(index)
+    
+    if not pending:
+        return probed
+    
+    batch_size = max(1, PROBE_BATCH_SIZE)
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    max_workers = max(1, min(PREFILTER_MAX_WORKERS, len(pending)))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+            Progress(refresh_per_second=PROGRESS_REFRESH_PER_SECOND) as progress:
+        task = progress.add_task("Obteniendo metadatos...", total=len(pending))
+        
+        # 2) Lotes: un proceso yt-dlp por cada PROBE_BATCH_SIZE URLs
+        missing = []
+        future_to_batch = {
+            executor.submit(
+                timed(stage_stats, 'metadatos', get_metadata_batch),
+                [candidates[i].get('url', '') for i in batch]
+            ): batch
+            for batch in batches
+        }
+        for future in as_completed(future_to_batch):
+            batch = future_to_batch[future]
+            try:
+                found = future.result()
+            except Exception as e:
+                console.print(f"[red]Error obteniendo metadatos en lote: {str(e)}[/red]")
+                found = {}
+            
+            for index in batch:
+                basic = found.get(candidates[index].get('url', ''))
+                if basic:
+                    apply(index, _store_probe(candidates[index], basic))
+                    progress.update(task, advance=1)
+                else:
+                    missing.append(index)
+        
+        # 3) Sonda individual para lo que el lote no resolvió
+        probe = timed(stage_stats, 'metadatos', _probe)
+        future_to_index = {executor.submit(probe, candidates[i]): i for i in missing}
+        for future in as_completed(future_to_index):
+            index = future_to_index[future]
+            try:
+                _, basic = future.result()
+                apply(index, basic)
+            except Exception as e:
+                console.print(f"[red]Error obteniendo metadatos: {str(e)}[/red]")
+            finally:
+                progress.update(task, advance=1)
+    
+    return probed
+
+def analyze_downloaded(item: dict, temp_path: str, downloader: VideoDownloader,
+                       analyzer: EnhancedVideoAnalyzer, filters: dict,
+                       enabled_checks: frozenset = None, processed_at: str = None) -> dict:
+    """
+    Analiza un video ya descargado y elimina el archivo temporal
+    
+    Args:
+        item: Candidato asociado al video
+        temp_path: Ruta del video descargado (None si la descarga falló)
+        downloader: Descargador (para limpiar el temporal)
+        analyzer: Analizador de video
+        filters: Filtros activos
+        enabled_checks: Detectores activos precalculados
+        processed_at: Marca de tiempo de la ejecución
+        
+    Returns:
+        Resultado estructurado del candidato
+    """
+    if not temp_path:
+        return create_result(item, item, "descartado", ["error descarga"], processed_at=processed_at)
+    
+    try:
+        # Analizar video con filtros optimizados
+        analysis = analyzer.analyze_video_optimized(temp_path, filters, enabled_checks)
+        return _result_from_analysis(item, analysis, processed_at)
+        
+    except Exception as e:
+        return create_result(
+            item, item, "descartado", [f"error: {str(e)}"], processed_at=processed_at
+        )
+    finally:
+        # Limpiar archivo temporal sin bloquear al consumidor
+        remove_async(downloader, temp_path)
+
+def analyze_downloaded_batch(entries: List[tuple], downloader: VideoDownloader,
+                             analyzer: EnhancedVideoAnalyzer, filters: dict,
+                             enabled_checks: frozenset = None, processed_at: str = None) -> List[Dict]:
+    """
+    Analiza un lote de videos descargados con una sola pasada de GPU por detector
+    
+    Args:
+        entries: Lista de tuplas (candidato, ruta descargada o None)
+        downloader: Descargador (para limpiar los temporales)
+        analyzer: Analizador de video
+        filters: Filtros activos
+        enabled_checks: Detectores activos precalculados
+        processed_at: Marca de tiempo de la ejecución
+        
+    Returns:
+        Resultados estructurados (uno por entrada)
+    """
+    downloaded = [(item, path) for item, path in entries if path]
+    results = [
+        create_result(item, item, "descartado", ["error descarga"], processed_at=processed_at)
+        for item, path in entries if not path
+    ]
+    if not downloaded:
+        return results
+    
+    try:
+        analyses = analyzer.analyze_batch([path for _, path in downloaded], filters, enabled_checks)
+        results.extend(
+            _result_from_analysis(item, analysis, processed_at)
+            for (item, _), analysis in zip(downloaded, analyses)
+        )
+    except Exception as e:
+        results.extend(
+            create_result(item, item, "descartado", [f"error: {str(e)}"], processed_at=processed_at)
+            for item, _ in downloaded
+        )
+    finally:
+        for _, path in downloaded:
+            remove_async(downloader, path)
+    
+    return results
+
+def remove_async(downloader: VideoDownloader, path: str):
+    """Encola el borrado de un temporal en el pool de limpieza"""
+    future = _cleanup_pool.submit(downloader.remove, path)
+    with _pending_removals_lock:
+        _pending_removals.add(future)
+    future.add_done_callback(_forget_removal)
+
+def _forget_removal(future):
+    with _pending_removals_lock:
+        _pending_removals.discard(future)
+
+def wait_removals():
+    """Espera a que terminen los borrados de temporales encolados"""
+    with _pending_removals_lock:
+        pending = list(_pending_removals)
+    if pending:
+        wait(pending)
+
+def _analysis_cache_key(signature: str, record: dict) -> Optional[str]:
+    """Clave de caché de análisis: firma del analizador + plataforma + ID"""
+    video_id = record.get('id')
+    if not signature or not video_id:
+        return None
+    return f"{signature}:{record.get('platform', 'unknown')}:{video_id}"
+
+def _get_cached_analysis(cache: AnalysisCache, signature: str, item: dict) -> Optional[Dict]:
+    """Busca el análisis de un candidato en la caché"""
+    if cache is None:
+        return None
+    key = _analysis_cache_key(signature, item)
+    return cache.get(key) if key else None
+
+def _store_cached_analysis(cache: AnalysisCache, signature: str, result: dict):
+    """Guarda el análisis de un resultado si es determinista (no un error)"""
+    if cache is None:
+        return
+    analysis = result.get('analysis') or {}
+    deterministic = (
+        analysis.get('estado') == 'aceptado'
+        or analysis.get('has_face')
+        or analysis.get('has_text')
+    )
+    key = _analysis_cache_key(signature, result)
+    if key and deterministic:
+        cache.put(key, analysis)
+
+def _result_from_analysis(item: dict, analysis: dict, processed_at: str = None) -> dict:
+    """Convierte el análisis de un video en su resultado estructurado"""
+    # Si el análisis retorna un resultado directo (descartado), usarlo
+    if analysis.get('estado') == 'descartado':
+        return create_result(
+            item, item, "descartado",
+            analysis.get('razones', []), analysis, processed_at=processed_at
+        )
+    
+    # Video aceptado
+    return create_result(item, item, "aceptado", [], analysis, processed_at=processed_at)
+
+def process_videos(items: List[Dict], downloader: VideoDownloader,
+                   analyzer: EnhancedVideoAnalyzer, filters: dict,
+                   processed_at: str = None,
+                   on_result: Callable[[int], None] = None,
+                   analysis_cache: AnalysisCache = None,
+                   max_workers: int = None,
+                   tally: 'ResultTally' = None,
+                   target_accepted: int = None,
+                   stage_stats: StageStats = None) -> List[Dict]:
+    """
+    Descarga y analiza videos en un pipeline productor/consumidor
+    
+    Un pool de descargas (I/O) alimenta una cola acotada que consumen los
+    hilos de análisis (GPU) en lotes de hasta ANALYZE_BATCH_SIZE videos;
+    la cola limita los temporales en disco.
+    
+    Args:
+        items: Candidatos que pasaron el pre-filtro
+        downloader: Descargador de videos
+        analyzer: Analizador de video
+        filters: Filtros activos
+        processed_at: Marca de tiempo de la ejecución
+        on_result: Callback opcional con el número de videos ya procesados
+        analysis_cache: Caché persistente de análisis (los aciertos no se descargan)
+        max_workers: Descargas simultáneas (por defecto DOWNLOAD_WORKERS)
+        tally: Acumulador opcional que se actualiza con cada resultado
+        target_accepted: Si se indica, se deja de descargar y analizar en
+            cuanto haya ese número de videos aceptados
+        stage_stats: Acumulador opcional de tiempos (etapas 'descarga' y 'análisis')
+        
+    Returns:
+        Lista de resultados (en orden de finalización; sin los videos omitidos
+        tras alcanzar target_accepted)
+    """
+    if not items:
+        return []
+    
+    processed_at = processed_at or _run_timestamp()
+    
+    results = []
+    results_lock = threading.Lock()
+    enabled_checks = analyzer.enabled_checks(filters)
+    signature = analyzer.cache_signature(enabled_checks) if analysis_cache else None
+    
+    # Corte anticipado al alcanzar el objetivo de aceptados
+    accepted_count = 0
+    target_reached = threading.Event()
+    
+    def count_accepted(batch_results: List[Dict]):
+        nonlocal accepted_count
+        accepted_count += sum(1 for result in batch_results if result.get('estado') == 'aceptado')
+        if target_accepted and accepted_count >= target_accepted and not target_reached.is_set():
+            target_reached.set()
+            console.print(f"[green]Objetivo de {target_accepted} videos aceptados alcanzado[/green]")
+    
+    # Aciertos de caché: se resuelven sin descargar ni analizar
+    pending = []
+    for item in items:
+        cached = _get_cached_analysis(analysis_cache, signature, item)
+        if cached is not None:
+            result = _result_from_analysis(item, cached, processed_at)
+            results.append(result)
+            if tally is not None:
+                tally.add(result)
+        else:
+            pending.append(item)
+    
+    if results:
+        console.print(f"[green]Análisis reutilizados de la caché: {len(results)}[/green]")
+        count_accepted(results)
+        if on_result is not None:
+            on_result(len(results))
+    if not pending or target_reached.is_set():
+        return results
+    
+    # Cola acotada descargas -> análisis. Cada elemento es un video completo
+    # (segundos de red y de GPU), así que el lock de queue.Queue no llega a
+    # disputarse: el límite de temporales en disco es lo que importa aquí
+    ready = queue.Queue(maxsize=max(1, PIPELINE_QUEUE_SIZE))
+    download_workers = max(1, min(max_workers or DOWNLOAD_WORKERS, len(pending)))
+    analyzer_workers = max(1, ANALYZER_WORKERS)
+    batch_size = max(1, ANALYZE_BATCH_SIZE)
+    
+    with Progress(refresh_per_second=PROGRESS_REFRESH_PER_SECOND) as progress:
+        task = progress.add_task("Analizando...", total=len(items), completed=len(results))
+        
+        def download_worker(item):
+            """Productor: descarga y encola (bloquea si la cola está llena)"""
+            if target_reached.is_set():
+                return
+            try:
+                with track(stage_stats, 'descarga'):
+                    temp_path = downloader.download_temporal(item['url'])
+            except Exception as e:
+                console.print(f"[red]Error en descarga: {str(e)}[/red]")
+                temp_path = None
+            ready.put((item, temp_path))
+        
+        def analyze_worker():
+            """Consumidor: analiza en lotes hasta recibir el centinela None"""
+            finished = False
+            while not finished:
+                batch = [ready.get()]
+                # Completar el lote con lo ya descargado, sin esperar
+                while len(batch) < batch_size:
+                    try:
+                        batch.append(ready.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                sentinels = sum(1 for entry in batch if entry is None)
+                if sentinels:
+                    finished = True
+                    # Devolver los centinelas sobrantes a los demás consumidores
+                    for _ in range(sentinels - 1):
+                        ready.put(None)
+                    batch = [entry for entry in batch if entry is not None]
+                if not batch:
+                    continue
+                
+                if target_reached.is_set():
+                    # Ya descargados pero innecesarios: solo se borran
+                    for _, path in batch:
+                        if path:
+                            remove_async(downloader, path)
+                    continue
+                
+                try:
+                    with track(stage_stats, 'análisis'):
+                        batch_results = analyze_downloaded_batch(
+                            batch, downloader, analyzer, filters, enabled_checks, processed_at
+                        )
+                except Exception as e:
+                    # El consumidor nunca debe morir: con la cola llena dejaría
+                    # bloqueados a los productores (y al envío de centinelas)
+                    console.print(f"[red]Error en análisis por lotes: {str(e)}[/red]")
+                    batch_results = [
+                        create_result(item, item, "descartado", [f"error: {str(e)}"], processed_at=processed_at)
+                        for item, _ in batch
+                    ]
+                for result in batch_results:
+                    _store_cached_analysis(analysis_cache, signature, result)
+                with results_lock:
+                    results.extend(batch_results)
+                    done = len(results)
+                    if tally is not None:
+                        for result in batch_results:
+                            tally.add(result)
+                    count_accepted(batch_results)
+                progress.update(task, advance=len(batch_results))
+                if on_result is not None:
+                    on_result(done)
+        
+        with ThreadPoolExecutor(max_workers=analyzer_workers) as consumers:
+            for _ in range(analyzer_workers):
+                consumers.submit(analyze_worker)
+            
+            try:
+                with ThreadPoolExecutor(max_workers=download_workers) as producers:
+                    for item in pending:
+                        producers.submit(download_worker, item)
+            finally:
+                # Un centinela por consumidor para terminar el pipeline
+                for _ in range(analyzer_workers):
+                    ready.put(None)
+    
+    return results
+
+def classify_candidates(candidates: List[Dict], check_vertical: bool,
+                        duration_range: tuple) -> List[Optional[str]]:
+    """
+    Clasifica candidatos por metadatos en una sola pasada
+    
+    Los metadatos se pasan a arreglos de NumPy (uno por campo) y las
+    condiciones se evalúan como máscaras vectoriales en lugar de por candidato.
+    Un candidato con algún valor no numérico (p. ej. 'NA' o 'PT15S') se
+    descarta con una razón de error sin afectar a los demás.
+    
+    Args:
+        candidates: Candidatos con duración/resolución (0 = desconocido)
+        check_vertical: Si se exige orientación vertical
+        duration_range: Tupla (mínimo, máximo) en segundos
+        
+    Returns:
+        Razón de descarte por candidato, o None si pasa el pre-filtro
+    """
+    count = len(candidates)
+    if not count:
+        return []
+    
+    min_dur, max_dur = duration_range
+    # NaN marca los valores que no son números; las comparaciones con NaN
+    # son falsas, así que esas filas no entran en las máscaras de abajo
+    values = {
+        field: np.fromiter((_to_number(c.get(field)) for c in candidates), dtype=np.float64, count=count)
+        for field in _PROBE_FIELDS
+    }
+    width, height, duration = values['width'], values['height'], values['duration']
+    invalid = np.isnan(width) | np.isnan(height) | np.isnan(duration)
+    
+    # Sin dimensiones o duración conocidas el candidato pasa (se verifica al analizar)
+    if check_vertical:
+        horizontal = (width > 0) & (height > 0) & (height <= width)
+    else:
+        horizontal = np.zeros(count, dtype=bool)
+    out_of_range = (duration > 0) & ((duration < min_dur) | (duration > max_dur)) & ~horizontal
+    
+    reasons: List[Optional[str]] = [None] * count
+    for i in np.flatnonzero(horizontal):
+        reasons[i] = "orientacion horizontal"
+    for i in np.flatnonzero(out_of_range):
+        reasons[i] = "duracion fuera de rango"
+    for i in np.flatnonzero(invalid):
+        bad = ", ".join(
+            f"{field}={candidates[i].get(field)!r}" for field in _PROBE_FIELDS if np.isnan(values[field][i])
+        )
+        reasons[i] = f"error: metadatos no numéricos ({bad})"
+    return reasons
+
+def _to_number(value) -> float:
+    """Valor numérico de un metadato: 0 si falta, NaN si no es un número"""
+    if value is None or value == '':
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+def _to_int(value) -> int:
+    """Entero de un metadato; 0 si falta o no es un número"""
+    number = _to_number(value)
+    return int(number) if math.isfinite(number) else 0
+
 def is_vertical(metadata: dict) -> bool:
     """Verifica si el video es vertical"""
     width = metadata.get('width', 0)
@@ -240,75 +866,169 @@ def duration_in_range(duration: float, duration_range: tuple) -> bool:
     min_dur, max_dur = duration_range
     return min_dur <= duration <= max_dur
 
-def create_result(candidate: dict, metadata: dict, estado: str, razones: list, analysis: dict = None) -> dict:
+def _run_timestamp() -> str:
+    """Marca de tiempo UTC (ISO 8601, segundos) para los resultados"""
+    return datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec='seconds') + 'Z'
+
+def _write_raw_metadata(candidate: dict, metadata: dict):
+    """Agrega los metadatos crudos de un candidato a RAW_METADATA_JSONL"""
+    try:
+        record = {'id': candidate.get('id', ''), 'meta': metadata}
+        if orjson is not None:
+            line = orjson.dumps(record, default=str) + b'\n'
+        else:
+            line = (json.dumps(record, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+        with _raw_metadata_lock:
+            with open(RAW_METADATA_JSONL, 'ab') as f:
+                f.write(line)
+    except Exception as e:
+        console.print(f"[yellow]No se pudieron guardar metadatos crudos: {str(e)}[/yellow]")
+
+def create_result(candidate: dict, metadata: dict, estado: str, razones: list,
+                  analysis: dict = None, processed_at: str = None) -> dict:
     """Crea un resultado estructurado"""
+    # Los metadatos crudos no se duplican en el resultado: van a un archivo aparte
+    if OUTPUT_CONFIG.get('include_raw_metadata', False):
+        _write_raw_metadata(candidate, metadata)
+    
+    # Tipos nativos desde el origen: el volcado JSON no necesita convertir nada
+    width = _to_int(metadata.get('width'))
+    height = _to_int(metadata.get('height'))
+    
     return {
         'titulo': candidate.get('title', 'Sin título'),
         'enlace': candidate.get('url', ''),
         'id': candidate.get('id', ''),
         'platform': candidate.get('platform', 'unknown'),
-        'duracion_sec': int(metadata.get('duration', 0)),
-        'width': metadata.get('width', 0),
-        'height': metadata.get('height', 0),
-        'resolution': f"{metadata.get('width', 0)}x{metadata.get('height', 0)}",
-        'processed_at': datetime.now().isoformat() + 'Z',
+        'duracion_sec': _to_int(metadata.get('duration')),
+        'width': width,
+        'height': height,
+        'resolution': f"{width}x{height}",
+        'processed_at': processed_at or _run_timestamp(),
         'estado': estado,
         'razones': razones,
-        'raw_metadata': metadata,
         'analysis': analysis or {}
     }
 
-def save_results(results: List[Dict]):
-    """Guarda los resultados en JSON y genera lista aceptada"""
-    # Convertir todos los valores float32 a float para evitar errores de serialización
-    def convert_float32(obj):
-        if isinstance(obj, dict):
-            return {k: convert_float32(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_float32(item) for item in obj]
-        elif hasattr(obj, 'item'):  # numpy/torch tensors
-            return float(obj.item())
-        elif isinstance(obj, (np.float32, np.float64)):
-            return float(obj)
-        else:
-            return obj
+class ResultTally:
+    """
+    Aceptados, descartados y razones de descarte, acumulados al vuelo
     
-    # Aplicar conversión a todos los resultados
-    results_clean = convert_float32(results)
+    Con `stream` (archivo binario abierto), cada resultado registrado se
+    agrega también como una línea JSON (NDJSON). Los llamadores ya
+    serializan las llamadas a add, así que no hace falta otro lock.
+    """
+    
+    def __init__(self, stream=None):
+        self.accepted: List[Dict] = []
+        self.discarded: List[Dict] = []
+        self.reasons: Counter = Counter()
+        self.stream = stream
+    
+    def add(self, result: Dict):
+        """Registra un resultado"""
+        estado = result.get('estado')
+        if estado == 'aceptado':
+            self.accepted.append(result)
+        elif estado == 'descartado':
+            self.discarded.append(result)
+            self.reasons.update(result.get('razones', ()))
+        if self.stream is not None:
+            try:
+                self.stream.write(_json_line(result))
+            except Exception as e:
+                console.print(f"[yellow]No se pudo escribir el resultado en {OUTPUT_JSONL}: {str(e)}[/yellow]")
     
-    # Guardar JSON completo
-    with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
-        json.dump(results_clean, f, indent=2, ensure_ascii=False)
+    def partition(self) -> Tuple[List[Dict], List[Dict], Counter]:
+        """Tupla (aceptados, descartados, contador de razones)"""
+        return self.accepted, self.discarded, self.reasons
+
+def partition_results(results: List[Dict]) -> Tuple[List[Dict], List[Dict], Counter]:
+    """
+    Separa aceptados/descartados y cuenta razones de descarte en una pasada
+    
+    Args:
+        results: Lista de resultados
+        
+    Returns:
+        Tupla (aceptados, descartados, contador de razones)
+    """
+    tally = ResultTally()
+    for result in results:
+        tally.add(result)
+    return tally.partition()
+
+def _json_default(obj):
+    """Convierte arrays y escalares numpy/torch a tipos nativos de JSON"""
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, 'item'):  # numpy/torch escalares
+        return obj.item()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+class NpEncoder(json.JSONEncoder):
+    """Encoder JSON que acepta valores numpy/torch sin copiar los resultados"""
+    
+    def default(self, o):
+        try:
+            return _json_default(o)
+        except TypeError:
+            return super().default(o)
+
+def _json_line(record: Dict) -> bytes:
+    """Serializa un resultado como una línea NDJSON"""
+    if orjson is not None:
+        return orjson.dumps(
+            record, default=_json_default,
+            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return (json.dumps(record, cls=NpEncoder, ensure_ascii=False) + '\n').encode('utf-8')
+
+def save_results(results: List[Dict], partition: tuple = None):
+    """Guarda los resultados en JSON y genera lista aceptada"""
+    # Los analizadores ya devuelven tipos nativos; el default solo cubre algún
+    # valor numpy/torch residual, sin recorrer ni copiar los resultados
+    if orjson is not None:
+        with open(OUTPUT_JSON, 'wb') as f:
+            f.write(orjson.dumps(
+                results, default=_json_default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            ))
+    else:
+        with open(OUTPUT_JSON, 'w', encoding='utf-8') as f:
+            json.dump(results, f, cls=NpEncoder, indent=2, ensure_ascii=False)
     
     # Generar lista aceptada
-    accepted = [r for r in results_clean if r.get('estado') == 'aceptado']
+    accepted = (partition or partition_results(results))[0]
+    
+    # Construir el texto completo y escribirlo de una sola vez
+    separator = "=" * 60 + "\n"
+    chunks = [separator, "✅ VIDEOS ACEPTADOS - LISTA COMPLETA\n", separator, "\n"]
+    
+    if not accepted:
+        chunks.append("❌ No se encontraron videos que cumplan los criterios.\n")
+    else:
+        chunks.append(f"📊 Total de videos aceptados: {len(accepted)}\n\n")
+        chunks.extend(
+            f"{i:2d}) 📹 \"{video['titulo']}\"\n"
+            f"     🔗 Enlace: {video['enlace']}\n"
+            f"     ⏱️  Duración: {video['duracion_sec']} segundos\n"
+            f"     📐 Resolución: {video['resolution']}\n"
+            f"     🌐 Plataforma: {video['platform'].title()}\n"
+            f"     📅 Procesado: {video['processed_at']}\n\n"
+            for i, video in enumerate(accepted, 1)
+        )
     
     with open(ACCEPTED_LIST, 'w', encoding='utf-8') as f:
-        f.write("=" * 60 + "\n")
-        f.write("✅ VIDEOS ACEPTADOS - LISTA COMPLETA\n")
-        f.write("=" * 60 + "\n\n")
-        
-        if not accepted:
-            f.write("❌ No se encontraron videos que cumplan los criterios.\n")
-        else:
-            f.write(f"📊 Total de videos aceptados: {len(accepted)}\n\n")
-            
-            for i, video in enumerate(accepted, 1):
-                f.write(f"{i:2d}) 📹 \"{video['titulo']}\"\n")
-                f.write(f"     🔗 Enlace: {video['enlace']}\n")
-                f.write(f"     ⏱️  Duración: {video['duracion_sec']} segundos\n")
-                f.write(f"     📐 Resolución: {video['resolution']}\n")
-                f.write(f"     🌐 Plataforma: {video['platform'].title()}\n")
-                f.write(f"     📅 Procesado: {video['processed_at']}\n\n")
+        f.write("".join(chunks))
     
     console.print(f"[green]Resultados guardados en: {OUTPUT_JSON}")
     console.print(f"[green]Lista aceptada guardada en: {ACCEPTED_LIST}")
     console.print(f"[green]Total videos aceptados: {len(accepted)}")
 
-def show_summary(results: List[Dict]):
+def show_summary(results: List[Dict], partition: tuple = None):
     """Muestra resumen de resultados en consola"""
-    accepted = [r for r in results if r.get('estado') == 'aceptado']
-    discarded = [r for r in results if r.get('estado') == 'descartado']
+    accepted, discarded, razones_count = partition or partition_results(results)
     
     console.print("\n[bold green]==============================")
     console.print("[bold green]VIDEOS QUE PASARON LOS FILTROS[/bold green]")
@@ -332,11 +1052,6 @@ def show_summary(results: List[Dict]):
     
     # Mostrar razones de descarte
     if discarded:
-        razones_count = {}
-        for result in discarded:
-            for razon in result.get('razones', []):
-                razones_count[razon] = razones_count.get(razon, 0) + 1
-        
         console.print("\n[bold yellow]Razones de descarte:[/bold yellow]")
         for razon, count in razones_count.items():
             console.print(f"  • {razon}: {count} videos")
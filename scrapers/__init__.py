@@ -2,8 +2,37 @@
 Scrapers para diferentes plataformas de video
 """
 
-from .youtube_scraper import search_youtube
+import asyncio
+from typing import Dict, List
+
+from .youtube_scraper import search_youtube, search_youtube_async, iter_youtube
 from .instagram_scraper import search_instagram
-from .tiktok_scraper import search_tiktok
+from .tiktok_scraper import search_tiktok, search_tiktok_async
+from .record import VideoRecord
+
+async def search_all_async(keyword: str, max_results: int = 50) -> List[Dict]:
+    """
+    Busca en YouTube y TikTok a la vez (latencia de la más lenta, no la suma)
+    
+    Args:
+        keyword: Palabra clave de búsqueda
+        max_results: Máximo número de resultados por plataforma
+        
+    Returns:
+        Videos de YouTube seguidos de los de TikTok
+    """
+    youtube, tiktok = await asyncio.gather(
+        search_youtube_async(keyword, max_results),
+        search_tiktok_async(keyword, max_results)
+    )
+    return youtube + tiktok
+
+def search_all(keyword: str, max_results: int = 50) -> List[Dict]:
+    """Envoltorio síncrono de search_all_async"""
+    return asyncio.run(search_all_async(keyword, max_results))
 
-__all__ = ['search_youtube', 'search_instagram', 'search_tiktok']
+__all__ = [
+    'search_youtube', 'search_instagram', 'search_tiktok',
+    'search_youtube_async', 'search_tiktok_async', 'search_all_async', 'search_all',
+    'iter_youtube', 'VideoRecord'
+]
@@ -0,0 +1,196 @@
+"""
+Pool de navegadores de playwright reutilizables entre búsquedas
+"""
+
+import asyncio
+import atexit
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from config import BROWSER_POOL_SIZE, BROWSER_MAX_PAGES, BROWSER_MAX_AGE
+
+# Flags de Chromium para scraping headless con poca memoria
+# (--max-old-space-size es de V8: se pasa a través de --js-flags; las imágenes
+# no se cargan porque el scraping solo lee atributos del DOM)
+LAUNCH_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--no-sandbox",
+    "--js-flags=--max-old-space-size=256",
+    "--blink-settings=imagesEnabled=false",
+]
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Opciones del contexto de cada navegador: se crea una vez al lanzarlo y las
+# búsquedas solo abren páginas en él (new_page es mucho más barato que new_context)
+CONTEXT_OPTIONS = {
+    "user_agent": USER_AGENT,
+    "viewport": {"width": 1280, "height": 800},
+    "java_script_enabled": True,
+}
+
+class BrowserInstance:
+    """Navegador con su contexto y contadores de uso"""
+    
+    def __init__(self, browser, context):
+        self.browser = browser
+        self.context = context
+        self.created_at = time.monotonic()
+        self.pages_processed = 0
+    
+    def expired(self, max_pages: int, max_age: float) -> bool:
+        """Indica si el navegador debe reemplazarse (uso, antigüedad o desconexión)"""
+        return (
+            self.pages_processed >= max_pages
+            or time.monotonic() - self.created_at >= max_age
+            or not self.browser.is_connected()
+        )
+    
+    async def close(self):
+        """Cierra el contexto y el navegador"""
+        try:
+            await self.context.close()
+            await self.browser.close()
+        except Exception:
+            pass
+
+class BrowserPool:
+    """
+    Pool acotado de navegadores Chromium (API asíncrona de playwright)
+    
+    Los navegadores se lanzan bajo demanda y se reutilizan; tras
+    max_pages_per_browser usos o max_age_seconds de vida se cierran y el
+    siguiente acquire lanza uno nuevo, lo que evita el crecimiento de memoria
+    en ejecuciones largas. Todos los objetos viven en el bucle de eventos de
+    run_sync: no se deben usar desde otro bucle.
+    """
+    
+    def __init__(self, size: int = BROWSER_POOL_SIZE,
+                 max_pages_per_browser: int = BROWSER_MAX_PAGES,
+                 max_age_seconds: float = BROWSER_MAX_AGE,
+                 launch_args: Optional[List[str]] = None,
+                 context_options: Optional[Dict[str, Any]] = None):
+        """
+        Inicializa el pool
+        
+        Args:
+            size: Máximo de navegadores en uso simultáneo
+            max_pages_per_browser: Usos antes de reemplazar un navegador
+            max_age_seconds: Vida máxima de un navegador
+            launch_args: Flags de Chromium (por defecto LAUNCH_ARGS)
+            context_options: Opciones de new_context (por defecto CONTEXT_OPTIONS)
+        """
+        self.size = max(1, size)
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_age_seconds = max_age_seconds
+        self.launch_args = launch_args if launch_args is not None else LAUNCH_ARGS
+        self.context_options = context_options if context_options is not None else CONTEXT_OPTIONS
+        
+        self._idle: List[BrowserInstance] = []
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._playwright = None
+    
+    async def _launch(self) -> BrowserInstance:
+        """Lanza un navegador nuevo con su contexto"""
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=True, args=self.launch_args)
+        context = await browser.new_context(**self.context_options)
+        return BrowserInstance(browser, context)
+    
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Presta un navegador del pool durante el bloque `async with`
+        
+        Yields:
+            BrowserInstance con `context` listo para abrir páginas
+        """
+        async with self._semaphore:
+            async with self._lock:
+                instance = self._idle.pop() if self._idle else None
+                if instance is None:
+                    instance = await self._launch()
+            instance.pages_processed += 1
+            
+            try:
+                yield instance
+            finally:
+                if instance.expired(self.max_pages_per_browser, self.max_age_seconds):
+                    await instance.close()
+                else:
+                    async with self._lock:
+                        self._idle.append(instance)
+    
+    async def close(self):
+        """Cierra todos los navegadores inactivos y playwright"""
+        async with self._lock:
+            idle, self._idle = self._idle, []
+        for instance in idle:
+            await instance.close()
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+# Bucle de eventos persistente en un hilo propio: los objetos de playwright
+# quedan ligados a su bucle, así que el pool solo sobrevive entre llamadas
+# si todas se ejecutan en el mismo
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool: Optional[BrowserPool] = None
+_loop_lock = threading.Lock()
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Devuelve el bucle de eventos del pool, arrancando su hilo la primera vez"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="browser-pool", daemon=True).start()
+        return _loop
+
+def get_pool() -> BrowserPool:
+    """
+    Devuelve el pool compartido (llamar desde corrutinas ejecutadas con run_sync)
+    
+    Returns:
+        Instancia única de BrowserPool
+    """
+    global _pool
+    if _pool is None:
+        _pool = BrowserPool()
+    return _pool
+
+def run_sync(coro, timeout: Optional[float] = None):
+    """
+    Ejecuta una corrutina en el bucle del pool y espera su resultado
+    
+    Args:
+        coro: Corrutina a ejecutar
+        timeout: Espera máxima en segundos (None = sin límite)
+    
+    Returns:
+        Resultado de la corrutina
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result(timeout)
+
+def _shutdown():
+    """Cierra el pool y detiene el bucle al salir del proceso"""
+    if _loop is None:
+        return
+    try:
+        if _pool is not None:
+            run_sync(_pool.close(), timeout=10)
+    except Exception:
+        pass
+    _loop.call_soon_threadsafe(_loop.stop)
+
+atexit.register(_shutdown)
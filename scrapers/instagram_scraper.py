@@ -2,15 +2,63 @@
 Instagram Scraper usando instaloader y playwright
 """
 
-import time
 import json
-from typing import List, Dict, Any
+import atexit
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Any, Iterator
 from rich.console import Console
 
-from config import REQUEST_DELAY, MAX_RETRIES
+from config import MAX_RETRIES
+from utils.rate_limit import get_bucket
+from .record import VideoRecord
 
 console = Console()
 
+# Instancia de instaloader compartida (la sesión HTTP se reutiliza entre llamadas)
+_LOADER = None
+_loader_lock = threading.Lock()
+
+def _get_loader():
+    """
+    Devuelve el Instaloader del módulo, creándolo en el primer uso
+    
+    Returns:
+        Instancia de instaloader.Instaloader
+    """
+    global _LOADER
+    with _loader_lock:
+        if _LOADER is None:
+            import instaloader
+            
+            _LOADER = instaloader.Instaloader(
+                download_pictures=False,
+                download_videos=False,
+                download_video_thumbnails=False,
+                download_geotags=False,
+                download_comments=False,
+                save_metadata=False,
+                compress_json=False
+            )
+        return _LOADER
+
+# Extrae src y pie de foto de los <video> de la página en un solo evaluate
+# (en lugar de varias consultas al navegador por cada elemento)
+_VIDEO_DATA_JS = """(limit) => Array.from(document.querySelectorAll('video')).slice(0, limit).map(v => {
+    const caption = v.parentElement && v.parentElement.querySelector('[data-testid="post-caption"]');
+    return {src: v.getAttribute('src') || '', caption: caption ? caption.innerText : ''};
+})"""
+
+# Navegador de playwright compartido, manejado desde un único hilo propio
+# (no un ThreadPoolExecutor: concurrent.futures los cierra antes de los
+# handlers de atexit y el navegador ya no se podría cerrar desde su hilo)
+_PW = None
+_BROWSER = None
+_playwright_jobs = queue.Queue()
+_playwright_thread = None
+_playwright_thread_lock = threading.Lock()
+
 def search_instagram(keyword: str, max_results: int = 50) -> List[Dict]:
     """
     Busca videos en Instagram usando instaloader
@@ -54,25 +102,11 @@ def search_instagram_hashtag(hashtag: str, max_results: int) -> List[Dict]:
         Lista de videos encontrados
     """
     try:
-        import instaloader
-        
-        # Configurar instaloader
-        loader = instaloader.Instaloader(
-            download_pictures=False,
-            download_videos=False,
-            download_video_thumbnails=False,
-            download_geotags=False,
-            download_comments=False,
-            save_metadata=False,
-            compress_json=False
-        )
-        
-        # Buscar por hashtag
-        hashtag_obj = instaloader.Hashtag.from_name(loader.context, hashtag)
         videos = []
         
         count = 0
-        for post in hashtag_obj.get_posts():
+        # Los posts se piden en segundo plano mientras se filtran los anteriores
+        for post in _prefetch_posts(_fetch_posts(hashtag)):
             if count >= max_results:
                 break
                 
@@ -82,8 +116,6 @@ def search_instagram_hashtag(hashtag: str, max_results: int) -> List[Dict]:
                 if video_data:
                     videos.append(video_data)
                     count += 1
-            
-            time.sleep(REQUEST_DELAY)
         
         return videos
         
@@ -91,10 +123,86 @@ def search_instagram_hashtag(hashtag: str, max_results: int) -> List[Dict]:
         console.print(f"  [yellow]Error con instaloader: {str(e)}[/yellow]")
         return []
 
+def _fetch_posts(hashtag: str) -> Iterator[Any]:
+    """
+    Posts de un hashtag según instaloader (paginados bajo demanda)
+    
+    Es el único punto que habla con instaloader en la búsqueda por hashtag:
+    los tests lo sustituyen para no simular Instaloader ni Hashtag.
+    
+    Args:
+        hashtag: Hashtag a buscar
+        
+    Returns:
+        Iterador de posts de instaloader
+    """
+    import instaloader
+    
+    # Instaloader compartido entre búsquedas
+    loader = _get_loader()
+    return instaloader.Hashtag.from_name(loader.context, hashtag).get_posts()
+
+def _prefetch_posts(posts, buffer_size: int = 4):
+    """
+    Itera los posts de instaloader con un hilo que los va pidiendo por adelantado
+    
+    El hilo productor toma un turno de la cubeta compartida de
+    'instagram.com' antes de pedir cada post (solo duerme el tiempo que la
+    red no consumió ya). Al cortar la iteración el productor se detiene.
+    
+    Args:
+        posts: Iterador de posts (p. ej. Hashtag.get_posts())
+        buffer_size: Máximo de posts pedidos por adelantado
+        
+    Yields:
+        Posts en el mismo orden que el iterador original
+    """
+    buffer = queue.Queue(maxsize=buffer_size)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def producer():
+        bucket = get_bucket('instagram.com')
+        try:
+            posts_iter = iter(posts)
+            while bucket.wait(stop):
+                post = next(posts_iter, done)
+                if not put(post) or post is done:
+                    return
+        except Exception as e:
+            put(e)
+    
+    thread = threading.Thread(target=producer, name="instagram-posts", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
 def search_instagram_general(keyword: str, max_results: int) -> List[Dict]:
     """
     Búsqueda general en Instagram usando playwright
     
+    El navegador se lanza una sola vez y se reutiliza; cada búsqueda abre
+    solo un contexto nuevo. Como la API síncrona de playwright queda ligada
+    al hilo que la inició, todo el trabajo con el navegador se ejecuta en un
+    hilo dedicado.
+    
     Args:
         keyword: Palabra clave de búsqueda
         max_results: Máximo número de resultados
@@ -103,38 +211,110 @@ def search_instagram_general(keyword: str, max_results: int) -> List[Dict]:
         Lista de videos encontrados
     """
     try:
+        return _run_in_playwright_thread(_search_general, keyword, max_results).result()
+    except Exception as e:
+        console.print(f"  [yellow]Error con playwright: {str(e)}[/yellow]")
+        return []
+
+def _get_browser():
+    """Devuelve el navegador compartido (solo desde el hilo de playwright)"""
+    global _PW, _BROWSER
+    if _BROWSER is None or not _BROWSER.is_connected():
         from playwright.sync_api import sync_playwright
         
-        videos = []
+        if _PW is None:
+            _PW = sync_playwright().start()
+        _BROWSER = _PW.chromium.launch(headless=True)
+    return _BROWSER
+
+def _close_browser():
+    """Cierra el navegador y playwright (solo desde el hilo de playwright)"""
+    global _PW, _BROWSER
+    try:
+        if _BROWSER is not None:
+            _BROWSER.close()
+        if _PW is not None:
+            _PW.stop()
+    except Exception:
+        pass
+    finally:
+        _BROWSER = None
+        _PW = None
+
+def _playwright_worker():
+    """Ejecuta en orden los trabajos de playwright; None cierra el navegador y termina"""
+    while True:
+        job = _playwright_jobs.get()
+        if job is None:
+            _close_browser()
+            return
+        func, args, future = job
+        if not future.set_running_or_notify_cancel():
+            continue
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+def _run_in_playwright_thread(func, *args) -> Future:
+    """
+    Encola `func(*args)` en el hilo de playwright (lo arranca en el primer uso)
+    
+    Returns:
+        Future con el resultado de la llamada
+    """
+    global _playwright_thread
+    with _playwright_thread_lock:
+        if _playwright_thread is None:
+            _playwright_thread = threading.Thread(
+                target=_playwright_worker, name="playwright", daemon=True
+            )
+            _playwright_thread.start()
+    future = Future()
+    _playwright_jobs.put((func, args, future))
+    return future
+
+def _shutdown_playwright():
+    """Cierra el navegador desde su hilo y lo detiene al salir del proceso"""
+    thread = _playwright_thread
+    if thread is None or not thread.is_alive():
+        return
+    _playwright_jobs.put(None)
+    thread.join(timeout=10)
+
+atexit.register(_shutdown_playwright)
+
+def _search_general(keyword: str, max_results: int) -> List[Dict]:
+    """Búsqueda con playwright; se ejecuta en el hilo de playwright"""
+    videos = []
+    
+    context = _get_browser().new_context()
+    try:
+        page = context.new_page()
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            # Navegar a Instagram
-            page.goto(f"https://www.instagram.com/explore/tags/{keyword.replace(' ', '')}/")
-            page.wait_for_load_state('networkidle')
-            
-            # Buscar videos en la página
-            video_elements = page.query_selector_all('video')
-            
-            for i, video_elem in enumerate(video_elements[:max_results]):
-                try:
-                    # Obtener información del video
-                    video_data = extract_instagram_video_data(page, video_elem, i)
-                    if video_data:
-                        videos.append(video_data)
-                except Exception as e:
-                    console.print(f"  [yellow]Error extrayendo video {i}: {str(e)}[/yellow]")
-                    continue
-            
-            browser.close()
+        # Navegar a Instagram (turno compartido con instaloader)
+        get_bucket('instagram.com').wait()
+        page.goto(f"https://www.instagram.com/explore/tags/{keyword.replace(' ', '')}/")
+        page.wait_for_load_state('networkidle')
         
-        return videos
+        # Datos de todos los videos en una sola llamada al navegador
+        video_elements = page.evaluate(_VIDEO_DATA_JS, max_results)
         
-    except Exception as e:
-        console.print(f"  [yellow]Error con playwright: {str(e)}[/yellow]")
-        return []
+        for i, element in enumerate(video_elements):
+            try:
+                # Obtener información del video
+                video_data = extract_instagram_video_data(
+                    page.url, element.get('src') or '', element.get('caption') or '', i
+                )
+                if video_data:
+                    videos.append(video_data)
+            except Exception as e:
+                console.print(f"  [yellow]Error extrayendo video {i}: {str(e)}[/yellow]")
+                continue
+    finally:
+        context.close()
+    
+    return videos
 
 def parse_instagram_post(post) -> Dict:
     """
@@ -147,71 +327,64 @@ def parse_instagram_post(post) -> Dict:
         Diccionario con metadatos del video
     """
     try:
-        return {
-            'id': post.shortcode,
-            'title': post.caption[:100] if post.caption else 'Sin título',
-            'url': f"https://www.instagram.com/p/{post.shortcode}/",
-            'platform': 'instagram',
-            'duration': post.video_duration or 0,
-            'width': post.video_width or 0,
-            'height': post.video_height or 0,
-            'view_count': 0,  # No disponible en instaloader
-            'uploader': post.owner_username,
-            'upload_date': post.date_utc.isoformat() if post.date_utc else '',
-            'description': post.caption or '',
-            'tags': [],
-            'thumbnail': post.url,
-            'raw_data': {
+        return VideoRecord(
+            id=post.shortcode,
+            title=post.caption[:100] if post.caption else 'Sin título',
+            url=f"https://www.instagram.com/p/{post.shortcode}/",
+            platform='instagram',
+            duration=post.video_duration or 0,
+            width=post.video_width or 0,
+            height=post.video_height or 0,
+            view_count=0,  # No disponible en instaloader
+            uploader=post.owner_username,
+            upload_date=post.date_utc.isoformat() if post.date_utc else '',
+            description=post.caption or '',
+            tags=[],
+            thumbnail=post.url,
+            raw_data={
                 'shortcode': post.shortcode,
                 'likes': post.likes,
                 'comments': post.comments,
                 'is_video': post.is_video
             }
-        }
+        ).to_dict()
     except Exception as e:
         console.print(f"  [yellow]Error parseando post de Instagram: {str(e)}[/yellow]")
         return None
 
-def extract_instagram_video_data(page, video_elem, index: int) -> Dict:
+def extract_instagram_video_data(page_url: str, video_src: str, caption: str, index: int) -> Dict:
     """
-    Extrae datos de un elemento de video de Instagram
+    Construye los metadatos de un video de Instagram extraído del DOM
     
     Args:
-        page: Página de playwright
-        video_elem: Elemento de video
+        page_url: URL de la página de playwright
+        video_src: Atributo src del elemento de video
+        caption: Texto del pie de foto (vacío si no hay)
         index: Índice del video
         
     Returns:
         Diccionario con metadatos del video
     """
     try:
-        # Obtener información básica
-        video_src = video_elem.get_attribute('src') or ''
-        
-        # Buscar información adicional en el DOM
-        parent = video_elem.query_selector('xpath=..')
-        caption_elem = parent.query_selector('[data-testid="post-caption"]') if parent else None
-        caption = caption_elem.inner_text() if caption_elem else ''
-        
-        return {
-            'id': f"instagram_{index}",
-            'title': caption[:100] if caption else f'Video de Instagram {index}',
-            'url': page.url,
-            'platform': 'instagram',
-            'duration': 0,  # No disponible sin análisis
-            'width': 0,     # No disponible sin análisis
-            'height': 0,    # No disponible sin análisis
-            'view_count': 0,
-            'uploader': 'unknown',
-            'upload_date': '',
-            'description': caption,
-            'tags': [],
-            'thumbnail': video_src,
-            'raw_data': {
+        return VideoRecord(
+            id=f"instagram_{index}",
+            title=caption[:100] if caption else f'Video de Instagram {index}',
+            url=page_url,
+            platform='instagram',
+            duration=0,  # No disponible sin análisis
+            width=0,     # No disponible sin análisis
+            height=0,    # No disponible sin análisis
+            view_count=0,
+            uploader='unknown',
+            upload_date='',
+            description=caption,
+            tags=[],
+            thumbnail=video_src,
+            raw_data={
                 'video_src': video_src,
                 'index': index
             }
-        }
+        ).to_dict()
         
     except Exception as e:
         console.print(f"  [yellow]Error extrayendo datos de video: {str(e)}[/yellow]")
@@ -230,18 +403,11 @@ def get_instagram_video_metadata(url: str) -> Dict:
     try:
         import instaloader
         
-        loader = instaloader.Instaloader(
-            download_pictures=False,
-            download_videos=False,
-            download_video_thumbnails=False,
-            download_geotags=False,
-            download_comments=False,
-            save_metadata=False,
-            compress_json=False
-        )
+        loader = _get_loader()
         
         # Extraer shortcode de la URL
         shortcode = url.split('/p/')[-1].split('/')[0]
+        get_bucket('instagram.com').wait()
         post = instaloader.Post.from_shortcode(loader.context, shortcode)
         
         return parse_instagram_post(post)
@@ -0,0 +1,36 @@
+"""
+Esquema común de los videos devueltos por los scrapers
+"""
+
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List
+
+@dataclass(slots=True)
+class VideoRecord:
+    """
+    Metadatos de un video encontrado por un scraper
+    
+    Todos los scrapers construyen sus resultados con esta clase, así las
+    claves no divergen entre plataformas. Hacia fuera se siguen entregando
+    diccionarios (to_dict): la caché y el orquestador trabajan con ellos.
+    """
+    id: str
+    title: str
+    url: str
+    platform: str
+    duration: float = 0
+    width: int = 0
+    height: int = 0
+    view_count: int = 0
+    uploader: str = ''
+    upload_date: str = ''
+    description: str = ''
+    tags: List[str] = field(default_factory=list)
+    thumbnail: str = ''
+    raw_data: Dict[str, Any] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario plano con las claves del esquema (sin copia profunda)"""
+        return {name: getattr(self, name) for name in _FIELD_NAMES}
+
+_FIELD_NAMES = tuple(f.name for f in fields(VideoRecord))
@@ -2,16 +2,120 @@
 TikTok Scraper usando playwright y requests
 """
 
-import time
+import asyncio
 import json
 import re
-from typing import List, Dict, Any
+import threading
+from functools import lru_cache
+from urllib.parse import quote_plus
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from rich.console import Console
 
-from config import REQUEST_DELAY, MAX_RETRIES
+from config import MAX_RETRIES, TIKTOK_CONCURRENCY, SCRAPE_CACHE_EMPTY_TTL, KEEP_RAW
+from utils.scrape_cache import cached
+from ._browser_pool import USER_AGENT, get_pool, run_sync
+from utils.rate_limit import get_bucket
+from .record import VideoRecord
+
+try:
+    from orjson import loads as _loads  # Parser JSON en Rust (más rápido que json)
+except ImportError:
+    _loads = json.loads
+
+try:
+    from selectolax.parser import HTMLParser  # Parser HTML en C (mucho más rápido que bs4)
+except ImportError:
+    HTMLParser = None
 
 console = Console()
 
+# Campos del JSON-LD que no se copian a otra clave del resultado
+_RAW_KEYS = ('contentUrl', 'embedUrl', 'interactionStatistic', 'keywords')
+
+# Enlaces a videos (solo en el respaldo con bs4; selectolax usa a[href*="/video/"])
+_VIDEO_HREF_RE = re.compile(r'/video/')
+
+# Recursos que la extracción no necesita: las URLs de miniaturas se leen del
+# atributo src, sin descargar la imagen
+_BLOCKED_RESOURCES = frozenset({'image', 'media', 'font', 'stylesheet'})
+
+# Sesión HTTP compartida: reutiliza conexiones keep-alive (sin TLS por petición)
+_SESSION = None
+_session_lock = threading.Lock()
+
+def _get_session():
+    """
+    Devuelve la sesión de requests del módulo, creándola en el primer uso
+    
+    Returns:
+        Instancia de requests.Session con pool de conexiones y reintentos
+    """
+    global _SESSION
+    with _session_lock:
+        if _SESSION is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+            
+            session = requests.Session()
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.5',
+                'Accept-Encoding': 'gzip, deflate',
+                'Connection': 'keep-alive',
+            })
+            adapter = HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=20,
+                max_retries=Retry(total=MAX_RETRIES, backoff_factor=0.3)
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _SESSION = session
+        return _SESSION
+
+@lru_cache(maxsize=512)
+def _tiktok_search_url(keyword: str) -> str:
+    """URL de búsqueda de TikTok (palabra clave codificada: &, #, ? no rompen la URL)"""
+    return f"https://www.tiktok.com/search?q={quote_plus(keyword)}"
+
+@lru_cache(maxsize=1024)
+def _tiktok_video_id(url: str) -> Optional[str]:
+    """ID del video a partir de su URL, o None si no es un enlace /video/"""
+    if '/video/' not in url:
+        return None
+    return url.split('/video/')[-1].split('?')[0]
+
+def _video_hrefs(html: str) -> List[str]:
+    """Enlaces a videos (href con /video/) de una página de resultados"""
+    if HTMLParser is not None:
+        return [
+            node.attributes.get('href') or ''
+            for node in HTMLParser(html).css('a[href*="/video/"]')
+        ]
+    
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    return [link.get('href', '') for link in soup.find_all('a', href=_VIDEO_HREF_RE)]
+
+def _title_and_json_ld(html: str) -> Tuple[str, Iterator[str]]:
+    """Título de la página y contenido de sus bloques JSON-LD (se extrae bajo demanda)"""
+    if HTMLParser is not None:
+        tree = HTMLParser(html)
+        title = tree.css_first('title')
+        scripts = tree.css('script[type="application/ld+json"]')
+        return (title.text() if title else ''), (script.text() for script in scripts)
+    
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    title = soup.find('title')
+    scripts = soup.find_all('script', type='application/ld+json')
+    return (title.get_text() if title else ''), (script.string or '' for script in scripts)
+
+@cached('tt-search')
 def search_tiktok(keyword: str, max_results: int = 50) -> List[Dict]:
     """
     Busca videos en TikTok usando playwright
@@ -39,10 +143,30 @@ def search_tiktok(keyword: str, max_results: int = 50) -> List[Dict]:
         console.print(f"  [red]✗ TikTok: Error - {str(e)}[/red]")
         return []
 
+async def search_tiktok_async(keyword: str, max_results: int = 50) -> List[Dict]:
+    """
+    Variante asíncrona de search_tiktok
+    
+    La búsqueda con playwright corre en el bucle del pool de navegadores, así
+    que se espera desde el bucle del llamador sin bloquearlo.
+    
+    Args:
+        keyword: Palabra clave de búsqueda
+        max_results: Máximo número de resultados
+        
+    Returns:
+        Lista de diccionarios con metadatos de videos
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, search_tiktok, keyword, max_results)
+
 def search_tiktok_with_playwright(keyword: str, max_results: int) -> List[Dict]:
     """
     Busca videos en TikTok usando playwright
     
+    Envoltorio síncrono de search_tiktok_with_playwright_async para los
+    llamadores existentes; se ejecuta en el bucle del pool de navegadores.
+    
     Args:
         keyword: Palabra clave de búsqueda
         max_results: Máximo número de resultados
@@ -51,48 +175,73 @@ def search_tiktok_with_playwright(keyword: str, max_results: int) -> List[Dict]:
         Lista de videos encontrados
     """
     try:
-        from playwright.sync_api import sync_playwright
-        
-        videos = []
+        return run_sync(search_tiktok_with_playwright_async(keyword, max_results))
+    except Exception as e:
+        console.print(f"  [yellow]Error con playwright en TikTok: {str(e)}[/yellow]")
+        return []
+
+async def _block_heavy_resources(route):
+    """Aborta imágenes, videos, fuentes y hojas de estilo; deja pasar el resto"""
+    if route.request.resource_type in _BLOCKED_RESOURCES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def search_tiktok_with_playwright_async(keyword: str, max_results: int,
+                                              concurrency: int = TIKTOK_CONCURRENCY) -> List[Dict]:
+    """
+    Busca videos en TikTok usando playwright (API asíncrona)
+    
+    Usa un navegador del pool compartido (sin arrancar Chromium en cada
+    búsqueda). Los datos de cada tarjeta se extraen en paralelo, acotados
+    por un semáforo.
+    
+    Args:
+        keyword: Palabra clave de búsqueda
+        max_results: Máximo número de resultados
+        concurrency: Extracciones simultáneas
         
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            page = browser.new_page()
-            
-            # Configurar user agent
-            page.set_extra_http_headers({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            })
+    Returns:
+        Lista de videos encontrados (en el orden de la página)
+    """
+    async with get_pool().acquire() as instance:
+        page = await instance.context.new_page()
+        try:
+            # El user agent y el viewport vienen del contexto del pool
+            await page.route("**/*", _block_heavy_resources)
             
-            # Navegar a TikTok
-            search_url = f"https://www.tiktok.com/search?q={keyword.replace(' ', '%20')}"
-            page.goto(search_url)
-            page.wait_for_load_state('networkidle')
+            # Navegar a TikTok (la única petición de red: el resto lee el DOM)
+            search_url = _tiktok_search_url(keyword)
+            await get_bucket('tiktok.com').acquire()
+            await page.goto(search_url)
+            await page.wait_for_load_state('networkidle')
             
             # Esperar a que carguen los videos
-            page.wait_for_selector('[data-e2e="search-card-item"]', timeout=10000)
+            await page.wait_for_selector('[data-e2e="search-card-item"]', timeout=10000)
             
             # Buscar elementos de video
-            video_elements = page.query_selector_all('[data-e2e="search-card-item"]')
+            video_elements = await page.query_selector_all('[data-e2e="search-card-item"]')
             
-            for i, video_elem in enumerate(video_elements[:max_results]):
-                try:
-                    video_data = extract_tiktok_video_data(page, video_elem, i)
-                    if video_data:
-                        videos.append(video_data)
-                except Exception as e:
-                    console.print(f"  [yellow]Error extrayendo video {i}: {str(e)}[/yellow]")
-                    continue
-                
-                time.sleep(REQUEST_DELAY)
+            semaphore = asyncio.Semaphore(max(1, concurrency))
             
-            browser.close()
-        
-        return videos
-        
-    except Exception as e:
-        console.print(f"  [yellow]Error con playwright en TikTok: {str(e)}[/yellow]")
-        return []
+            async def bounded(video_elem, index: int):
+                async with semaphore:
+                    return await extract_tiktok_video_data(page, video_elem, index)
+            
+            extracted = await asyncio.gather(
+                *(bounded(video_elem, i) for i, video_elem in enumerate(video_elements[:max_results])),
+                return_exceptions=True
+            )
+        finally:
+            await page.close()
+    
+    videos = []
+    for i, video_data in enumerate(extracted):
+        if isinstance(video_data, Exception):
+            console.print(f"  [yellow]Error extrayendo video {i}: {str(video_data)}[/yellow]")
+        elif video_data:
+            videos.append(video_data)
+    return videos
 
 def search_tiktok_with_requests(keyword: str, max_results: int) -> List[Dict]:
     """
@@ -106,27 +255,16 @@ def search_tiktok_with_requests(keyword: str, max_results: int) -> List[Dict]:
         Lista de videos encontrados
     """
     try:
-        import requests
-        from bs4 import BeautifulSoup
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        }
-        
-        search_url = f"https://www.tiktok.com/search?q={keyword.replace(' ', '%20')}"
+        search_url = _tiktok_search_url(keyword)
         
-        response = requests.get(search_url, headers=headers, timeout=30)
+        get_bucket('tiktok.com').wait()
+        response = _get_session().get(search_url, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
         videos = []
         
-        # Buscar elementos de video en el HTML
-        video_links = soup.find_all('a', href=re.compile(r'/video/'))
+        # Buscar enlaces de video en el HTML
+        video_links = _video_hrefs(response.text)
         
         for i, link in enumerate(video_links[:max_results]):
             try:
@@ -143,12 +281,12 @@ def search_tiktok_with_requests(keyword: str, max_results: int) -> List[Dict]:
         console.print(f"  [yellow]Error con requests en TikTok: {str(e)}[/yellow]")
         return []
 
-def extract_tiktok_video_data(page, video_elem, index: int) -> Dict:
+async def extract_tiktok_video_data(page, video_elem, index: int) -> Dict:
     """
     Extrae datos de un elemento de video de TikTok
     
     Args:
-        page: Página de playwright
+        page: Página de playwright (API asíncrona)
         video_elem: Elemento de video
         index: Índice del video
         
@@ -157,90 +295,91 @@ def extract_tiktok_video_data(page, video_elem, index: int) -> Dict:
     """
     try:
         # Obtener enlace del video
-        link_elem = video_elem.query_selector('a')
-        video_url = link_elem.get_attribute('href') if link_elem else ''
+        link_elem = await video_elem.query_selector('a')
+        video_url = (await link_elem.get_attribute('href') if link_elem else '') or ''
         
         if not video_url.startswith('http'):
             video_url = f"https://www.tiktok.com{video_url}"
         
         # Obtener información adicional
-        title_elem = video_elem.query_selector('[data-e2e="search-card-desc"]')
-        title = title_elem.inner_text() if title_elem else f'Video de TikTok {index}'
+        title_elem = await video_elem.query_selector('[data-e2e="search-card-desc"]')
+        title = await title_elem.inner_text() if title_elem else f'Video de TikTok {index}'
         
-        user_elem = video_elem.query_selector('[data-e2e="search-card-user-unique-id"]')
-        user = user_elem.inner_text() if user_elem else 'unknown'
+        user_elem = await video_elem.query_selector('[data-e2e="search-card-user-unique-id"]')
+        user = await user_elem.inner_text() if user_elem else 'unknown'
         
         # Obtener thumbnail
-        img_elem = video_elem.query_selector('img')
-        thumbnail = img_elem.get_attribute('src') if img_elem else ''
-        
-        return {
-            'id': f"tiktok_{index}",
-            'title': title[:100] if title else f'Video de TikTok {index}',
-            'url': video_url,
-            'platform': 'tiktok',
-            'duration': 0,  # No disponible sin análisis
-            'width': 0,     # No disponible sin análisis
-            'height': 0,    # No disponible sin análisis
-            'view_count': 0,
-            'uploader': user,
-            'upload_date': '',
-            'description': title,
-            'tags': [],
-            'thumbnail': thumbnail,
-            'raw_data': {
+        img_elem = await video_elem.query_selector('img')
+        thumbnail = await img_elem.get_attribute('src') if img_elem else ''
+        
+        return VideoRecord(
+            id=f"tiktok_{index}",
+            title=title[:100] if title else f'Video de TikTok {index}',
+            url=video_url,
+            platform='tiktok',
+            duration=0,  # No disponible sin análisis
+            width=0,     # No disponible sin análisis
+            height=0,    # No disponible sin análisis
+            view_count=0,
+            uploader=user,
+            upload_date='',
+            description=title,
+            tags=[],
+            thumbnail=thumbnail,
+            raw_data={
                 'index': index,
                 'user': user
             }
-        }
+        ).to_dict()
         
     except Exception as e:
         console.print(f"  [yellow]Error extrayendo datos de video TikTok: {str(e)}[/yellow]")
         return None
 
-def parse_tiktok_link(link_elem, index: int) -> Dict:
+def parse_tiktok_link(href: str, index: int) -> Dict:
     """
     Parsea un enlace de video de TikTok
     
     Args:
-        link_elem: Elemento de enlace
+        href: Atributo href del enlace
         index: Índice del video
         
     Returns:
         Diccionario con metadatos del video
     """
     try:
-        video_url = link_elem.get('href', '')
+        video_url = href or ''
         if not video_url.startswith('http'):
             video_url = f"https://www.tiktok.com{video_url}"
         
         # Extraer ID del video de la URL
-        video_id = video_url.split('/video/')[-1].split('?')[0] if '/video/' in video_url else f"tiktok_{index}"
-        
-        return {
-            'id': video_id,
-            'title': f'Video de TikTok {index}',
-            'url': video_url,
-            'platform': 'tiktok',
-            'duration': 0,
-            'width': 0,
-            'height': 0,
-            'view_count': 0,
-            'uploader': 'unknown',
-            'upload_date': '',
-            'description': '',
-            'tags': [],
-            'thumbnail': '',
-            'raw_data': {
+        video_id = _tiktok_video_id(video_url) or f"tiktok_{index}"
+        
+        return VideoRecord(
+            id=video_id,
+            title=f'Video de TikTok {index}',
+            url=video_url,
+            platform='tiktok',
+            duration=0,
+            width=0,
+            height=0,
+            view_count=0,
+            uploader='unknown',
+            upload_date='',
+            description='',
+            tags=[],
+            thumbnail='',
+            raw_data={
                 'index': index,
                 'video_id': video_id
             }
-        }
+        ).to_dict()
         
     except Exception as e:
         console.print(f"  [yellow]Error parseando enlace TikTok: {str(e)}[/yellow]")
         return None
 
+@cached('tt-meta', empty_ttl=SCRAPE_CACHE_EMPTY_TTL)
 def get_tiktok_video_metadata(url: str) -> Dict:
     """
     Obtiene metadatos de un video específico de TikTok
@@ -252,51 +391,50 @@ def get_tiktok_video_metadata(url: str) -> Dict:
         Diccionario con metadatos del video
     """
     try:
-        import requests
-        from bs4 import BeautifulSoup
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=30)
+        get_bucket('tiktok.com').wait()
+        response = _get_session().get(url, timeout=30)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
         # Extraer información del video
-        title = soup.find('title')
-        title_text = title.get_text() if title else 'Sin título'
+        title_text, json_scripts = _title_and_json_ld(response.text)
+        title_text = title_text or 'Sin título'
         
-        # Buscar metadatos en JSON-LD
-        json_scripts = soup.find_all('script', type='application/ld+json')
+        # Buscar metadatos en JSON-LD; los bloques que ni mencionan VideoObject
+        # se descartan con una búsqueda de subcadena, sin llegar a parsearlos
         video_data = {}
         
         for script in json_scripts:
+            if 'VideoObject' not in script:
+                continue
             try:
-                data = json.loads(script.string)
+                data = _loads(script)
                 if isinstance(data, dict) and data.get('@type') == 'VideoObject':
                     video_data = data
                     break
             except json.JSONDecodeError:
                 continue
         
-        return {
-            'id': url.split('/video/')[-1].split('?')[0] if '/video/' in url else 'unknown',
-            'title': title_text,
-            'url': url,
-            'platform': 'tiktok',
-            'duration': video_data.get('duration', 0),
-            'width': video_data.get('width', 0),
-            'height': video_data.get('height', 0),
-            'view_count': 0,
-            'uploader': video_data.get('author', {}).get('name', 'unknown'),
-            'upload_date': video_data.get('uploadDate', ''),
-            'description': video_data.get('description', ''),
-            'tags': [],
-            'thumbnail': video_data.get('thumbnailUrl', ''),
-            'raw_data': video_data
-        }
+        if KEEP_RAW:
+            raw_data = video_data
+        else:
+            raw_data = {key: video_data[key] for key in _RAW_KEYS if key in video_data}
+        
+        return VideoRecord(
+            id=_tiktok_video_id(url) or 'unknown',
+            title=title_text,
+            url=url,
+            platform='tiktok',
+            duration=video_data.get('duration', 0),
+            width=video_data.get('width', 0),
+            height=video_data.get('height', 0),
+            view_count=0,
+            uploader=video_data.get('author', {}).get('name', 'unknown'),
+            upload_date=video_data.get('uploadDate', ''),
+            description=video_data.get('description', ''),
+            tags=[],
+            thumbnail=video_data.get('thumbnailUrl', ''),
+            raw_data=raw_data
+        ).to_dict()
         
     except Exception as e:
         console.print(f"  [red]Error obteniendo metadatos de TikTok: {str(e)}[/red]")
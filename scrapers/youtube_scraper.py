@@ -2,20 +2,76 @@
 YouTube Scraper usando yt-dlp
 """
 
+import asyncio
 import json
 import subprocess
-import time
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from typing import List, Dict, Any, Iterator
 from rich.console import Console
 
-from config import YT_DLP_OPTIONS, REQUEST_DELAY
+from config import YT_DLP_OPTIONS, SCRAPE_CACHE_EMPTY_TTL, KEEP_RAW
+from utils.scrape_cache import cached, Uncached
+from utils.rate_limit import get_bucket
+from .record import VideoRecord
+
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:
+    YoutubeDL = None
+
+try:
+    from orjson import loads as _loads  # Parser JSON en Rust; acepta bytes sin decodificar
+except ImportError:
+    _loads = json.loads
 
 console = Console()
 
+# Opciones de yt-dlp como librería: listados planos y metadatos completos
+_SEARCH_OPTS = {**YT_DLP_OPTIONS, 'skip_download': True, 'extract_flat': 'in_playlist'}
+_INFO_OPTS = {**YT_DLP_OPTIONS, 'skip_download': True, 'extract_flat': False}
+
+# Campos crudos que no se copian a otra clave del resultado (el resto de la
+# entrada de yt-dlp, con formats/thumbnails/subtítulos, se descarta salvo KEEP_RAW)
+_RAW_KEYS = ('channel_id', 'availability', 'live_status')
+
+# Instancias de YoutubeDL reutilizables: cada una la usa un solo hilo a la vez
+_ydl_pool: Dict[tuple, List[Any]] = {}
+_ydl_lock = threading.Lock()
+
+@contextmanager
+def _ydl(options: Dict):
+    """
+    Presta una instancia de YoutubeDL con las opciones dadas
+    
+    Args:
+        options: _SEARCH_OPTS o _INFO_OPTS
+        
+    Yields:
+        Instancia de YoutubeDL (se devuelve al pool al salir)
+    """
+    key = (YoutubeDL, id(options))
+    with _ydl_lock:
+        free = _ydl_pool.setdefault(key, [])
+        ydl = free.pop() if free else None
+    if ydl is None:
+        ydl = YoutubeDL(dict(options))
+    try:
+        yield ydl
+    finally:
+        with _ydl_lock:
+            free.append(ydl)
+
+@cached('yt-search')
 def search_youtube(keyword: str, max_results: int = 50) -> List[Dict]:
     """
     Busca videos en YouTube usando yt-dlp
     
+    Si la búsqueda se corta por un error, se devuelve lo obtenido hasta
+    entonces pero no se cachea.
+    
     Args:
         keyword: Palabra clave de búsqueda
         max_results: Máximo número de resultados
@@ -25,52 +81,224 @@ def search_youtube(keyword: str, max_results: int = 50) -> List[Dict]:
     """
     console.print(f"  [blue]Buscando en YouTube: '{keyword}' (max: {max_results})[/blue]")
     
+    videos = []
     try:
-        # Construir comando yt-dlp
-        cmd = [
-            'yt-dlp',
-            '--dump-json',
-            '--flat-playlist',
-            '--playlist-end', str(max_results),
-            f'ytsearch{max_results}:{keyword}',
-            '--quiet',
-            '--no-warnings'
-        ]
+        for video_data in _fetch_raw(keyword, max_results):
+            videos.append(parse_youtube_video(video_data))
+    except Exception as e:
+        _report_search_error(e)
+        return Uncached(videos)
+    
+    console.print(f"  [green]✓ YouTube: {len(videos)} videos encontrados[/green]")
+    return videos
+
+def iter_youtube(keyword: str, max_results: int = 50) -> Iterator[Dict]:
+    """
+    Busca videos en YouTube y los produce según llegan (sin caché)
+    
+    Sin la librería, cada línea de yt-dlp se entrega en cuanto se imprime, así
+    el llamador puede empezar a filtrar antes de que termine la búsqueda. Los
+    errores se informan por consola y terminan la iteración.
+    
+    Args:
+        keyword: Palabra clave de búsqueda
+        max_results: Máximo número de resultados
         
-        # Ejecutar comando
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=60,
-            check=True
-        )
+    Yields:
+        Diccionario con metadatos de cada video
+    """
+    try:
+        for video_data in _fetch_raw(keyword, max_results):
+            yield parse_youtube_video(video_data)
+    except Exception as e:
+        _report_search_error(e)
+
+def _report_search_error(error: Exception):
+    """Informa por consola de un error en la búsqueda de YouTube"""
+    if isinstance(error, subprocess.CalledProcessError):
+        console.print(f"  [red]✗ YouTube: Error en búsqueda - código {error.returncode}[/red]")
+    elif isinstance(error, subprocess.TimeoutExpired):
+        console.print("  [red]✗ YouTube: Timeout en búsqueda[/red]")
+    else:
+        console.print(f"  [red]✗ YouTube: Error inesperado - {str(error)}[/red]")
+
+async def search_youtube_async(keyword: str, max_results: int = 50) -> List[Dict]:
+    """
+    Variante asíncrona de search_youtube (la búsqueda corre en el executor del bucle)
+    
+    Args:
+        keyword: Palabra clave de búsqueda
+        max_results: Máximo número de resultados
+        
+    Returns:
+        Lista de diccionarios con metadatos de videos
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, search_youtube, keyword, max_results)
+
+def search_youtube_batch(keywords: List[str], max_results: int = 50) -> List[List[Dict]]:
+    """
+    Busca varias palabras clave en YouTube
+    
+    Usa yt-dlp como librería dentro del proceso (sin arrancar un intérprete
+    ni serializar JSON por cada búsqueda), con las búsquedas en paralelo.
+    Si yt_dlp no se puede importar, recurre a un único proceso del ejecutable
+    para todas las palabras clave.
+    
+    Args:
+        keywords: Palabras clave de búsqueda
+        max_results: Máximo número de resultados por palabra clave
+        
+    Returns:
+        Lista (alineada con keywords) de listas de metadatos de videos
+    """
+    if not keywords:
+        return []
+    if YoutubeDL is None:
+        return _search_youtube_batch_cli(keywords, max_results)
+    
+    if len(keywords) == 1:
+        return [_search_youtube_api(keywords[0], max_results)]
+    with ThreadPoolExecutor(max_workers=min(4, len(keywords))) as executor:
+        return list(executor.map(
+            lambda keyword: _search_youtube_api(keyword, max_results), keywords
+        ))
+
+def _fetch_raw(keyword: str, max_results: int) -> Iterator[Dict]:
+    """
+    Entradas crudas de yt-dlp para una búsqueda (listado plano)
+    
+    Con la librería la búsqueda corre en proceso; sin ella, las entradas del
+    ejecutable se producen según llegan. Es el único punto que habla con
+    yt-dlp: los tests lo sustituyen para no simular YoutubeDL ni Popen.
+    
+    Args:
+        keyword: Palabra clave de búsqueda
+        max_results: Máximo número de resultados
+        
+    Yields:
+        Diccionario de yt-dlp por cada video
+        
+    Raises:
+        subprocess.TimeoutExpired, subprocess.CalledProcessError: Sin la
+            librería, si el ejecutable agotó el tiempo o falló
+    """
+    # Límite de peticiones compartido (escalona búsquedas concurrentes)
+    get_bucket('youtube.com').wait()
+    
+    if YoutubeDL is None:
+        yield from _iter_json_lines(_search_cmd([keyword], max_results), timeout=60)
+        return
+    
+    with _ydl(_SEARCH_OPTS) as ydl:
+        info = ydl.extract_info(f'ytsearch{max_results}:{keyword}', download=False)
+    entries = (info or {}).get('entries') or []
+    yield from islice((video_data for video_data in entries if video_data), max_results)
+
+def _search_youtube_api(keyword: str, max_results: int) -> List[Dict]:
+    """Una búsqueda con YoutubeDL en proceso (listado plano)"""
+    try:
+        return [parse_youtube_video(video_data) for video_data in _fetch_raw(keyword, max_results)]
+    except Exception as e:
+        console.print(f"  [red]✗ YouTube: Error en búsqueda - {str(e)}[/red]")
+        return []
+
+def _iter_json_lines(cmd: List[str], timeout: float) -> Iterator[Dict]:
+    """
+    Ejecuta yt-dlp y produce cada objeto JSON de su salida según llega
+    
+    La salida se lee línea a línea (memoria de una sola línea) en lugar de
+    esperar al final del proceso.
+    
+    Args:
+        cmd: Comando a ejecutar (con --dump-json)
+        timeout: Segundos antes de matar el proceso
+        
+    Yields:
+        Diccionario por cada línea JSON válida
+        
+    Raises:
+        subprocess.TimeoutExpired: Si se agotó el tiempo
+        subprocess.CalledProcessError: Si el proceso terminó con error
+    """
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    timed_out = threading.Event()
+    
+    def kill():
+        timed_out.set()
+        proc.kill()
+    
+    timer = threading.Timer(timeout, kill)
+    timer.daemon = True
+    timer.start()
+    try:
+        for line in proc.stdout:
+            if not line.strip():
+                continue
+            try:
+                yield _loads(line)
+            except json.JSONDecodeError:
+                continue
+    finally:
+        timer.cancel()
+        # Si el consumidor abandona la iteración, el proceso sobra
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+    
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd)
+
+def _search_cmd(keywords: List[str], max_results: int) -> List[str]:
+    """Comando yt-dlp con una búsqueda por palabra clave (listado plano en JSON)"""
+    return [
+        'yt-dlp',
+        '--dump-json',
+        '--flat-playlist',
+        '--playlist-end', str(max_results),
+        '--ignore-errors',
+        '--quiet',
+        '--no-warnings'
+    ] + [f'ytsearch{max_results}:{keyword}' for keyword in keywords]
+
+def _search_youtube_batch_cli(keywords: List[str], max_results: int) -> List[List[Dict]]:
+    """Búsquedas con un solo proceso del ejecutable yt-dlp (sin la librería)"""
+    grouped: List[List[Dict]] = [[] for _ in keywords]
+    
+    try:
+        cmd = _search_cmd(keywords, max_results)
+        
+        # Cada entrada trae la búsqueda de la que sale (playlist_id == palabra clave)
+        index_by_query = {keyword: i for i, keyword in enumerate(keywords)}
+        current = 0
+        
+        get_bucket('youtube.com').wait()
         
-        # Parsear resultados
-        videos = []
-        for line in result.stdout.strip().split('\n'):
-            if line.strip():
-                try:
-                    video_data = json.loads(line)
-                    videos.append(parse_youtube_video(video_data))
-                except json.JSONDecodeError:
-                    continue
+        # Con --ignore-errors una búsqueda fallida no corta las demás
+        for video_data in _iter_json_lines(cmd, timeout=60 * len(keywords)):
+            query = video_data.get('playlist_id') or video_data.get('playlist')
+            if query in index_by_query:
+                current = index_by_query[query]
+            elif video_data.get('playlist_index') == 1 and grouped[current]:
+                # Sin identificador de búsqueda: empieza la siguiente
+                current = min(current + 1, len(keywords) - 1)
+            grouped[current].append(parse_youtube_video(video_data))
         
-        console.print(f"  [green]✓ YouTube: {len(videos)} videos encontrados[/green]")
-        return videos
+        return grouped
         
+    except subprocess.CalledProcessError as e:
+        if not any(grouped):
+            console.print(f"  [red]✗ YouTube: Error en búsqueda - código {e.returncode}[/red]")
+        return grouped
     except subprocess.TimeoutExpired:
         console.print("  [red]✗ YouTube: Timeout en búsqueda[/red]")
-        return []
-    except subprocess.CalledProcessError as e:
-        console.print(f"  [red]✗ YouTube: Error en búsqueda - {e}[/red]")
-        return []
+        return grouped
     except Exception as e:
         console.print(f"  [red]✗ YouTube: Error inesperado - {str(e)}[/red]")
-        return []
-    finally:
-        # Delay entre requests
-        time.sleep(REQUEST_DELAY)
+        return grouped
 
 def parse_youtube_video(video_data: Dict) -> Dict:
     """
@@ -82,23 +310,29 @@ def parse_youtube_video(video_data: Dict) -> Dict:
     Returns:
         Diccionario estructurado con metadatos
     """
-    return {
-        'id': video_data.get('id', ''),
-        'title': video_data.get('title', 'Sin título'),
-        'url': video_data.get('webpage_url', ''),
-        'platform': 'youtube',
-        'duration': video_data.get('duration', 0),
-        'width': video_data.get('width', 0),
-        'height': video_data.get('height', 0),
-        'view_count': video_data.get('view_count', 0),
-        'uploader': video_data.get('uploader', ''),
-        'upload_date': video_data.get('upload_date', ''),
-        'description': video_data.get('description', ''),
-        'tags': video_data.get('tags', []),
-        'thumbnail': video_data.get('thumbnail', ''),
-        'raw_data': video_data
-    }
+    if KEEP_RAW:
+        raw_data = video_data
+    else:
+        raw_data = {key: video_data[key] for key in _RAW_KEYS if key in video_data}
+    
+    return VideoRecord(
+        id=video_data.get('id', ''),
+        title=video_data.get('title', 'Sin título'),
+        url=video_data.get('webpage_url') or video_data.get('url', ''),
+        platform='youtube',
+        duration=video_data.get('duration') or 0,
+        width=video_data.get('width') or 0,
+        height=video_data.get('height') or 0,
+        view_count=video_data.get('view_count', 0),
+        uploader=video_data.get('uploader', ''),
+        upload_date=video_data.get('upload_date', ''),
+        description=video_data.get('description', ''),
+        tags=video_data.get('tags', []),
+        thumbnail=video_data.get('thumbnail', ''),
+        raw_data=raw_data
+    ).to_dict()
 
+@cached('yt-meta', empty_ttl=SCRAPE_CACHE_EMPTY_TTL)
 def get_youtube_video_metadata(video_id: str) -> Dict:
     """
     Obtiene metadatos detallados de un video específico de YouTube
@@ -110,21 +344,27 @@ def get_youtube_video_metadata(video_id: str) -> Dict:
         Diccionario con metadatos del video
     """
     try:
+        url = f'https://www.youtube.com/watch?v={video_id}'
+        
+        if YoutubeDL is not None:
+            with _ydl(_INFO_OPTS) as ydl:
+                video_data = ydl.extract_info(url, download=False)
+            return parse_youtube_video(video_data) if video_data else {}
+        
         cmd = [
             'yt-dlp',
             '--dump-json',
-            f'https://www.youtube.com/watch?v={video_id}'
+            url
         ]
         
         result = subprocess.run(
             cmd,
             capture_output=True,
-            text=True,
             timeout=30,
             check=True
         )
         
-        video_data = json.loads(result.stdout)
+        video_data = _loads(result.stdout)
         return parse_youtube_video(video_data)
         
     except Exception as e:
@@ -144,7 +384,31 @@ def search_youtube_playlist(playlist_url: str, max_results: int = 50) -> List[Di
     """
     console.print(f"  [blue]Buscando en playlist de YouTube: {playlist_url}[/blue]")
     
+    videos = list(iter_youtube_playlist(playlist_url, max_results))
+    console.print(f"  [green]✓ Playlist YouTube: {len(videos)} videos encontrados[/green]")
+    return videos
+
+def iter_youtube_playlist(playlist_url: str, max_results: int = 50) -> Iterator[Dict]:
+    """
+    Produce los videos de una playlist de YouTube según llegan
+    
+    Args:
+        playlist_url: URL de la playlist
+        max_results: Máximo número de resultados
+        
+    Yields:
+        Diccionario con metadatos de cada video
+    """
     try:
+        if YoutubeDL is not None:
+            # Instancia propia: playlistend depende de la llamada
+            with YoutubeDL({**_SEARCH_OPTS, 'playlistend': max_results}) as ydl:
+                info = ydl.extract_info(playlist_url, download=False)
+            for video_data in (info or {}).get('entries') or []:
+                if video_data:
+                    yield parse_youtube_video(video_data)
+            return
+        
         cmd = [
             'yt-dlp',
             '--dump-json',
@@ -153,26 +417,8 @@ def search_youtube_playlist(playlist_url: str, max_results: int = 50) -> List[Di
             playlist_url
         ]
         
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=60,
-            check=True
-        )
-        
-        videos = []
-        for line in result.stdout.strip().split('\n'):
-            if line.strip():
-                try:
-                    video_data = json.loads(line)
-                    videos.append(parse_youtube_video(video_data))
-                except json.JSONDecodeError:
-                    continue
-        
-        console.print(f"  [green]✓ Playlist YouTube: {len(videos)} videos encontrados[/green]")
-        return videos
+        for video_data in _iter_json_lines(cmd, timeout=60):
+            yield parse_youtube_video(video_data)
         
     except Exception as e:
         console.print(f"  [red]✗ Error en playlist YouTube: {str(e)}[/red]")
-        return []
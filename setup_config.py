@@ -3,11 +3,12 @@
 Script de configuración para VideoFinder AI Bot
 """
 
+import asyncio
 import os
 import shutil
-import subprocess
 import sys
 from pathlib import Path
+from typing import List, Optional
 
 def check_python_version():
     """Verifica la versión de Python"""
@@ -18,16 +19,27 @@ def check_python_version():
     print(f"✅ Python {sys.version.split()[0]} - OK")
     return True
 
-def check_ffmpeg():
-    """Verifica si FFmpeg está instalado"""
+async def run_command(cmd: List[str]) -> Optional[int]:
+    """
+    Ejecuta un comando sin bloquear el bucle de eventos
+    
+    Args:
+        cmd: Comando y argumentos
+    
+    Returns:
+        Código de salida, o None si el comando no existe
+    """
     try:
-        result = subprocess.run(['ffmpeg', '-version'], 
-                              capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            print("✅ FFmpeg - OK")
-            return True
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+        proc = await asyncio.create_subprocess_exec(*cmd)
+    except FileNotFoundError:
+        return None
+    return await proc.wait()
+
+def check_ffmpeg():
+    """Verifica si FFmpeg está instalado (en el PATH, sin ejecutarlo)"""
+    if shutil.which('ffmpeg') and shutil.which('ffprobe'):
+        print("✅ FFmpeg - OK")
+        return True
     
     print("❌ FFmpeg no encontrado")
     print("   Instala desde: https://ffmpeg.org/download.html")
@@ -35,15 +47,10 @@ def check_ffmpeg():
     return False
 
 def check_tesseract():
-    """Verifica si Tesseract está instalado"""
-    try:
-        result = subprocess.run(['tesseract', '--version'], 
-                              capture_output=True, text=True, timeout=5)
-        if result.returncode == 0:
-            print("✅ Tesseract OCR - OK")
-            return True
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        pass
+    """Verifica si Tesseract está instalado (en el PATH, sin ejecutarlo)"""
+    if shutil.which('tesseract'):
+        print("✅ Tesseract OCR - OK")
+        return True
     
     print("❌ Tesseract OCR no encontrado")
     print("   Instala desde: https://github.com/UB-Mannheim/tesseract/wiki")
@@ -87,30 +94,25 @@ def create_directories():
         Path(dir_path).mkdir(parents=True, exist_ok=True)
         print(f"✅ Directorio {dir_path} creado")
 
-def install_dependencies():
+async def install_dependencies():
     """Instala dependencias de Python"""
-    try:
-        print("📦 Instalando dependencias...")
-        subprocess.run([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt'], 
-                      check=True)
+    print("📦 Instalando dependencias...")
+    if await run_command([sys.executable, '-m', 'pip', 'install', '-r', 'requirements.txt']) == 0:
         print("✅ Dependencias instaladas")
         return True
-    except subprocess.CalledProcessError:
-        print("❌ Error instalando dependencias")
-        return False
+    print("❌ Error instalando dependencias")
+    return False
 
-def install_playwright():
+async def install_playwright():
     """Instala Playwright"""
-    try:
-        print("🎭 Instalando Playwright...")
-        subprocess.run([sys.executable, '-m', 'playwright', 'install'], check=True)
+    print("🎭 Instalando Playwright...")
+    if await run_command([sys.executable, '-m', 'playwright', 'install']) == 0:
         print("✅ Playwright instalado")
         return True
-    except subprocess.CalledProcessError:
-        print("❌ Error instalando Playwright")
-        return False
+    print("❌ Error instalando Playwright")
+    return False
 
-def main():
+async def main():
     """Función principal de configuración"""
     print("🚀 VideoFinder AI Bot - Configuración")
     print("=" * 50)
@@ -125,18 +127,18 @@ def main():
     # Crear archivo .env
     create_env_file()
     
+    # Verificar herramientas externas
+    ffmpeg_ok = check_ffmpeg()
+    tesseract_ok = check_tesseract()
+    
     # Instalar dependencias
-    if not install_dependencies():
+    if not await install_dependencies():
         return 1
     
-    # Instalar Playwright
-    if not install_playwright():
+    # Instalar Playwright (necesita el paquete que instala pip)
+    if not await install_playwright():
         return 1
     
-    # Verificar herramientas externas
-    ffmpeg_ok = check_ffmpeg()
-    tesseract_ok = check_tesseract()
-    
     print("\n" + "=" * 50)
     print("📋 RESUMEN DE CONFIGURACIÓN")
     print("=" * 50)
@@ -153,4 +155,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    exit(main())
+    exit(asyncio.run(main()))
@@ -6,125 +6,167 @@ Verifica que todos los componentes funcionen correctamente
 
 import sys
 import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from rich.console import Console
 from rich.panel import Panel
+from rich.traceback import Traceback
 
 # Agregar el directorio actual al path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 console = Console()
 
-def test_imports():
+class BufferedOutput:
+    """
+    Acumula los mensajes de una prueba para mostrarlos juntos
+    
+    Las pruebas que corren en paralelo escriben aquí en lugar de en la
+    consola, así su salida no se intercala.
+    """
+    
+    def __init__(self):
+        self.messages = []
+    
+    def print(self, *args, **kwargs):
+        self.messages.append((args, kwargs))
+    
+    def replay(self, target: Console):
+        """Vuelca los mensajes acumulados en la consola"""
+        for args, kwargs in self.messages:
+            target.print(*args, **kwargs)
+
+def test_imports(out=console):
     """Prueba que todos los imports funcionen"""
-    console.print("[blue]Probando imports...[/blue]")
+    out.print("[blue]Probando imports...[/blue]")
     
     try:
         from config import validate_config, USE_GPU
-        console.print("    [green]✓ Config importado[/green]")
+        out.print("    [green]✓ Config importado[/green]")
         
         from analyzer.video_analyzer import EnhancedVideoAnalyzer
-        console.print("    [green]✓ Video Analyzer importado[/green]")
+        out.print("    [green]✓ Video Analyzer importado[/green]")
         
         from analyzer.face_detector import FaceDetector
-        console.print("    [green]✓ Face Detector importado[/green]")
+        out.print("    [green]✓ Face Detector importado[/green]")
         
         from analyzer.text_detector import TextDetector
-        console.print("    [green]✓ Text Detector importado[/green]")
+        out.print("    [green]✓ Text Detector importado[/green]")
         
         from downloader import VideoDownloader
-        console.print("    [green]✓ Video Downloader importado[/green]")
+        out.print("    [green]✓ Video Downloader importado[/green]")
         
         from orchestrator import run_job
-        console.print("    [green]✓ Orchestrator importado[/green]")
+        out.print("    [green]✓ Orchestrator importado[/green]")
         
         return True
         
     except Exception as e:
-        console.print(f"    [red]✗ Error en imports: {str(e)}[/red]")
+        out.print(f"    [red]✗ Error en imports: {str(e)}[/red]")
+        out.print(Traceback())
         return False
 
-def test_gpu_config():
+def test_gpu_config(out=console):
     """Prueba la configuración de GPU"""
-    console.print("\n[blue]Probando configuración de GPU...[/blue]")
+    out.print("\n[blue]Probando configuración de GPU...[/blue]")
     
     try:
         from config import USE_GPU
         
         if USE_GPU:
-            console.print("    [green]✓ GPU habilitado en configuración[/green]")
+            out.print("    [green]✓ GPU habilitado en configuración[/green]")
             
             # Verificar PyTorch
             try:
                 import torch
                 if torch.cuda.is_available():
-                    console.print(f"    [green]✓ CUDA disponible: {torch.cuda.get_device_name(0)}[/green]")
+                    out.print(f"    [green]✓ CUDA disponible: {torch.cuda.get_device_name(0)}[/green]")
                 else:
-                    console.print("    [yellow]⚠️  CUDA no disponible[/yellow]")
+                    out.print("    [yellow]⚠️  CUDA no disponible[/yellow]")
             except ImportError:
-                console.print("    [yellow]⚠️  PyTorch no instalado[/yellow]")
+                out.print("    [yellow]⚠️  PyTorch no instalado[/yellow]")
         else:
-            console.print("    [yellow]⚠️  GPU deshabilitado[/yellow]")
+            out.print("    [yellow]⚠️  GPU deshabilitado[/yellow]")
             
         return True
         
     except Exception as e:
-        console.print(f"    [red]✗ Error en configuración GPU: {str(e)}[/red]")
+        out.print(f"    [red]✗ Error en configuración GPU: {str(e)}[/red]")
+        out.print(Traceback())
         return False
 
-def test_components():
+def test_components(out=console):
     """Prueba la inicialización de componentes"""
-    console.print("\n[blue]Probando componentes...[/blue]")
+    out.print("\n[blue]Probando componentes...[/blue]")
     
     try:
         # Probar configuración
         from config import validate_config
         validate_config()
-        console.print("    [green]✓ Configuración validada[/green]")
+        out.print("    [green]✓ Configuración validada[/green]")
         
         # Probar Face Detector
         from analyzer.face_detector import FaceDetector
         face_detector = FaceDetector()
-        console.print("    [green]✓ Face Detector inicializado[/green]")
+        out.print("    [green]✓ Face Detector inicializado[/green]")
         
         # Probar Text Detector
         from analyzer.text_detector import TextDetector
         text_detector = TextDetector()
-        console.print("    [green]✓ Text Detector inicializado[/green]")
+        out.print("    [green]✓ Text Detector inicializado[/green]")
         
         # Probar Video Analyzer
         from analyzer.video_analyzer import EnhancedVideoAnalyzer
         config = {'filters': {'vertical': True, 'faces': True, 'text': True}}
         analyzer = EnhancedVideoAnalyzer(config)
-        console.print("    [green]✓ Video Analyzer inicializado[/green]")
+        out.print("    [green]✓ Video Analyzer inicializado[/green]")
         
         # Probar Downloader
         from downloader import VideoDownloader
         downloader = VideoDownloader()
-        console.print("    [green]✓ Video Downloader inicializado[/green]")
+        out.print("    [green]✓ Video Downloader inicializado[/green]")
         
         return True
         
     except Exception as e:
-        console.print(f"    [red]✗ Error en componentes: {str(e)}[/red]")
+        out.print(f"    [red]✗ Error en componentes: {str(e)}[/red]")
+        out.print(Traceback())
         return False
 
-def test_ytdlp():
+def test_ytdlp(out=console):
     """Prueba yt-dlp"""
-    console.print("\n[blue]Probando yt-dlp...[/blue]")
+    out.print("\n[blue]Probando yt-dlp...[/blue]")
+    
+    # Con la librería instalada basta su versión (sin lanzar un proceso)
+    try:
+        from yt_dlp.version import __version__
+        out.print(f"    [green]✓ yt-dlp disponible: {__version__}[/green]")
+        return True
+    except ImportError:
+        pass
+    
+    if shutil.which('yt-dlp') is None:
+        out.print("    [red]✗ yt-dlp no encontrado (ni librería ni ejecutable)[/red]")
+        return False
     
     try:
-        import subprocess
         result = subprocess.run(['yt-dlp', '--version'], 
-                              capture_output=True, text=True, timeout=10)
+                              capture_output=True, text=True, timeout=2)
         if result.returncode == 0:
             version = result.stdout.strip()
-            console.print(f"    [green]✓ yt-dlp disponible: {version}[/green]")
+            out.print(f"    [green]✓ yt-dlp disponible: {version}[/green]")
             return True
         else:
-            console.print("    [red]✗ yt-dlp no funciona correctamente[/red]")
+            out.print("    [red]✗ yt-dlp no funciona correctamente[/red]")
             return False
+    except subprocess.TimeoutExpired:
+        # `yt-dlp --version` responde en menos de un segundo: si no, está colgado
+        out.print("    [red]✗ yt-dlp no respondió en 2s[/red]")
+        return False
     except Exception as e:
-        console.print(f"    [red]✗ Error con yt-dlp: {str(e)}[/red]")
+        out.print(f"    [red]✗ Error con yt-dlp: {str(e)}[/red]")
+        out.print(Traceback())
         return False
 
 def main():
@@ -141,15 +183,30 @@ def main():
         ("yt-dlp", test_ytdlp)
     ]
     
-    results = []
-    
-    for test_name, test_func in tests:
+    def run_test(test_name, test_func):
+        output = BufferedOutput()
         try:
-            result = test_func()
-            results.append((test_name, result))
+            return test_func(output), output
         except Exception as e:
-            console.print(f"[red]✗ Error en {test_name}: {str(e)}[/red]")
-            results.append((test_name, False))
+            output.print(f"[red]✗ Error en {test_name}: {str(e)}[/red]")
+            output.print(Traceback())
+            return False, output
+    
+    # Los imports van primero y solos: dejan los módulos cargados para el
+    # resto, que son independientes y corren en paralelo
+    first, rest = tests[0], tests[1:]
+    outcomes = [run_test(*first)]
+    outcomes[0][1].replay(console)
+    
+    with ThreadPoolExecutor(max_workers=len(rest)) as executor:
+        futures = [executor.submit(run_test, *test) for test in rest]
+        # La salida se muestra en el orden de la lista, no en el de finalización
+        for future in futures:
+            outcome = future.result()
+            outcome[1].replay(console)
+            outcomes.append(outcome)
+    
+    results = [(test_name, result) for (test_name, _), (result, _) in zip(tests, outcomes)]
     
     # Mostrar resumen
     console.print("\n[bold]Resumen de Pruebas:[/bold]")
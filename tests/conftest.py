@@ -0,0 +1,115 @@
+"""
+Configuración común de pytest
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+import pytest
+from unittest.mock import patch
+
+# Los tests simulan las respuestas de red: la caché de scraping en disco
+# devolvería resultados de ejecuciones anteriores
+os.environ.setdefault("SCRAPE_CACHE", "false")
+
+# Resultados y cachés (análisis, sondeos) van a un directorio propio de este
+# proceso: con pytest-xdist cada worker tiene el suyo y no pisan outputs/
+_TEST_DIR = tempfile.mkdtemp(prefix="videofinder-tests-")
+atexit.register(shutil.rmtree, _TEST_DIR, True)
+os.environ.setdefault("OUTPUT_DIR", os.path.join(_TEST_DIR, "outputs"))
+os.environ.setdefault("TEMP_DIR", os.path.join(_TEST_DIR, "tmp"))
+
+# Sin caché de análisis: los tests reutilizan URLs con resultados distintos
+os.environ.setdefault("ANALYSIS_CACHE_FILE", "")
+
+# Sin red real no hace falta espaciar peticiones por host
+os.environ.setdefault("REQUEST_DELAY", "0")
+
+# Configuración de usuario para el analizador compartido
+ANALYZER_CONFIG = {
+    'keyword': 'test video',
+    'platforms': ['youtube'],
+    'max_results': 1,
+    'duration_range': (10, 60),
+    'filters': {
+        'no_faces': True,
+        'no_text': True,
+        'min_duration': 10,
+        'max_duration': 60
+    }
+}
+
+# Propiedades del VideoCapture simulado (se construyen una sola vez)
+CAP_PROPS = {
+    5: 30,  # FPS
+    7: 900,  # FRAME_COUNT
+    3: 640,  # FRAME_WIDTH
+    4: 480   # FRAME_HEIGHT
+}
+
+def pytest_configure(config):
+    """Registra los marcadores propios de la suite"""
+    config.addinivalue_line(
+        "markers",
+        "serial: usa red real o GPU; ejecutar aparte, sin pytest-xdist (-m serial)"
+    )
+
+@pytest.fixture(scope="session")
+def detector():
+    """
+    FaceDetector compartido por toda la sesión (el modelo se carga una vez)
+    
+    Los tests que sustituyen atributos lo hacen con patch.object, que los
+    restaura al terminar, así la instancia no queda alterada entre tests.
+    """
+    from analyzer.face_detector import FaceDetector
+    
+    return FaceDetector()
+
+@pytest.fixture(scope="session")
+def black_frame():
+    """Frame negro 640x480 de solo lectura, compartido por los tests que no lo modifican"""
+    import numpy as np
+    
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame.setflags(write=False)
+    return frame
+
+@pytest.fixture(scope="session")
+def rand_frame():
+    """Frame 640x480 de ruido (semilla fija), de solo lectura y compartido"""
+    import numpy as np
+    
+    frame = np.random.default_rng(0).integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    frame.setflags(write=False)
+    return frame
+
+@pytest.fixture(scope="session")
+def downloader():
+    """VideoDownloader compartido por los tests de descarga real"""
+    from downloader import VideoDownloader
+    
+    return VideoDownloader()
+
+@pytest.fixture(scope="session")
+def analyzer():
+    """EnhancedVideoAnalyzer compartido (carga YOLO y EasyOCR una sola vez)"""
+    from analyzer.video_analyzer import EnhancedVideoAnalyzer
+    
+    return EnhancedVideoAnalyzer(ANALYZER_CONFIG)
+
+@pytest.fixture
+def video_capture():
+    """
+    Sustituye cv2.VideoCapture por una captura abierta de 30 fps y 900 frames
+    
+    Devuelve la instancia simulada: cada test fija sus frames con
+    `video_capture.read.side_effect`.
+    """
+    with patch('cv2.VideoCapture') as mock_cap:
+        capture = mock_cap.return_value
+        capture.isOpened.return_value = True
+        capture.get.side_effect = lambda prop: CAP_PROPS.get(prop, 0)
+        yield capture
@@ -6,127 +6,77 @@ import pytest
 import numpy as np
 from unittest.mock import patch, MagicMock
 
-from analyzer.face_detector import FaceDetector
+# Estrategia de muestreo por duración (corto / mediano / largo)
+SAMPLE_STRATEGY = {
+    'short': {'max_dur': 60, 'fps_factor': 0.5},
+    'medium': {'max_dur': 300, 'fps_factor': 1.0},
+    'long': {'fps_factor': 2.0}
+}
+
+@pytest.fixture
+def mock_model(detector):
+    """Sustituye el modelo YOLO del detector compartido durante un test"""
+    with patch.object(detector, 'model') as model:
+        yield model
+
+@pytest.fixture
+def face_box():
+    """Caja YOLO simulada: un rostro en (100, 100)-(200, 200) con confianza 0.8"""
+    box = MagicMock()
+    box.xyxy = [np.array([100, 100, 200, 200])]
+    box.conf = [np.array([0.8])]
+    box.cls = [np.array([0])]  # Clase 0 = rostro
+    return box
 
 class TestFaceDetector:
     """Tests para detector de rostros"""
     
-    def test_face_detector_init(self):
+    def test_face_detector_init(self, detector):
         """Test inicialización del detector"""
-        detector = FaceDetector()
-        
         # Verificar que se inicializa correctamente
         assert detector.confidence_threshold > 0
         assert detector.model_path is not None
     
-    def test_get_model_info(self):
+    def test_get_model_info(self, detector):
         """Test obtener información del modelo"""
-        detector = FaceDetector()
         info = detector.get_model_info()
         
         assert 'loaded' in info
         assert 'model_path' in info
         assert 'device' in info
     
-    def test_detect_faces_on_frame_no_faces(self):
+    def test_detect_faces_on_frame_no_faces(self, detector, mock_model, black_frame):
         """Test detección en frame sin rostros"""
-        detector = FaceDetector()
-        
-        # Crear frame de prueba (imagen negra)
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        mock_model.return_value = [MagicMock(boxes=None)]
         
-        with patch.object(detector, 'model') as mock_model:
-            mock_model.return_value = [MagicMock(boxes=None)]
-            
-            faces = detector.detect_faces_on_frame(frame)
-            assert faces == []
+        faces = detector.detect_faces_on_frame(black_frame)
+        assert faces == []
     
-    def test_detect_faces_on_frame_with_faces(self):
+    def test_detect_faces_on_frame_with_faces(self, detector, mock_model, face_box, black_frame):
         """Test detección en frame con rostros"""
-        detector = FaceDetector()
-        
-        # Crear frame de prueba
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        
-        with patch.object(detector, 'model') as mock_model:
-            # Mock de detección con rostro
-            mock_box = MagicMock()
-            mock_box.xyxy = [np.array([100, 100, 200, 200])]
-            mock_box.conf = [np.array([0.8])]
-            mock_box.cls = [np.array([0])]  # Clase 0 = rostro
-            
-            mock_result = MagicMock()
-            mock_result.boxes = [mock_box]
-            mock_model.return_value = [mock_result]
-            
-            faces = detector.detect_faces_on_frame(frame)
-            
-            assert len(faces) == 1
-            assert faces[0]['confidence'] == 0.8
-            assert faces[0]['class'] == 'face'
-            assert faces[0]['bbox'] == [100, 100, 100, 100]
-    
-    def test_calculate_sample_rate_short_video(self):
-        """Test cálculo de tasa de muestreo para video corto"""
-        detector = FaceDetector()
-        
-        sample_strategy = {
-            'short': {'max_dur': 60, 'fps_factor': 0.5},
-            'medium': {'max_dur': 300, 'fps_factor': 1.0},
-            'long': {'fps_factor': 2.0}
-        }
+        mock_model.return_value = [MagicMock(boxes=[face_box])]
         
-        # Video corto (30 segundos)
-        sample_rate = detector._calculate_sample_rate(30, sample_strategy, 30)
-        assert sample_rate == 15  # 30 fps * 0.5 = 15
-    
-    def test_calculate_sample_rate_medium_video(self):
-        """Test cálculo de tasa de muestreo para video mediano"""
-        detector = FaceDetector()
-        
-        sample_strategy = {
-            'short': {'max_dur': 60, 'fps_factor': 0.5},
-            'medium': {'max_dur': 300, 'fps_factor': 1.0},
-            'long': {'fps_factor': 2.0}
-        }
+        faces = detector.detect_faces_on_frame(black_frame)
         
-        # Video mediano (120 segundos)
-        sample_rate = detector._calculate_sample_rate(120, sample_strategy, 30)
-        assert sample_rate == 30  # 30 fps * 1.0 = 30
+        assert len(faces) == 1
+        assert faces[0]['confidence'] == 0.8
+        assert faces[0]['class'] == 'face'
+        assert faces[0]['bbox'] == [100, 100, 100, 100]
     
-    def test_calculate_sample_rate_long_video(self):
-        """Test cálculo de tasa de muestreo para video largo"""
-        detector = FaceDetector()
-        
-        sample_strategy = {
-            'short': {'max_dur': 60, 'fps_factor': 0.5},
-            'medium': {'max_dur': 300, 'fps_factor': 1.0},
-            'long': {'fps_factor': 2.0}
-        }
-        
-        # Video largo (400 segundos)
-        sample_rate = detector._calculate_sample_rate(400, sample_strategy, 30)
-        assert sample_rate == 60  # 30 fps * 2.0 = 60
+    @pytest.mark.parametrize("duration,expected", [
+        (30, 15),   # Video corto: 30 fps * 0.5
+        (120, 30),  # Video mediano: 30 fps * 1.0
+        (400, 60),  # Video largo: 30 fps * 2.0
+    ])
+    def test_calculate_sample_rate(self, detector, duration, expected):
+        """Test cálculo de tasa de muestreo según la duración del video"""
+        assert detector._calculate_sample_rate(duration, SAMPLE_STRATEGY, 30) == expected
     
-    @patch('cv2.VideoCapture')
-    def test_detect_faces_on_video_success(self, mock_cap):
+    def test_detect_faces_on_video_success(self, video_capture, detector, black_frame):
         """Test detección en video exitosa"""
-        detector = FaceDetector()
-        
-        # Mock de VideoCapture
-        mock_cap_instance = MagicMock()
-        mock_cap_instance.isOpened.return_value = True
-        mock_cap_instance.get.side_effect = lambda prop: {
-            5: 30,  # FPS
-            7: 900,  # FRAME_COUNT
-            3: 640,  # FRAME_WIDTH
-            4: 480   # FRAME_HEIGHT
-        }.get(prop, 0)
-        
         # Mock de frames
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        mock_cap_instance.read.side_effect = [(True, frame), (True, frame), (False, None)]
-        mock_cap.return_value = mock_cap_instance
+        frame = black_frame
+        video_capture.read.side_effect = [(True, frame), (True, frame), (False, None)]
         
         with patch.object(detector, 'detect_faces_on_frame') as mock_detect:
             mock_detect.return_value = []
@@ -137,25 +87,11 @@ class TestFaceDetector:
             assert detections == []
             mock_detect.assert_called()
     
-    @patch('cv2.VideoCapture')
-    def test_detect_faces_on_video_with_faces(self, mock_cap):
+    def test_detect_faces_on_video_with_faces(self, video_capture, detector, black_frame):
         """Test detección en video con rostros"""
-        detector = FaceDetector()
-        
-        # Mock de VideoCapture
-        mock_cap_instance = MagicMock()
-        mock_cap_instance.isOpened.return_value = True
-        mock_cap_instance.get.side_effect = lambda prop: {
-            5: 30,  # FPS
-            7: 900,  # FRAME_COUNT
-            3: 640,  # FRAME_WIDTH
-            4: 480   # FRAME_HEIGHT
-        }.get(prop, 0)
-        
         # Mock de frames
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        mock_cap_instance.read.side_effect = [(True, frame), (False, None)]
-        mock_cap.return_value = mock_cap_instance
+        frame = black_frame
+        video_capture.read.side_effect = [(True, frame), (False, None)]
         
         with patch.object(detector, 'detect_faces_on_frame') as mock_detect:
             mock_detect.return_value = [{
@@ -171,10 +107,8 @@ class TestFaceDetector:
             assert detections[0]['frame'] == 0
             assert detections[0]['confidence'] == 0.8
     
-    def test_detect_faces_with_confirmation(self):
+    def test_detect_faces_with_confirmation(self, detector):
         """Test detección con confirmación"""
-        detector = FaceDetector()
-        
         with patch.object(detector, 'detect_faces_on_video') as mock_detect:
             mock_detect.return_value = [{
                 'frame': 10,
@@ -197,28 +131,22 @@ class TestFaceDetector:
                 assert detections[0]['confirmed'] == True
                 assert detections[0]['nearby_count'] == 1
     
-    def test_check_nearby_frames(self):
+    def test_check_nearby_frames(self, video_capture, detector, black_frame):
         """Test verificación de frames cercanos"""
-        detector = FaceDetector()
+        video_capture.set.return_value = True
+        video_capture.read.side_effect = [(True, black_frame), (True, black_frame)]
         
-        with patch('cv2.VideoCapture') as mock_cap:
-            mock_cap_instance = MagicMock()
-            mock_cap_instance.isOpened.return_value = True
-            mock_cap_instance.set.return_value = True
-            mock_cap_instance.read.side_effect = [(True, np.zeros((480, 640, 3))), (True, np.zeros((480, 640, 3)))]
-            mock_cap.return_value = mock_cap_instance
+        with patch.object(detector, 'detect_faces_on_frame') as mock_detect:
+            mock_detect.return_value = [{
+                'bbox': [100, 100, 200, 200],
+                'confidence': 0.8,
+                'class': 'face'
+            }]
             
-            with patch.object(detector, 'detect_faces_on_frame') as mock_detect:
-                mock_detect.return_value = [{
-                    'bbox': [100, 100, 200, 200],
-                    'confidence': 0.8,
-                    'class': 'face'
-                }]
-                
-                nearby = detector._check_nearby_frames('test.mp4', 10, 5)
-                
-                assert len(nearby) > 0
-                assert nearby[0]['frame'] in [5, 6, 7, 8, 9, 11, 12, 13, 14, 15]
+            nearby = detector._check_nearby_frames('test.mp4', 10, 5)
+            
+            assert len(nearby) > 0
+            assert nearby[0]['frame'] in [5, 6, 7, 8, 9, 11, 12, 13, 14, 15]
 
 if __name__ == '__main__':
     pytest.main([__file__])
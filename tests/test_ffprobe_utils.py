@@ -2,15 +2,23 @@
 Tests para utilidades de ffprobe
 """
 
+import asyncio
 import pytest
 import os
 import tempfile
-from unittest.mock import patch, MagicMock
+import threading
+import time
+from unittest.mock import patch, MagicMock, AsyncMock
 
+from utils.scrape_cache import ScrapeCache
 from utils.ffprobe_utils import (
+    batch_ffprobe,
+    clear_metadata_cache,
     get_video_metadata,
     get_metadata_with_ytdlp,
     get_metadata_with_ffprobe,
+    get_metadata_batch,
+    gather_metadata,
     parse_ytdlp_metadata,
     parse_ffprobe_metadata,
     get_video_duration,
@@ -18,6 +26,88 @@ from utils.ffprobe_utils import (
     is_video_vertical
 )
 
+# Salidas de ejemplo de yt-dlp y ffprobe
+YTDLP_DATA = {
+    'duration': 120,
+    'width': 1920,
+    'height': 1080,
+    'fps': 30,
+    'format': 'mp4',
+    'ext': 'mp4',
+    'filesize': 1000000,
+    'view_count': 5000,
+    'uploader': 'test_user',
+    'upload_date': '20240101',
+    'title': 'Test Video',
+    'description': 'Test Description',
+    'tags': ['test', 'video'],
+    'thumbnail': 'http://example.com/thumb.jpg',
+    'webpage_url': 'http://example.com/video',
+    'id': 'test123',
+    'extractor': 'youtube'
+}
+
+FFPROBE_DATA = {
+    'format': {
+        'duration': '120.5',
+        'format_name': 'mp4',
+        'size': '1000000',
+        'filename': 'test.mp4',
+        'tags': {
+            'title': 'Test Video',
+            'comment': 'Test Description'
+        }
+    },
+    'streams': [
+        {
+            'codec_type': 'video',
+            'width': 1920,
+            'height': 1080,
+            'r_frame_rate': '30/1'
+        }
+    ]
+}
+
+# Campos que cada parser debe extraer de las salidas de ejemplo
+YTDLP_EXPECTED = {
+    'duration': 120,
+    'width': 1920,
+    'height': 1080,
+    'fps': 30,
+    'platform': 'youtube',
+    'title': 'Test Video'
+}
+
+FFPROBE_EXPECTED = {
+    'duration': 120.5,
+    'width': 1920,
+    'height': 1080,
+    'fps': 30.0,
+    'platform': 'local',
+    'title': 'Test Video'
+}
+
+@pytest.fixture(autouse=True)
+def empty_metadata_cache():
+    """Cada test empieza sin metadatos cacheados por los anteriores"""
+    clear_metadata_cache()
+    yield
+    clear_metadata_cache()
+
+def test_parse_ytdlp_metadata():
+    """Test parsear metadatos de yt-dlp"""
+    assert parse_ytdlp_metadata(YTDLP_DATA).items() >= YTDLP_EXPECTED.items()
+
+def test_parse_ffprobe_metadata():
+    """Test parsear metadatos de ffprobe"""
+    assert parse_ffprobe_metadata(FFPROBE_DATA).items() >= FFPROBE_EXPECTED.items()
+
+def test_parsers_drop_raw_response():
+    """Test sin KEEP_RAW los parsers no retienen la respuesta completa"""
+    ytdlp = parse_ytdlp_metadata({**YTDLP_DATA, 'formats': [{'vcodec': 'h264'}] * 100, 'live_status': 'not_live'})
+    assert ytdlp['raw_data'] == {'live_status': 'not_live'}
+    assert parse_ffprobe_metadata(FFPROBE_DATA)['raw_data'] == {}
+
 class TestFFProbeUtils:
     """Tests para utilidades de ffprobe"""
     
@@ -50,69 +140,35 @@ class TestFFProbeUtils:
             mock_get_dimensions.return_value = (1920, 1080)
             assert is_video_vertical('test_url') == False
     
-    def test_parse_ytdlp_metadata(self):
-        """Test parsear metadatos de yt-dlp"""
-        ytdlp_data = {
-            'duration': 120,
-            'width': 1920,
-            'height': 1080,
-            'fps': 30,
-            'format': 'mp4',
-            'ext': 'mp4',
-            'filesize': 1000000,
-            'view_count': 5000,
-            'uploader': 'test_user',
-            'upload_date': '20240101',
-            'title': 'Test Video',
-            'description': 'Test Description',
-            'tags': ['test', 'video'],
-            'thumbnail': 'http://example.com/thumb.jpg',
-            'webpage_url': 'http://example.com/video',
-            'id': 'test123',
-            'extractor': 'youtube'
-        }
-        
-        result = parse_ytdlp_metadata(ytdlp_data)
+    def test_get_metadata_with_ytdlp_in_process(self):
+        """Test con la librería instalada no se lanza ningún proceso"""
+        with patch('utils.ffprobe_utils.YoutubeDL') as mock_ydl, patch('subprocess.run') as mock_run:
+            mock_ydl.return_value.extract_info.return_value = YTDLP_DATA
+            
+            first = get_metadata_with_ytdlp('http://example.com/a')
+            second = get_metadata_with_ytdlp('http://example.com/b')
         
-        assert result['duration'] == 120
-        assert result['width'] == 1920
-        assert result['height'] == 1080
-        assert result['fps'] == 30
-        assert result['platform'] == 'youtube'
-        assert result['title'] == 'Test Video'
-    
-    def test_parse_ffprobe_metadata(self):
-        """Test parsear metadatos de ffprobe"""
-        ffprobe_data = {
-            'format': {
-                'duration': '120.5',
-                'format_name': 'mp4',
-                'size': '1000000',
-                'filename': 'test.mp4',
-                'tags': {
-                    'title': 'Test Video',
-                    'comment': 'Test Description'
-                }
-            },
-            'streams': [
-                {
-                    'codec_type': 'video',
-                    'width': 1920,
-                    'height': 1080,
-                    'r_frame_rate': '30/1'
-                }
-            ]
-        }
+        assert first['duration'] == 120
+        assert second['duration'] == 120
+        mock_ydl.assert_called_once()  # Instancia reutilizada en el mismo hilo
+        mock_run.assert_not_called()
+    
+    def test_get_metadata_with_ytdlp_in_process_falls_back(self):
+        """Test si la librería falla se recurre al ejecutable"""
+        mock_result = MagicMock()
+        mock_result.stdout = '{"duration": 120, "width": 1920, "height": 1080}'
         
-        result = parse_ffprobe_metadata(ffprobe_data)
+        with patch('utils.ffprobe_utils.YoutubeDL') as mock_ydl, \
+             patch('subprocess.run', return_value=mock_result) as mock_run:
+            mock_ydl.return_value.extract_info.side_effect = Exception("Extractor roto")
+            
+            result = get_metadata_with_ytdlp('http://example.com/video')
         
-        assert result['duration'] == 120.5
-        assert result['width'] == 1920
-        assert result['height'] == 1080
-        assert result['fps'] == 30.0
-        assert result['platform'] == 'local'
-        assert result['title'] == 'Test Video'
+        assert result['duration'] == 120
+        mock_run.assert_called_once()
+        assert mock_run.call_args[0][0][-1] == 'http://example.com/video'
     
+    @patch('utils.ffprobe_utils.YoutubeDL', None)
     @patch('subprocess.run')
     def test_get_metadata_with_ytdlp_success(self, mock_run):
         """Test obtener metadatos con yt-dlp exitoso"""
@@ -127,7 +183,12 @@ class TestFFProbeUtils:
         assert result['duration'] == 120
         assert result['width'] == 1920
         assert result['height'] == 1080
+        # Timeout de red y reintentos cortos: una URL caída falla rápido
+        cmd = mock_run.call_args[0][0]
+        assert '--socket-timeout' in cmd and '--retries' in cmd
+        assert cmd[-1] == 'http://example.com/video'
     
+    @patch('utils.ffprobe_utils.YoutubeDL', None)
     @patch('subprocess.run')
     def test_get_metadata_with_ytdlp_failure(self, mock_run):
         """Test obtener metadatos con yt-dlp fallido"""
@@ -166,6 +227,68 @@ class TestFFProbeUtils:
         assert result['duration'] == 120.5
         assert result['width'] == 1920
         assert result['height'] == 1080
+        # Solo se piden los campos que se parsean
+        cmd = mock_run.call_args[0][0]
+        assert '-show_entries' in cmd and '-show_streams' not in cmd
+    
+    def test_batch_ffprobe(self):
+        """Test varios ffprobe simultáneos conservando el orden"""
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+        
+        def fake_ffprobe(path):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return {'filename': path}
+        
+        paths = [f'/videos/{i}.mp4' for i in range(4)]
+        with patch('utils.ffprobe_utils.get_metadata_with_ffprobe', side_effect=fake_ffprobe):
+            results = batch_ffprobe(paths, max_workers=4)
+        
+        assert [r['filename'] for r in results] == paths
+        assert peak > 1
+        assert batch_ffprobe([]) == []
+    
+    @patch('subprocess.run')
+    def test_get_metadata_batch(self, mock_run):
+        """Test obtener metadatos de varias URLs en una sola llamada"""
+        mock_result = MagicMock()
+        mock_result.stdout = (
+            "http://example.com/a\thttp://example.com/a\t30\t1080\t1920\n"
+            "http://example.com/b\thttp://example.com/b\tNA\tNA\tNA\n"
+        )
+        mock_result.returncode = 1
+        mock_run.return_value = mock_result
+        
+        result = get_metadata_batch(['http://example.com/a', 'http://example.com/b'])
+        
+        assert mock_run.call_count == 1
+        assert result['http://example.com/a'] == {'duration': 30.0, 'width': 1080, 'height': 1920}
+        assert 'http://example.com/b' not in result
+    
+    def test_gather_metadata(self):
+        """Test metadatos de varias URLs con procesos yt-dlp asíncronos"""
+        outputs = {
+            'http://example.com/a': (0, b'{"duration": 30, "width": 1080, "height": 1920}'),
+            'http://example.com/b': (1, b'')
+        }
+        
+        async def fake_exec(*cmd, **kwargs):
+            returncode, stdout = outputs[cmd[-1]]
+            return MagicMock(returncode=returncode, communicate=AsyncMock(return_value=(stdout, b'')))
+        
+        with patch('asyncio.create_subprocess_exec', side_effect=fake_exec) as mock_exec:
+            result = asyncio.run(gather_metadata(list(outputs) + ['/local/file.mp4'], concurrency=2))
+        
+        assert mock_exec.call_count == 2
+        assert list(result) == ['http://example.com/a']
+        assert result['http://example.com/a']['duration'] == 30
     
     def test_get_video_metadata_url(self):
         """Test obtener metadatos de URL"""
@@ -189,6 +312,74 @@ class TestFFProbeUtils:
             assert result['duration'] == 120
             mock_ffprobe.assert_called_once_with('/path/to/video.mp4')
     
+    @patch('utils.ffprobe_utils.YoutubeDL', None)
+    @patch('subprocess.run')
+    def test_get_video_metadata_cached(self, mock_run):
+        """Test la segunda consulta de la misma URL no lanza yt-dlp"""
+        mock_result = MagicMock()
+        mock_result.stdout = '{"duration": 120, "width": 1920, "height": 1080}'
+        mock_run.return_value = mock_result
+        
+        first = get_video_metadata('http://example.com/video')
+        second = get_video_metadata('http://example.com/video')
+        
+        assert mock_run.call_count == 1
+        assert second == first
+    
+    def test_get_video_metadata_basic_fields(self):
+        """Test pedir solo duración/resolución de una URL usa la sonda ligera"""
+        basic = {'duration': 30.0, 'width': 1080, 'height': 1920}
+        
+        with patch('utils.ffprobe_utils.get_basic_duration_and_resolution', return_value=basic) as mock_basic, \
+             patch('utils.ffprobe_utils._fetch_video_metadata') as mock_fetch:
+            assert get_video_metadata('http://example.com/video', fields=('duration',)) == basic
+            assert get_video_dimensions('http://example.com/video') == (1080, 1920)
+            
+            mock_fetch.return_value = {**basic, 'fps': 30.0}
+            assert get_video_metadata('http://example.com/video')['fps'] == 30.0
+        
+        assert mock_basic.call_count == 2
+        assert mock_fetch.call_count == 1
+        
+        # Si la sonda ligera falla, la consulta completa no pide otro turno de host
+        clear_metadata_cache()
+        metadata = {**basic, 'fps': 30.0}
+        with patch('utils.ffprobe_utils._wait_for_host') as mock_wait, \
+             patch('utils.ffprobe_utils.get_basic_duration_and_resolution', return_value=None), \
+             patch('utils.ffprobe_utils.get_metadata_with_ytdlp', return_value=metadata) as mock_ytdlp:
+            assert get_video_metadata('http://example.com/other', fields=('duration',)) == metadata
+        
+        mock_ytdlp.assert_called_once_with('http://example.com/other')
+        mock_wait.assert_called_once_with('http://example.com/other')
+    
+    def test_get_video_metadata_local_file_skips_rate_limit(self):
+        """Test los archivos locales no esperan turno de host; las URLs sí"""
+        metadata = {'duration': 120, 'width': 1920, 'height': 1080}
+        
+        with patch('utils.ffprobe_utils._wait_for_host') as mock_wait, \
+             patch('utils.ffprobe_utils.get_metadata_with_ffprobe', return_value=metadata), \
+             patch('utils.ffprobe_utils.get_metadata_with_ytdlp', return_value=metadata):
+            get_video_metadata('/path/to/video.mp4')
+            assert mock_wait.call_count == 0
+            
+            get_video_metadata('http://example.com/video')
+            mock_wait.assert_called_once_with('http://example.com/video')
+    
+    def test_get_video_metadata_disk_cache(self, tmp_path):
+        """Test los metadatos de una URL se reutilizan entre procesos vía caché en disco"""
+        disk_cache = ScrapeCache(str(tmp_path / 'scrape_cache.sqlite'))
+        metadata = {'duration': 120, 'width': 1920, 'height': 1080}
+        
+        with patch('utils.ffprobe_utils.get_cache', return_value=disk_cache), \
+             patch('utils.ffprobe_utils._fetch_video_metadata', return_value=metadata) as mock_fetch:
+            first = get_video_metadata('http://example.com/video')
+            # Un proceso nuevo empieza sin caché en memoria
+            clear_metadata_cache()
+            second = get_video_metadata('http://example.com/video')
+        
+        assert mock_fetch.call_count == 1
+        assert second == first == metadata
+    
     def test_get_video_info_summary(self):
         """Test obtener resumen de información del video"""
         with patch('utils.ffprobe_utils.get_video_metadata') as mock_get_metadata:
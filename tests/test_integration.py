@@ -3,268 +3,371 @@ Tests de integración para VideoFinder AI Bot
 """
 
 import pytest
+import io
 import os
 import tempfile
 import json
-from unittest.mock import patch, MagicMock
+import subprocess
+import time
+from unittest.mock import patch, MagicMock, AsyncMock
 
-from orchestrator import run_job
+import orchestrator
+from orchestrator import run_job, partition_results
 from analyzer.video_analyzer import EnhancedVideoAnalyzer
 from downloader import VideoDownloader
-from scrapers.youtube_scraper import search_youtube
+import scrapers
+from scrapers import instagram_scraper, tiktok_scraper, youtube_scraper
+from scrapers.youtube_scraper import search_youtube, search_youtube_batch
 from scrapers.instagram_scraper import search_instagram
 from scrapers.tiktok_scraper import search_tiktok
+from utils.scrape_cache import ScrapeCache
+
+# Atributos de instaloader.Post que lee parse_instagram_post
+POST_FIELDS = [
+    'is_video', 'shortcode', 'caption', 'video_duration', 'video_width',
+    'video_height', 'owner_username', 'date_utc', 'url', 'likes', 'comments'
+]
+
+def _video(**overrides):
+    """Resultado de búsqueda de YouTube: vertical y de 45 s salvo lo indicado"""
+    video = {
+        'id': 'test1',
+        'title': 'Test Video 1',
+        'url': 'https://youtube.com/watch?v=test1',
+        'platform': 'youtube',
+        'duration': 45,
+        'width': 1080,
+        'height': 1920
+    }
+    video.update(overrides)
+    return video
+
+def _metadata(**overrides):
+    """Metadatos de ffprobe coherentes con _video()"""
+    metadata = {'duration': 45, 'width': 1080, 'height': 1920, 'fps': 30}
+    metadata.update(overrides)
+    return metadata
+
+def _analysis(**overrides):
+    """Resultado del analizador (aceptado, sin rostros ni texto) salvo lo indicado"""
+    analysis = {
+        'estado': 'aceptado',
+        'has_face': False,
+        'face_details': [],
+        'has_text': False,
+        'text_details': [],
+        'analysis_time_ms': 1000
+    }
+    analysis.update(overrides)
+    return analysis
+
+def _rejection(reason, **overrides):
+    """Resultado del analizador que descarta el video por `reason`"""
+    return _analysis(estado='descartado', razones=[reason], **overrides)
+
+@pytest.fixture
+def base_config():
+    """Configuración de búsqueda común a los tests del orquestador"""
+    return {
+        'keyword': 'test video',
+        'duration_range': (30, 60),
+        'filters': {'vertical': True, 'faces': True, 'text': True},
+        'platforms': ['youtube'],
+        'max_results': 5
+    }
+
+@pytest.fixture
+def mocked_pipeline(monkeypatch):
+    """
+    Simula búsqueda, metadatos, descarga y análisis del orquestador
+    
+    orchestrator importa las funciones con `from ... import`, así que se
+    sustituyen sus referencias en ese módulo (SEARCH_FN y los nombres de
+    ffprobe_utils), no en el módulo de origen. El análisis pasa por
+    analyze_batch, que aplica mock_analyze a cada ruta.
+    
+    Devuelve (mock_search, mock_metadata, mock_download, mock_analyze); la
+    descarga ya devuelve una ruta y cada test fija el resto.
+    """
+    mock_search, mock_metadata, mock_download, mock_analyze = (MagicMock() for _ in range(4))
+    mock_download.return_value = '/tmp/test_video.mp4'
+    
+    monkeypatch.setitem(orchestrator.SEARCH_FN, 'youtube', mock_search)
+    monkeypatch.setattr(orchestrator, 'get_video_metadata', mock_metadata)
+    monkeypatch.setattr(orchestrator, 'get_metadata_batch', lambda urls: {})
+    monkeypatch.setattr(VideoDownloader, 'download_temporal', mock_download)
+    monkeypatch.setattr(
+        EnhancedVideoAnalyzer, 'analyze_batch',
+        lambda self, paths, *args, **kwargs: [mock_analyze(path) for path in paths]
+    )
+    
+    return mock_search, mock_metadata, mock_download, mock_analyze
 
 class TestIntegration:
     """Tests de integración"""
     
-    def test_orchestrator_run_job_basic(self):
+    def test_orchestrator_run_job_basic(self, base_config, mocked_pipeline):
         """Test ejecución básica del orquestador"""
-        config = {
-            'keyword': 'test video',
-            'duration_range': (30, 60),
-            'filters': {'vertical': True, 'faces': True, 'text': True},
-            'platforms': ['youtube'],
-            'max_results': 5
-        }
-        
-        with patch('scrapers.youtube_scraper.search_youtube') as mock_search:
-            mock_search.return_value = [
-                {
-                    'id': 'test1',
-                    'title': 'Test Video 1',
-                    'url': 'https://youtube.com/watch?v=test1',
-                    'platform': 'youtube',
-                    'duration': 45,
-                    'width': 1080,
-                    'height': 1920
-                }
-            ]
-            
-            with patch('utils.ffprobe_utils.get_video_metadata') as mock_metadata:
-                mock_metadata.return_value = {
-                    'duration': 45,
-                    'width': 1080,
-                    'height': 1920,
-                    'fps': 30
-                }
-                
-                with patch('downloader.VideoDownloader.download_temporal') as mock_download:
-                    mock_download.return_value = '/tmp/test_video.mp4'
-                    
-                    with patch('analyzer.video_analyzer.EnhancedVideoAnalyzer.analyze_video') as mock_analyze:
-                        mock_analyze.return_value = {
-                            'has_face': False,
-                            'face_details': [],
-                            'has_text': False,
-                            'text_details': [],
-                            'analysis_time_ms': 1000
-                        }
-                        
-                        results = run_job(config)
-                        
-                        assert len(results) == 1
-                        assert results[0]['estado'] == 'aceptado'
-                        assert results[0]['titulo'] == 'Test Video 1'
+        mock_search, mock_metadata, _, mock_analyze = mocked_pipeline
+        mock_search.return_value = [_video()]
+        mock_metadata.return_value = _metadata()
+        mock_analyze.return_value = _analysis()
+        
+        results = run_job(base_config)
+        
+        assert len(results) == 1
+        assert results[0]['estado'] == 'aceptado'
+        assert results[0]['titulo'] == 'Test Video 1'
     
-    def test_orchestrator_run_job_with_rejection(self):
+    def test_orchestrator_run_job_with_rejection(self, base_config, mocked_pipeline):
         """Test ejecución con rechazo por rostros"""
-        config = {
-            'keyword': 'test video',
-            'duration_range': (30, 60),
-            'filters': {'vertical': True, 'faces': True, 'text': True},
-            'platforms': ['youtube'],
-            'max_results': 5
-        }
-        
-        with patch('scrapers.youtube_scraper.search_youtube') as mock_search:
-            mock_search.return_value = [
-                {
-                    'id': 'test1',
-                    'title': 'Test Video 1',
-                    'url': 'https://youtube.com/watch?v=test1',
-                    'platform': 'youtube',
-                    'duration': 45,
-                    'width': 1080,
-                    'height': 1920
-                }
-            ]
-            
-            with patch('utils.ffprobe_utils.get_video_metadata') as mock_metadata:
-                mock_metadata.return_value = {
-                    'duration': 45,
-                    'width': 1080,
-                    'height': 1920,
-                    'fps': 30
-                }
-                
-                with patch('downloader.VideoDownloader.download_temporal') as mock_download:
-                    mock_download.return_value = '/tmp/test_video.mp4'
-                    
-                    with patch('analyzer.video_analyzer.EnhancedVideoAnalyzer.analyze_video') as mock_analyze:
-                        mock_analyze.return_value = {
-                            'has_face': True,
-                            'face_details': [{'frame': 10, 'bbox': [100, 100, 200, 200], 'confidence': 0.8}],
-                            'has_text': False,
-                            'text_details': [],
-                            'analysis_time_ms': 1000
-                        }
-                        
-                        results = run_job(config)
-                        
-                        assert len(results) == 1
-                        assert results[0]['estado'] == 'descartado'
-                        assert 'rostro detectado' in results[0]['razones']
+        mock_search, mock_metadata, _, mock_analyze = mocked_pipeline
+        mock_search.return_value = [_video()]
+        mock_metadata.return_value = _metadata()
+        mock_analyze.return_value = _rejection(
+            'rostro detectado',
+            has_face=True,
+            face_details=[{'frame': 10, 'bbox': [100, 100, 200, 200], 'confidence': 0.8}]
+        )
+        
+        results = run_job(base_config)
+        
+        assert len(results) == 1
+        assert results[0]['estado'] == 'descartado'
+        assert 'rostro detectado' in results[0]['razones']
     
-    def test_orchestrator_run_job_with_text_rejection(self):
+    def test_orchestrator_run_job_with_text_rejection(self, base_config, mocked_pipeline):
         """Test ejecución con rechazo por texto"""
-        config = {
-            'keyword': 'test video',
-            'duration_range': (30, 60),
-            'filters': {'vertical': True, 'faces': True, 'text': True},
-            'platforms': ['youtube'],
-            'max_results': 5
-        }
-        
-        with patch('scrapers.youtube_scraper.search_youtube') as mock_search:
-            mock_search.return_value = [
-                {
-                    'id': 'test1',
-                    'title': 'Test Video 1',
-                    'url': 'https://youtube.com/watch?v=test1',
-                    'platform': 'youtube',
-                    'duration': 45,
-                    'width': 1080,
-                    'height': 1920
-                }
-            ]
-            
-            with patch('utils.ffprobe_utils.get_video_metadata') as mock_metadata:
-                mock_metadata.return_value = {
-                    'duration': 45,
-                    'width': 1080,
-                    'height': 1920,
-                    'fps': 30
-                }
-                
-                with patch('downloader.VideoDownloader.download_temporal') as mock_download:
-                    mock_download.return_value = '/tmp/test_video.mp4'
-                    
-                    with patch('analyzer.video_analyzer.EnhancedVideoAnalyzer.analyze_video') as mock_analyze:
-                        mock_analyze.return_value = {
-                            'has_face': False,
-                            'face_details': [],
-                            'has_text': True,
-                            'text_details': [{'frame': 10, 'text': 'Hello World', 'confidence': 0.8}],
-                            'analysis_time_ms': 1000
-                        }
-                        
-                        results = run_job(config)
-                        
-                        assert len(results) == 1
-                        assert results[0]['estado'] == 'descartado'
-                        assert 'texto detectado' in results[0]['razones']
+        mock_search, mock_metadata, _, mock_analyze = mocked_pipeline
+        mock_search.return_value = [_video()]
+        mock_metadata.return_value = _metadata()
+        mock_analyze.return_value = _rejection(
+            'texto detectado',
+            has_text=True,
+            text_details=[{'frame': 10, 'text': 'Hello World', 'confidence': 0.8}]
+        )
+        
+        results = run_job(base_config)
+        
+        assert len(results) == 1
+        assert results[0]['estado'] == 'descartado'
+        assert 'texto detectado' in results[0]['razones']
     
-    def test_orchestrator_run_job_metadata_filtering(self):
+    def test_orchestrator_run_job_metadata_filtering(self, base_config, mocked_pipeline):
         """Test filtrado por metadatos"""
-        config = {
-            'keyword': 'test video',
-            'duration_range': (30, 60),
-            'filters': {'vertical': True, 'faces': True, 'text': True},
-            'platforms': ['youtube'],
-            'max_results': 5
-        }
-        
-        with patch('scrapers.youtube_scraper.search_youtube') as mock_search:
-            mock_search.return_value = [
-                {
-                    'id': 'test1',
-                    'title': 'Test Video 1',
-                    'url': 'https://youtube.com/watch?v=test1',
-                    'platform': 'youtube',
-                    'duration': 45,
-                    'width': 1920,  # Horizontal
-                    'height': 1080
-                }
-            ]
-            
-            with patch('utils.ffprobe_utils.get_video_metadata') as mock_metadata:
-                mock_metadata.return_value = {
-                    'duration': 45,
-                    'width': 1920,
-                    'height': 1080,
-                    'fps': 30
-                }
-                
-                results = run_job(config)
-                
-                assert len(results) == 1
-                assert results[0]['estado'] == 'descartado'
-                assert 'orientacion horizontal' in results[0]['razones']
+        mock_search, mock_metadata, _, _ = mocked_pipeline
+        mock_search.return_value = [_video(width=1920, height=1080)]  # Horizontal
+        mock_metadata.return_value = _metadata(width=1920, height=1080)
+        
+        results = run_job(base_config)
+        
+        assert len(results) == 1
+        assert results[0]['estado'] == 'descartado'
+        assert 'orientacion horizontal' in results[0]['razones']
     
-    def test_orchestrator_run_job_duration_filtering(self):
+    def test_orchestrator_run_job_duration_filtering(self, base_config, mocked_pipeline):
         """Test filtrado por duración"""
-        config = {
-            'keyword': 'test video',
-            'duration_range': (30, 60),
-            'filters': {'vertical': True, 'faces': True, 'text': True},
-            'platforms': ['youtube'],
-            'max_results': 5
-        }
-        
-        with patch('scrapers.youtube_scraper.search_youtube') as mock_search:
-            mock_search.return_value = [
-                {
-                    'id': 'test1',
-                    'title': 'Test Video 1',
-                    'url': 'https://youtube.com/watch?v=test1',
-                    'platform': 'youtube',
-                    'duration': 120,  # Fuera de rango
-                    'width': 1080,
-                    'height': 1920
-                }
-            ]
-            
-            with patch('utils.ffprobe_utils.get_video_metadata') as mock_metadata:
-                mock_metadata.return_value = {
-                    'duration': 120,
-                    'width': 1080,
-                    'height': 1920,
-                    'fps': 30
-                }
-                
-                results = run_job(config)
-                
-                assert len(results) == 1
-                assert results[0]['estado'] == 'descartado'
-                assert 'duracion fuera de rango' in results[0]['razones']
+        mock_search, mock_metadata, _, _ = mocked_pipeline
+        mock_search.return_value = [_video(duration=120)]  # Fuera de rango
+        mock_metadata.return_value = _metadata(duration=120)
+        
+        results = run_job(base_config)
+        
+        assert len(results) == 1
+        assert results[0]['estado'] == 'descartado'
+        assert 'duracion fuera de rango' in results[0]['razones']
+    
+    def test_orchestrator_run_job_malformed_candidate(self, base_config, mocked_pipeline):
+        """Test un candidato con metadatos no numéricos se descarta sin abortar el trabajo"""
+        mock_search, mock_metadata, _, mock_analyze = mocked_pipeline
+        mock_search.return_value = [
+            _video(),
+            _video(id='bad', url='https://youtube.com/watch?v=bad', duration='NA')
+        ]
+        # La sonda tampoco resuelve el candidato malo: conserva duration='NA'
+        mock_metadata.side_effect = lambda url, fields=None: {} if url.endswith('=bad') else _metadata()
+        mock_analyze.return_value = _analysis()
+        
+        results = run_job(base_config)
+        
+        by_id = {r['id']: r for r in results}
+        assert by_id['test1']['estado'] == 'aceptado'
+        assert by_id['bad']['estado'] == 'descartado'
+        assert by_id['bad']['razones'][0].startswith('error:')
+        assert by_id['bad']['duracion_sec'] == 0
+    
+    def test_orchestrator_run_job_repeated_uses_cache(self, base_config, mocked_pipeline,
+                                                      monkeypatch, tmp_path):
+        """Test repetir un trabajo no vuelve a descargar ni analizar los mismos videos"""
+        mock_search, mock_metadata, mock_download, mock_analyze = mocked_pipeline
+        mock_search.return_value = [_video()]
+        mock_metadata.return_value = _metadata()
+        mock_analyze.return_value = _analysis()
+        monkeypatch.setattr(orchestrator, 'ANALYSIS_CACHE_FILE', str(tmp_path / 'analysis_cache.sqlite'))
+        
+        first = run_job(base_config)
+        second = run_job(base_config)
+        
+        assert mock_download.call_count == 1
+        assert mock_analyze.call_count == 1
+        assert [r['estado'] for r in second] == [r['estado'] for r in first] == ['aceptado']
+    
+    def test_orchestrator_run_job_streams_jsonl(self, base_config, mocked_pipeline,
+                                                monkeypatch, tmp_path):
+        """Test cada resultado se escribe como una línea de results.jsonl"""
+        mock_search, mock_metadata, mock_download, mock_analyze = mocked_pipeline
+        mock_search.return_value = [_video(), _video(id='test2', url='https://youtube.com/watch?v=test2')]
+        mock_metadata.return_value = _metadata()
+        mock_analyze.return_value = _analysis()
+        jsonl_path = tmp_path / 'results.jsonl'
+        monkeypatch.setattr(orchestrator, 'OUTPUT_JSONL', str(jsonl_path))
+        
+        results = run_job(base_config)
+        
+        lines = [json.loads(line) for line in jsonl_path.read_text(encoding='utf-8').splitlines()]
+        assert sorted(r['id'] for r in lines) == sorted(r['id'] for r in results)
+        assert all(r['estado'] == 'aceptado' for r in lines)
+    
+    def test_orchestrator_run_job_concurrent_downloads(self, base_config, mocked_pipeline):
+        """Test las descargas de varios videos se solapan en lugar de ir en serie"""
+        mock_search, mock_metadata, mock_download, mock_analyze = mocked_pipeline
+        videos = [_video(id=f'test{i}', url=f'https://youtube.com/watch?v=test{i}') for i in range(4)]
+        mock_search.return_value = videos
+        mock_metadata.return_value = _metadata()
+        mock_analyze.return_value = _analysis()
+        base_config['max_workers'] = len(videos)
+        
+        delay = 0.2
+        spans = []
+        
+        def slow_download(url):
+            start = time.monotonic()
+            time.sleep(delay)
+            spans.append((start, time.monotonic()))
+            return f"/tmp/{url.rsplit('=', 1)[-1]}.mp4"
+        
+        mock_download.side_effect = slow_download
+        
+        results = run_job(base_config)
+        
+        assert len(results) == len(videos)
+        assert all(r['estado'] == 'aceptado' for r in results)
+        # En serie tardarían len(videos) * delay; en paralelo, poco más de uno
+        elapsed = max(end for _, end in spans) - min(start for start, _ in spans)
+        assert elapsed < len(videos) * delay / 2
+    
+    def test_orchestrator_run_job_streams_progress(self, base_config, mocked_pipeline):
+        """Test el primer resultado se notifica antes de terminar el último análisis"""
+        mock_search, mock_metadata, mock_download, mock_analyze = mocked_pipeline
+        mock_search.return_value = [
+            _video(),
+            _video(id='test2', title='Test Video 2', url='https://youtube.com/watch?v=test2')
+        ]
+        mock_metadata.return_value = _metadata()
+        
+        # El segundo video tarda más en descargarse
+        def staggered_download(url):
+            time.sleep(0.3 if 'test2' in url else 0)
+            return f"/tmp/{url.rsplit('=', 1)[-1]}.mp4"
+        
+        analyzed = []
+        
+        def timed_analyze(path):
+            analyzed.append(time.monotonic())
+            return _analysis()
+        
+        mock_download.side_effect = staggered_download
+        mock_analyze.side_effect = timed_analyze
+        
+        progress = []
+        run_job(base_config, progress_cb=lambda done, total: progress.append((done, time.monotonic())))
+        
+        assert len(analyzed) == 2
+        first_notified = min(t for done, t in progress if done >= 1)
+        assert first_notified < analyzed[-1]
+    
+    def test_classify_candidates_mixed_values(self):
+        """Test valores ausentes, numéricos en texto y no numéricos en una misma pasada"""
+        candidates = [
+            _video(),
+            _video(duration=None, width=None, height=None),
+            _video(duration='45', width='1080', height='1920'),
+            _video(duration='NA'),
+            _video(duration='PT15S', width='NA'),
+            _video(width=1920, height=1080),
+            _video(duration=5)
+        ]
+        
+        reasons = orchestrator.classify_candidates(candidates, True, (30, 60))
+        
+        assert reasons[:3] == [None, None, None]
+        assert reasons[3] == "error: metadatos no numéricos (duration='NA')"
+        assert reasons[4] == "error: metadatos no numéricos (duration='PT15S', width='NA')"
+        assert reasons[5:] == ["orientacion horizontal", "duracion fuera de rango"]
     
-    def test_enhanced_video_analyzer_analyze_video(self):
+    def test_probe_candidates_concurrent(self, monkeypatch):
+        """Test las sondas individuales de metadatos se lanzan en paralelo"""
+        monkeypatch.setattr(orchestrator, '_probe_cache', {})
+        monkeypatch.setattr(orchestrator, 'get_metadata_batch', lambda urls: {})
+        
+        delay = 0.2
+        requested = []
+        
+        def slow_probe(url, fields=None):
+            requested.append(fields)
+            time.sleep(delay)
+            return {'duration': 45, 'width': 1080, 'height': 1920}
+        
+        monkeypatch.setattr(orchestrator, 'get_video_metadata', slow_probe)
+        candidates = [
+            _video(id=f'probe{i}', url=f'https://youtube.com/watch?v=probe{i}', duration=0, width=0, height=0)
+            for i in range(4)
+        ]
+        
+        start = time.monotonic()
+        probed = orchestrator.probe_candidates(candidates)
+        elapsed = time.monotonic() - start
+        
+        assert [c['duration'] for c in probed] == [45] * 4
+        assert elapsed < len(candidates) * delay / 2
+        # La sonda pide solo los campos del pre-filtro (ruta rápida con token)
+        assert requested == [orchestrator._PROBE_FIELDS] * 4
+    
+    def test_enhanced_video_analyzer_analyze_video(self, video_capture):
         """Test análisis de video"""
         analyzer = EnhancedVideoAnalyzer({})
+        video_capture.read.side_effect = [(True, None), (False, None)]
         
         with patch('analyzer.face_detector.FaceDetector.detect_faces_on_video') as mock_faces:
             with patch('analyzer.text_detector.TextDetector.detect_text_on_video') as mock_text:
                 mock_faces.return_value = []
                 mock_text.return_value = []
                 
-                with patch('cv2.VideoCapture') as mock_cap:
-                    mock_cap_instance = MagicMock()
-                    mock_cap_instance.isOpened.return_value = True
-                    mock_cap_instance.get.side_effect = lambda prop: {
-                        5: 30,  # FPS
-                        7: 900,  # FRAME_COUNT
-                        3: 640,  # FRAME_WIDTH
-                        4: 480   # FRAME_HEIGHT
-                    }.get(prop, 0)
-                    mock_cap_instance.read.side_effect = [(True, None), (False, None)]
-                    mock_cap.return_value = mock_cap_instance
-                    
-                    result = analyzer.analyze_video('/tmp/test.mp4')
-                    
-                    assert 'has_face' in result
-                    assert 'has_text' in result
-                    assert 'analysis_time_ms' in result
+                result = analyzer.analyze_video('/tmp/test.mp4')
+                
+                assert 'has_face' in result
+                assert 'has_text' in result
+                assert 'analysis_time_ms' in result
+    
+    def test_enhanced_video_analyzer_analyze_batch(self):
+        """Test análisis por lotes con detección de rostros agrupada"""
+        analyzer = EnhancedVideoAnalyzer({})
+        analyzer.analysis_config = {**analyzer.analysis_config, 'enable_sliding_window': False}
+        
+        with patch.object(analyzer.face_detector, 'detect_faces_on_videos') as mock_batch:
+            with patch.object(analyzer, 'analyze_video_optimized') as mock_single:
+                mock_batch.return_value = [
+                    [{'bbox': [10, 10, 50, 50], 'confidence': 0.9, 'class': 'face'}],
+                    []
+                ]
+                mock_single.side_effect = lambda path, filters, checks, precomputed=None: {
+                    'estado': 'descartado' if precomputed['_analyze_faces']['has_face'] else 'aceptado'
+                }
+                
+                results = analyzer.analyze_batch(['a.mp4', 'b.mp4'], {'faces': True, 'text': False})
+                
+                mock_batch.assert_called_once_with(['a.mp4', 'b.mp4'])
+                assert [r['estado'] for r in results] == ['descartado', 'aceptado']
     
     def test_video_downloader_download_temporal(self):
         """Test descarga temporal de video"""
@@ -287,152 +390,188 @@ class TestIntegration:
                         
                         assert result == '/tmp/test_video.mp4'
     
-    def test_scrapers_integration(self):
-        """Test integración de scrapers"""
-        # Test YouTube scraper
-        with patch('subprocess.run') as mock_run:
-            mock_result = MagicMock()
-            mock_result.returncode = 0
-            mock_result.stdout = json.dumps({
-                'id': 'test1',
-                'title': 'Test Video',
-                'webpage_url': 'https://youtube.com/watch?v=test1',
-                'duration': 45,
-                'width': 1080,
-                'height': 1920
-            })
-            mock_run.return_value = mock_result
+    def test_search_youtube_library(self):
+        """Test búsqueda de YouTube con yt-dlp como librería"""
+        with patch('scrapers.youtube_scraper.YoutubeDL') as mock_ydl:
+            mock_ydl.return_value.extract_info.return_value = {
+                'entries': [{'id': 'test1', 'url': 'https://youtube.com/watch?v=test1'}]
+            }
             
             videos = search_youtube('test', 5)
-            assert len(videos) == 1
-            assert videos[0]['platform'] == 'youtube'
-        
-        # Test Instagram scraper
-        with patch('instaloader.Instaloader') as mock_loader:
-            mock_instance = MagicMock()
-            mock_loader.return_value = mock_instance
-            
-            with patch('instaloader.Hashtag.from_name') as mock_hashtag:
-                mock_hashtag_obj = MagicMock()
-                mock_hashtag.return_value = mock_hashtag_obj
-                
-                mock_post = MagicMock()
-                mock_post.is_video = True
-                mock_post.shortcode = 'test123'
-                mock_post.caption = 'Test caption'
-                mock_post.video_duration = 45
-                mock_post.video_width = 1080
-                mock_post.video_height = 1920
-                mock_post.owner_username = 'testuser'
-                mock_post.date_utc.isoformat.return_value = '2024-01-01T00:00:00Z'
-                mock_post.url = 'https://example.com/video.mp4'
-                
-                mock_hashtag_obj.get_posts.return_value = [mock_post]
-                
-                videos = search_instagram('test', 5)
-                assert len(videos) == 1
-                assert videos[0]['platform'] == 'instagram'
-        
-        # Test TikTok scraper
-        with patch('playwright.sync_api.sync_playwright') as mock_playwright:
-            mock_p = MagicMock()
-            mock_playwright.return_value.__enter__.return_value = mock_p
-            
-            mock_browser = MagicMock()
-            mock_p.chromium.launch.return_value = mock_browser
-            
-            mock_page = MagicMock()
-            mock_browser.new_page.return_value = mock_page
-            
-            mock_elem = MagicMock()
-            mock_elem.query_selector.return_value = MagicMock()
-            mock_elem.get_attribute.return_value = 'https://tiktok.com/video/123'
-            mock_elem.inner_text.return_value = 'Test video'
-            
-            mock_page.query_selector_all.return_value = [mock_elem]
             
+            assert [v['id'] for v in videos] == ['test1']
+            mock_ydl.return_value.extract_info.assert_called_once_with('ytsearch5:test', download=False)
+    
+    def test_search_youtube_truncated_not_cached(self, monkeypatch, tmp_path):
+        """Test una búsqueda cortada por un error se devuelve pero no se cachea"""
+        def truncated_fetch(keyword, max_results):
+            yield {'id': 'test1', 'url': 'https://youtube.com/watch?v=test1'}
+            raise subprocess.TimeoutExpired('yt-dlp', 30)
+        
+        fetch = MagicMock(side_effect=truncated_fetch)
+        monkeypatch.setattr(youtube_scraper, '_fetch_raw', fetch)
+        disk_cache = ScrapeCache(str(tmp_path / 'scrape_cache.sqlite'))
+        
+        with patch('utils.scrape_cache.get_cache', return_value=disk_cache):
+            first = search_youtube('test', 5)
+            second = search_youtube('test', 5)
+        
+        assert [v['id'] for v in first] == ['test1']
+        assert [v['id'] for v in second] == ['test1']
+        assert fetch.call_count == 2  # El resultado parcial no se recordó
+    
+    def test_scrapers_integration(self, monkeypatch):
+        """Test integración de scrapers"""
+        # Test YouTube scraper (entradas de yt-dlp ya parseadas)
+        monkeypatch.setattr(youtube_scraper, '_fetch_raw', lambda keyword, max_results: iter([{
+            'id': 'test1',
+            'title': 'Test Video',
+            'url': 'https://youtube.com/watch?v=test1',
+            'duration': 45,
+            'width': 1080,
+            'height': 1920
+        }]))
+        
+        videos = search_youtube('test', 5)
+        assert len(videos) == 1
+        assert videos[0]['platform'] == 'youtube'
+        assert videos[0]['url'] == 'https://youtube.com/watch?v=test1'
+        
+        # Test Instagram scraper (posts de instaloader ya obtenidos)
+        mock_post = MagicMock(
+            spec_set=POST_FIELDS,
+            is_video=True,
+            shortcode='test123',
+            caption='Test caption',
+            video_duration=45,
+            video_width=1080,
+            video_height=1920,
+            owner_username='testuser',
+            url='https://example.com/video.mp4',
+            likes=0,
+            comments=0,
+            **{'date_utc.isoformat.return_value': '2024-01-01T00:00:00Z'}
+        )
+        monkeypatch.setattr(instagram_scraper, '_fetch_posts', lambda hashtag: iter([mock_post]))
+        
+        videos = search_instagram('test', 5)
+        assert len(videos) == 1
+        assert videos[0]['platform'] == 'instagram'
+        
+        # Test TikTok scraper (playwright asíncrono con pool de navegadores)
+        mock_child = MagicMock(
+            get_attribute=AsyncMock(return_value='https://tiktok.com/video/123'),
+            inner_text=AsyncMock(return_value='Test video')
+        )
+        mock_elem = MagicMock(query_selector=AsyncMock(return_value=mock_child))
+        mock_page = AsyncMock(**{'query_selector_all.return_value': [mock_elem]})
+        mock_instance = MagicMock(**{'context.new_page': AsyncMock(return_value=mock_page)})
+        mock_pool = MagicMock(**{'acquire.return_value.__aenter__.return_value': mock_instance})
+        
+        with patch('scrapers.tiktok_scraper.get_pool', return_value=mock_pool):
             videos = search_tiktok('test', 5)
             assert len(videos) == 1
             assert videos[0]['platform'] == 'tiktok'
+            assert videos[0]['url'] == 'https://tiktok.com/video/123'
     
-    def test_end_to_end_workflow(self):
-        """Test flujo completo end-to-end"""
-        config = {
-            'keyword': 'test video',
-            'duration_range': (30, 60),
-            'filters': {'vertical': True, 'faces': True, 'text': True},
-            'platforms': ['youtube'],
-            'max_results': 3
-        }
-        
-        # Mock de todos los componentes
-        with patch('scrapers.youtube_scraper.search_youtube') as mock_search:
-            mock_search.return_value = [
-                {
-                    'id': 'test1',
-                    'title': 'Test Video 1',
-                    'url': 'https://youtube.com/watch?v=test1',
-                    'platform': 'youtube',
-                    'duration': 45,
-                    'width': 1080,
-                    'height': 1920
-                },
-                {
-                    'id': 'test2',
-                    'title': 'Test Video 2',
-                    'url': 'https://youtube.com/watch?v=test2',
-                    'platform': 'youtube',
-                    'duration': 45,
-                    'width': 1920,  # Horizontal
-                    'height': 1080
-                }
-            ]
+    def test_scrapers_share_host_buckets(self, monkeypatch):
+        """Test cada petición de los scrapers toma turno en la cubeta de su host"""
+        buckets = {}
+        
+        def get_bucket(host):
+            return buckets.setdefault(host, MagicMock(**{'wait.return_value': True}))
+        
+        monkeypatch.setattr(instagram_scraper, 'get_bucket', get_bucket)
+        monkeypatch.setattr(tiktok_scraper, 'get_bucket', get_bucket)
+        
+        # Instagram: un turno por post pedido a instaloader (más el del final)
+        posts = list(instagram_scraper._prefetch_posts(iter(['a', 'b', 'c'])))
+        assert posts == ['a', 'b', 'c']
+        assert buckets['instagram.com'].wait.call_count == 4
+        
+        # TikTok: la página de metadatos de un video
+        mock_session = MagicMock(**{'get.return_value.text': '<html></html>'})
+        monkeypatch.setattr(tiktok_scraper, '_get_session', lambda: mock_session)
+        tiktok_scraper.get_tiktok_video_metadata('https://www.tiktok.com/@u/video/1')
+        buckets['tiktok.com'].wait.assert_called_once()
+        mock_session.get.assert_called_once()
+    
+    def test_search_all_overlaps_platforms(self, monkeypatch):
+        """Test search_all devuelve YouTube y luego TikTok, con las búsquedas solapadas"""
+        delay = 0.2
+        spans = {}
+        
+        def slow_search(platform):
+            def search(keyword, max_results):
+                start = time.monotonic()
+                time.sleep(delay)
+                spans[platform] = (start, time.monotonic())
+                return [_video(id=f'{platform}{i}', platform=platform) for i in range(max_results)]
+            return search
+        
+        monkeypatch.setattr(youtube_scraper, 'search_youtube', slow_search('youtube'))
+        monkeypatch.setattr(tiktok_scraper, 'search_tiktok', slow_search('tiktok'))
+        
+        results = scrapers.search_all('test video', max_results=2)
+        
+        assert [r['id'] for r in results] == ['youtube0', 'youtube1', 'tiktok0', 'tiktok1']
+        # Cada búsqueda empieza antes de que termine la otra
+        (yt_start, yt_end), (tt_start, tt_end) = spans['youtube'], spans['tiktok']
+        assert yt_start < tt_end and tt_start < yt_end
+    
+    def test_search_youtube_batch(self):
+        """Test varias búsquedas de YouTube en un solo proceso de yt-dlp (sin la librería)"""
+        with patch('scrapers.youtube_scraper.YoutubeDL', None), patch('subprocess.Popen') as mock_popen:
+            mock_proc = MagicMock()
+            mock_proc.poll.return_value = 0
+            mock_proc.wait.return_value = 0
+            mock_proc.stdout = io.BytesIO("\n".join(
+                json.dumps({
+                    'id': f'{keyword}{i}',
+                    'webpage_url': f'https://youtube.com/watch?v={keyword}{i}',
+                    'playlist_id': keyword,
+                    'playlist_index': i + 1
+                })
+                for keyword in ('gatos', 'perros') for i in range(2)
+            ).encode('utf-8'))
+            mock_popen.return_value = mock_proc
             
-            with patch('utils.ffprobe_utils.get_video_metadata') as mock_metadata:
-                def metadata_side_effect(url):
-                    if 'test1' in url:
-                        return {
-                            'duration': 45,
-                            'width': 1080,
-                            'height': 1920,
-                            'fps': 30
-                        }
-                    elif 'test2' in url:
-                        return {
-                            'duration': 45,
-                            'width': 1920,
-                            'height': 1080,
-                            'fps': 30
-                        }
-                    return None
-                
-                mock_metadata.side_effect = metadata_side_effect
-                
-                with patch('downloader.VideoDownloader.download_temporal') as mock_download:
-                    mock_download.return_value = '/tmp/test_video.mp4'
-                    
-                    with patch('analyzer.video_analyzer.EnhancedVideoAnalyzer.analyze_video') as mock_analyze:
-                        mock_analyze.return_value = {
-                            'has_face': False,
-                            'face_details': [],
-                            'has_text': False,
-                            'text_details': [],
-                            'analysis_time_ms': 1000
-                        }
-                        
-                        results = run_job(config)
-                        
-                        # Debe haber 2 resultados: 1 aceptado, 1 descartado
-                        assert len(results) == 2
-                        
-                        accepted = [r for r in results if r['estado'] == 'aceptado']
-                        discarded = [r for r in results if r['estado'] == 'descartado']
-                        
-                        assert len(accepted) == 1
-                        assert len(discarded) == 1
-                        
-                        assert accepted[0]['titulo'] == 'Test Video 1'
-                        assert 'orientacion horizontal' in discarded[0]['razones']
+            grouped = search_youtube_batch(['gatos', 'loros', 'perros'], 2)
+            
+            assert mock_popen.call_count == 1
+            assert [[v['id'] for v in videos] for videos in grouped] == [
+                ['gatos0', 'gatos1'], [], ['perros0', 'perros1']
+            ]
+    
+    def test_end_to_end_workflow(self, base_config, mocked_pipeline):
+        """Test flujo completo end-to-end"""
+        mock_search, mock_metadata, _, mock_analyze = mocked_pipeline
+        base_config['max_results'] = 3
+        
+        mock_search.return_value = [
+            _video(),
+            _video(id='test2', title='Test Video 2', url='https://youtube.com/watch?v=test2',
+                   width=1920, height=1080)  # Horizontal
+        ]
+        mock_metadata.side_effect = lambda url, fields=None: (
+            _metadata() if 'test1' in url else
+            _metadata(width=1920, height=1080) if 'test2' in url else None
+        )
+        mock_analyze.return_value = _analysis()
+        
+        results = run_job(base_config)
+        
+        # Debe haber 2 resultados: 1 aceptado, 1 descartado
+        assert len(results) == 2
+        
+        accepted, discarded, reasons = partition_results(results)
+        
+        assert len(accepted) == 1
+        assert len(discarded) == 1
+        
+        assert accepted[0]['titulo'] == 'Test Video 1'
+        assert 'orientacion horizontal' in discarded[0]['razones']
+        assert reasons == {'orientacion horizontal': 1}
 
 if __name__ == '__main__':
     pytest.main([__file__])
@@ -0,0 +1,69 @@
+"""
+Tests de entorno para VideoFinder AI Bot (imports, GPU y yt-dlp)
+"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+# Versión de yt-dlp de la última ejecución (caché de pytest), válida mientras
+# el ejecutable no cambie
+YTDLP_VERSION_KEY = "videofinder/yt_dlp_version"
+
+# `yt-dlp --version` responde en menos de un segundo; si tarda más está colgado
+YTDLP_PROBE_TIMEOUT = 2
+
+def test_imports():
+    """Prueba que todos los imports funcionen"""
+    from config import validate_config, USE_GPU
+    from analyzer.video_analyzer import EnhancedVideoAnalyzer
+    from analyzer.face_detector import FaceDetector
+    from analyzer.text_detector import TextDetector
+    from downloader import VideoDownloader
+    from orchestrator import run_job
+
+@pytest.mark.serial
+def test_gpu_config():
+    """Prueba la configuración de GPU"""
+    from config import USE_GPU
+    
+    if not USE_GPU:
+        pytest.skip("GPU deshabilitado en configuración, se usa CPU")
+    
+    torch = pytest.importorskip("torch", reason="PyTorch no instalado")
+    if not torch.cuda.is_available():
+        pytest.skip("CUDA no disponible")
+    
+    assert torch.cuda.get_device_name(0)
+
+def test_ytdlp(cache):
+    """Prueba yt-dlp"""
+    # Con la librería instalada basta su versión (sin arrancar otro intérprete)
+    try:
+        from yt_dlp.version import __version__
+        assert __version__
+        return
+    except ImportError:
+        pass
+    
+    path = shutil.which('yt-dlp')
+    assert path is not None, "yt-dlp no encontrado en PATH"
+    
+    # Si el ejecutable no cambió desde la última vez, no hace falta lanzarlo
+    key = [path, os.stat(path).st_mtime_ns]
+    if cache.get(YTDLP_VERSION_KEY, {}).get('key') == key:
+        return
+    
+    try:
+        result = subprocess.run(['yt-dlp', '--version'],
+                                capture_output=True, text=True, timeout=YTDLP_PROBE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        pytest.fail(f"yt-dlp --version no respondió en {YTDLP_PROBE_TIMEOUT}s")
+    assert result.returncode == 0, "yt-dlp no funciona correctamente"
+    
+    cache.set(YTDLP_VERSION_KEY, {'key': key, 'version': result.stdout.strip()})
+
+if __name__ == '__main__':
+    pytest.main([__file__])
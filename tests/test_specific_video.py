@@ -0,0 +1,54 @@
+"""
+Test del filtro de texto con un video específico (descarga real)
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Short de YouTube usado para probar el filtro de texto
+TEST_URL = "https://www.youtube.com/shorts/qYxxgkSvwto"
+
+@pytest.fixture
+def downloaded_video(downloader, request):
+    """
+    Descarga TEST_URL mientras se inicializa el analizador
+    
+    El analizador se pide aquí (y no en la firma del test) porque pytest crea
+    los fixtures de sesión antes que los de función: así la descarga se
+    solapa con la carga de los modelos en lugar de esperar a que termine.
+    """
+    from config import validate_config
+    
+    assert validate_config()
+    
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(downloader.download_temporal, TEST_URL)
+        request.getfixturevalue('analyzer')
+        temp_path = future.result()
+    
+    yield temp_path
+    
+    # Limpiar archivo temporal
+    if temp_path:
+        downloader.remove(temp_path)
+
+@pytest.mark.serial
+@pytest.mark.skipif(os.getenv("PYTEST_OFFLINE") == "1", reason="Sin red (PYTEST_OFFLINE=1)")
+def test_specific_video(downloaded_video, request):
+    """Prueba el analizador con un video específico"""
+    assert downloaded_video, "No se pudo descargar el video"
+    
+    # Ya creado por downloaded_video (pedirlo en la firma anularía el solape)
+    analyzer = request.getfixturevalue('analyzer')
+    analysis = analyzer.analyze_video(downloaded_video)
+    
+    assert 'error' not in analysis, analysis.get('error')
+    
+    for i, text in enumerate(analysis['text_details'], 1):
+        print(f"   {i}) Texto: '{text.get('text', 'N/A')}' "
+              f"(confianza {text.get('confidence', 'N/A')}, método {text.get('method', 'N/A')})")
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-s'])
@@ -0,0 +1,41 @@
+"""
+Tests para la medición de etapas del pipeline
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.stage_stats import StageStats, track, timed
+
+class TestStageStats:
+    """Tests para StageStats"""
+    
+    def test_concurrent_stage_reports_parallelism(self):
+        """Test tramos solapados en hilos dan una concurrencia media > 1"""
+        stats = StageStats()
+        sleep = timed(stats, 'descarga', time.sleep)
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(sleep, [0.1] * 4))
+        
+        report = stats.report()['descarga']
+        assert report['calls'] == 4
+        assert report['busy_s'] >= 0.4
+        assert report['avg_busy'] > 2
+    
+    def test_serial_stage_reports_one_thread(self):
+        """Test tramos en serie dan una concurrencia media de ~1"""
+        stats = StageStats()
+        for _ in range(3):
+            with stats.track('análisis'):
+                time.sleep(0.02)
+        
+        report = stats.report()
+        assert list(report) == ['análisis']
+        assert 0.9 <= report['análisis']['avg_busy'] <= 1.0
+    
+    def test_without_stats(self):
+        """Test sin acumulador los helpers no miden nada"""
+        with track(None, 'búsqueda'):
+            pass
+        assert timed(None, 'búsqueda', len) is len
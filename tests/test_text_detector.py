@@ -2,12 +2,44 @@
 Tests para detector de texto
 """
 
+import sys
+import time
+
 import pytest
 import numpy as np
 from unittest.mock import patch, MagicMock
 
 from analyzer.text_detector import TextDetector
 
+@pytest.fixture(scope="module", autouse=True)
+def stub_easyocr():
+    """
+    Sustituye el módulo easyocr por un MagicMock durante este módulo
+    
+    Los tests simulan el lector, así que no hace falta importar torch ni
+    descargar los modelos. La caché de lectores se aparta y se restaura al
+    terminar: los demás módulos no reciben el lector simulado.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, 'easyocr', MagicMock())
+        mp.setattr(TextDetector, '_reader_cache', {})
+        yield
+
+def _remove_duplicates_reference(detections):
+    """Versión escalar (par a par) de _remove_duplicate_detections"""
+    unique = []
+    for detection in detections:
+        x1, y1, w1, h1 = detection['bbox']
+        for kept in unique:
+            x2, y2, w2, h2 = kept['bbox']
+            x_overlap = max(0, min(x1 + w1, x2 + w2) - max(x1, x2))
+            y_overlap = max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
+            if x_overlap * y_overlap > 0.5 * min(w1 * h1, w2 * h2):
+                break
+        else:
+            unique.append(detection)
+    return unique
+
 class TestTextDetector:
     """Tests para detector de texto"""
     
@@ -29,12 +61,11 @@ class TestTextDetector:
         assert 'confidence_threshold' in info
         assert 'min_text_length' in info
     
-    def test_preprocess_frame(self):
+    def test_preprocess_frame(self, rand_frame):
         """Test preprocesamiento de frame"""
         detector = TextDetector(use_easyocr=False)
         
-        # Crear frame de prueba
-        frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        frame = rand_frame
         
         processed = detector.preprocess_frame(frame)
         
@@ -42,12 +73,11 @@ class TestTextDetector:
         assert processed.shape != frame.shape or not np.array_equal(processed, frame)
         assert len(processed.shape) == 2  # Debe ser escala de grises
     
-    def test_detect_text_with_tesseract_no_text(self):
+    def test_detect_text_with_tesseract_no_text(self, black_frame):
         """Test detección con Tesseract sin texto"""
         detector = TextDetector(use_easyocr=False)
         
-        # Crear frame sin texto (imagen negra)
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        frame = black_frame  # Sin texto
         
         with patch('pytesseract.image_to_data') as mock_tesseract:
             mock_tesseract.return_value = {
@@ -63,12 +93,11 @@ class TestTextDetector:
             detections = detector.detect_text_with_tesseract(frame)
             assert detections == []
     
-    def test_detect_text_with_tesseract_with_text(self):
+    def test_detect_text_with_tesseract_with_text(self, rand_frame):
         """Test detección con Tesseract con texto"""
         detector = TextDetector(use_easyocr=False)
         
-        # Crear frame de prueba
-        frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        frame = rand_frame
         
         with patch('pytesseract.image_to_data') as mock_tesseract:
             mock_tesseract.return_value = {
@@ -88,12 +117,36 @@ class TestTextDetector:
             assert detections[0]['method'] == 'tesseract'
             assert detections[0]['confidence'] == 0.8
     
-    def test_detect_text_with_easyocr_no_text(self):
+    def test_detect_text_with_tesseract_large_output(self, rand_frame):
+        """Test miles de cajas de Tesseract se filtran sin un bucle Python por caja"""
+        detector = TextDetector(use_easyocr=False)
+        
+        n = 5000
+        # Una de cada diez cajas tiene texto con confianza suficiente
+        data = {
+            'level': [5] * n,
+            'conf': [80 if i % 10 == 0 else -1 for i in range(n)],
+            'text': ['Hello' if i % 10 == 0 else '' for i in range(n)],
+            'left': list(range(n)),
+            'top': [10] * n,
+            'width': [20] * n,
+            'height': [8] * n
+        }
+        
+        with patch('pytesseract.image_to_data', return_value=data) as mock_data:
+            with patch.object(detector, 'preprocess_frame', side_effect=lambda frame: frame):
+                detections = detector.detect_text_with_tesseract(rand_frame)
+        
+        mock_data.assert_called_once()
+        assert len(detections) == n // 10
+        assert detections[1]['bbox'] == [10, 10, 20, 8]
+        assert detections[1]['confidence'] == 0.8
+    
+    def test_detect_text_with_easyocr_no_text(self, black_frame):
         """Test detección con EasyOCR sin texto"""
         detector = TextDetector(use_easyocr=True)
         
-        # Crear frame sin texto
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        frame = black_frame  # Sin texto
         
         with patch.object(detector, 'easyocr_reader') as mock_reader:
             mock_reader.readtext.return_value = []
@@ -101,12 +154,11 @@ class TestTextDetector:
             detections = detector.detect_text_with_easyocr(frame)
             assert detections == []
     
-    def test_detect_text_with_easyocr_with_text(self):
+    def test_detect_text_with_easyocr_with_text(self, rand_frame):
         """Test detección con EasyOCR con texto"""
         detector = TextDetector(use_easyocr=True)
         
-        # Crear frame de prueba
-        frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        frame = rand_frame
         
         with patch.object(detector, 'easyocr_reader') as mock_reader:
             mock_reader.readtext.return_value = [
@@ -121,12 +173,11 @@ class TestTextDetector:
             assert detections[0]['confidence'] == 0.9
             assert detections[0]['bbox'] == [100, 100, 200, 50]
     
-    def test_detect_text_on_frame_combined(self):
+    def test_detect_text_on_frame_combined(self, rand_frame):
         """Test detección combinada en frame"""
         detector = TextDetector(use_easyocr=True)
         
-        # Crear frame de prueba
-        frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        frame = rand_frame
         
         with patch.object(detector, 'detect_text_with_tesseract') as mock_tesseract:
             with patch.object(detector, 'detect_text_with_easyocr') as mock_easyocr:
@@ -182,6 +233,44 @@ class TestTextDetector:
         assert any(d['text'] == 'Hello' for d in unique)
         assert any(d['text'] == 'World' for d in unique)
     
+    def test_remove_duplicate_detections_matches_reference(self):
+        """Test el cálculo vectorizado coincide con el par a par en muchas cajas"""
+        detector = TextDetector(use_easyocr=False)
+        rng = np.random.default_rng(0)
+        
+        # 500 cajas en un área reducida: muchas se superponen
+        xy = rng.integers(0, 400, (500, 2))
+        wh = rng.integers(1, 80, (500, 2))
+        detections = [
+            {'text': str(i), 'bbox': [int(x), int(y), int(w), int(h)]}
+            for i, (x, y, w, h) in enumerate(np.hstack([xy, wh]))
+        ]
+        
+        unique = detector._remove_duplicate_detections(detections)
+        
+        assert unique == _remove_duplicates_reference(detections)
+        assert 0 < len(unique) < len(detections)
+    
+    def test_remove_duplicate_detections_realistic_count(self):
+        """Test ~20k detecciones (lo que dan las capas de contornos en un frame real)"""
+        detector = TextDetector(use_easyocr=False)
+        rng = np.random.default_rng(0)
+        
+        # 2000 cajas de 10x6 en una rejilla de 16 px que no se tocan, y
+        # después nueve copias desplazadas hasta 2 px de cada una
+        gx, gy = np.meshgrid(np.arange(50) * 16, np.arange(40) * 16)
+        base = np.column_stack([gx.ravel(), gy.ravel()])
+        jittered = [base + rng.integers(-2, 3, base.shape) for _ in range(9)]
+        detections = [
+            {'text': str(i), 'bbox': [int(x), int(y), 10, 6]}
+            for i, (x, y) in enumerate(np.vstack([base] + jittered))
+        ]
+        
+        unique = detector._remove_duplicate_detections(detections)
+        
+        assert len(detections) == 20000
+        assert unique == detections[:len(base)]
+        
     def test_calculate_sample_rate(self):
         """Test cálculo de tasa de muestreo"""
         detector = TextDetector(use_easyocr=False)
@@ -204,25 +293,13 @@ class TestTextDetector:
         rate = detector._calculate_sample_rate(400, sample_strategy, 30)
         assert rate == 60  # 30 fps * 2.0
     
-    @patch('cv2.VideoCapture')
-    def test_detect_text_on_video_success(self, mock_cap):
+    def test_detect_text_on_video_success(self, video_capture, rand_frame):
         """Test detección en video exitosa"""
         detector = TextDetector(use_easyocr=False)
         
-        # Mock de VideoCapture
-        mock_cap_instance = MagicMock()
-        mock_cap_instance.isOpened.return_value = True
-        mock_cap_instance.get.side_effect = lambda prop: {
-            5: 30,  # FPS
-            7: 900,  # FRAME_COUNT
-            3: 640,  # FRAME_WIDTH
-            4: 480   # FRAME_HEIGHT
-        }.get(prop, 0)
-        
         # Mock de frames
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        mock_cap_instance.read.side_effect = [(True, frame), (True, frame), (False, None)]
-        mock_cap.return_value = mock_cap_instance
+        frame = rand_frame
+        video_capture.read.side_effect = [(True, frame), (True, frame), (False, None)]
         
         with patch.object(detector, 'detect_text_on_frame') as mock_detect:
             mock_detect.return_value = []
@@ -233,25 +310,75 @@ class TestTextDetector:
             assert detections == []
             mock_detect.assert_called()
     
-    @patch('cv2.VideoCapture')
-    def test_detect_text_on_video_with_text(self, mock_cap):
-        """Test detección en video con texto"""
+    def test_detect_text_on_video_batched(self, video_capture, rand_frame):
+        """Test EasyOCR recibe los frames muestreados en lotes, no de uno en uno"""
+        detector = TextDetector(use_easyocr=True)
+        detector.easyocr_reader = MagicMock()
+        detector.easyocr_reader.readtext_batched.side_effect = lambda frames: [[] for _ in frames]
+        
+        # FPS 30 => un frame muestreado de cada 30; 15 muestras como máximo
+        video_capture.read.side_effect = [(True, rand_frame)] * (15 * 30) + [(False, None)]
+        
+        with patch('analyzer.text_detector.OCR_BATCH_SIZE', 8):
+            with patch.object(detector, 'detect_text_on_frame', return_value=[]):
+                detections = detector.detect_text_on_video('test.mp4', {})
+        
+        assert detections == []
+        batches = [c[0][0] for c in detector.easyocr_reader.readtext_batched.call_args_list]
+        assert [len(b) for b in batches] == [8, 7]
+        assert all(isinstance(f, np.ndarray) for f in batches[0])
+        detector.easyocr_reader.readtext.assert_not_called()
+    
+    def test_detect_text_on_video_overlaps_decode(self, video_capture, rand_frame):
+        """Test la decodificación de frames continúa mientras se hace el OCR"""
         detector = TextDetector(use_easyocr=False)
+        video_capture.get.side_effect = lambda prop: 1 if prop == 5 else 0  # 1 fps: todos muestreados
+        
+        reads = []
+        frames = iter([(True, rand_frame)] * 12 + [(False, None)])
+        
+        def read():
+            time.sleep(0.01)  # Decodificar también lleva tiempo
+            reads.append(time.monotonic())
+            return next(frames)
+        
+        ocr_spans = []
         
-        # Mock de VideoCapture
-        mock_cap_instance = MagicMock()
-        mock_cap_instance.isOpened.return_value = True
-        mock_cap_instance.get.side_effect = lambda prop: {
-            5: 30,  # FPS
-            7: 900,  # FRAME_COUNT
-            3: 640,  # FRAME_WIDTH
-            4: 480   # FRAME_HEIGHT
-        }.get(prop, 0)
+        def slow_ocr(frame, easyocr_detections=None):
+            start = time.monotonic()
+            time.sleep(0.05)
+            ocr_spans.append((start, time.monotonic()))
+            return []
+        
+        video_capture.read.side_effect = read
+        
+        # Lotes de 4: el OCR del primero empieza antes de decodificar el resto
+        with patch('analyzer.text_detector.OCR_BATCH_SIZE', 4):
+            with patch.object(detector, 'detect_text_on_frame', side_effect=slow_ocr):
+                detector.detect_text_on_video('test.mp4', {})
+        
+        assert len(ocr_spans) == 12
+        # Con lectura en serie ningún read() caería dentro de una llamada de OCR
+        assert any(start < t < end for start, end in ocr_spans for t in reads)
+    
+    def test_detect_text_on_video_skips_blurry(self, video_capture, black_frame):
+        """Test los frames lisos (sin bordes) no pasan por el OCR"""
+        detector = TextDetector(use_easyocr=False)
+        video_capture.read.side_effect = [(True, black_frame)] * (15 * 30) + [(False, None)]
+        
+        with patch.object(detector, 'detect_text_on_frame') as mock_detect:
+            detections = detector.detect_text_on_video('test.mp4', {})
+        
+        assert detections == []
+        assert mock_detect.call_count == 0
+    
+    def test_detect_text_on_video_with_text(self, video_capture, rand_frame):
+        """Test detección en video con texto"""
+        detector = TextDetector(use_easyocr=False)
         
         # Mock de frames
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        mock_cap_instance.read.side_effect = [(True, frame), (False, None)]
-        mock_cap.return_value = mock_cap_instance
+        frame = rand_frame
+        video_capture.read.side_effect = [(True, frame), (False, None)]
         
         with patch.object(detector, 'detect_text_on_frame') as mock_detect:
             mock_detect.return_value = [{
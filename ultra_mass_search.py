@@ -15,8 +15,9 @@ from rich import print as rprint
 # Agregar el directorio actual al path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from orchestrator import run_job
+from orchestrator import run_job, partition_results
 from config import validate_config
+from utils.stage_stats import StageStats
 
 console = Console()
 
@@ -97,6 +98,7 @@ def main():
         # Ejecutar búsqueda ultra masiva
         console.print("\n[bold green]Iniciando búsqueda masiva ultra extrema...[/bold green]")
         start_time = datetime.now()
+        stage_stats = StageStats()  # Ocupación real de cada etapa del pipeline
         
         with Progress(
             SpinnerColumn(),
@@ -105,17 +107,23 @@ def main():
             TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
             TimeElapsedColumn(),
             console=console,
-            expand=True
+            expand=True,
+            refresh_per_second=4
         ) as progress:
             
-            # Crear tarea de progreso
-            task = progress.add_task("Buscando videos masivamente (ultra optimizado)...", total=100)
+            # Crear tarea de progreso (el total se conoce tras la búsqueda)
+            task = progress.add_task("Buscando videos masivamente (ultra optimizado)...", total=None)
             
-            # Ejecutar el trabajo
-            results = run_job(config)
+            # Ejecutar el trabajo: run_job ya solapa descargas y análisis en un
+            # pipeline con cola acotada y avisa de cada video resuelto
+            results = run_job(
+                config,
+                progress_cb=lambda done, total: progress.update(task, completed=done, total=total),
+                stage_stats=stage_stats
+            )
             
             # Completar progreso
-            progress.update(task, completed=100)
+            progress.update(task, completed=len(results), total=len(results) or 1)
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds()
@@ -125,7 +133,9 @@ def main():
         console.print("[bold green]BUSQUEDA MASIVA ULTRA EXTREMA COMPLETADA[/bold green]")
         console.print("="*100)
         
-        accepted_count = len([r for r in results if r.get('estado') == 'aceptado'])
+        # Aceptados y razones de descarte en una sola pasada
+        accepted, _, reasons = partition_results(results)
+        accepted_count = len(accepted)
         total_count = len(results)
         discarded_count = total_count - accepted_count
         
@@ -144,13 +154,8 @@ def main():
         # Razones de descarte detalladas
         if discarded_count > 0:
             console.print(f"\n[bold yellow]Análisis de descartes:[/bold yellow]")
-            reasons = {}
-            for result in results:
-                if result.get('estado') == 'descartado':
-                    for reason in result.get('razones', []):
-                        reasons[reason] = reasons.get(reason, 0) + 1
-            
-            for reason, count in reasons.items():
+            # Las razones más frecuentes primero
+            for reason, count in reasons.most_common():
                 percentage = (count / total_count) * 100
                 console.print(f"  • {reason}: {count} videos ({percentage:.1f}%)")
         
@@ -164,6 +169,13 @@ def main():
             videos_per_minute = (total_count / duration) * 60
             console.print(f"\n[bold cyan]Rendimiento: {videos_per_minute:.1f} videos/minuto[/bold cyan]")
         
+        # Hilos ocupados de media por etapa: indica dónde está el cuello de botella
+        for stage, stats in stage_stats.report().items():
+            console.print(
+                f"  {stage}: {stats['calls']} llamadas, {stats['busy_s']:.1f}s ocupados "
+                f"en {stats['wall_s']:.1f}s, {stats['avg_busy']:.1f} hilos ocupados de media"
+            )
+        
         console.print("="*100)
         
     except KeyboardInterrupt:
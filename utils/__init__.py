@@ -4,5 +4,6 @@ Utilidades para VideoFinder AI Bot
 
 from .ffprobe_utils import get_video_metadata
 from .file_utils import ensure_directory, cleanup_files, get_file_size
+from .analysis_cache import AnalysisCache
 
-__all__ = ['get_video_metadata', 'ensure_directory', 'cleanup_files', 'get_file_size']
+__all__ = ['get_video_metadata', 'ensure_directory', 'cleanup_files', 'get_file_size', 'AnalysisCache']
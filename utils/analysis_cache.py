@@ -0,0 +1,103 @@
+"""
+Caché persistente de análisis de video (SQLite)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, Optional
+from rich.console import Console
+
+console = Console()
+
+def _json_default(obj):
+    """Convierte escalares numpy/torch a tipos nativos al serializar"""
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+class AnalysisCache:
+    """
+    Caché de resultados de análisis por video, persistida en SQLite
+    
+    Las claves incluyen la firma del analizador, de modo que un cambio de
+    filtros, umbrales o modelos invalida automáticamente las entradas.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Inicializa la caché
+        
+        Args:
+            path: Ruta al archivo SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS analysis (k TEXT PRIMARY KEY, v TEXT NOT NULL)'
+            )
+            self._conn.commit()
+        except Exception as e:
+            console.print(f"    [yellow]⚠️  Caché de análisis deshabilitada: {str(e)}[/yellow]")
+            self._conn = None
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtiene un análisis cacheado
+        
+        Args:
+            key: Clave del video (incluye la firma del analizador)
+            
+        Returns:
+            Diccionario de análisis o None si no existe
+        """
+        if self._conn is None:
+            return None
+        
+        try:
+            with self._lock:
+                row = self._conn.execute('SELECT v FROM analysis WHERE k = ?', (key,)).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception:
+            return None
+    
+    def put(self, key: str, analysis: Dict[str, Any]) -> bool:
+        """
+        Guarda un análisis en la caché
+        
+        Args:
+            key: Clave del video (incluye la firma del analizador)
+            analysis: Resultado del análisis
+            
+        Returns:
+            True si se guardó correctamente
+        """
+        if self._conn is None:
+            return False
+        
+        try:
+            value = json.dumps(analysis, ensure_ascii=False, default=_json_default)
+            with self._lock:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO analysis (k, v) VALUES (?, ?)', (key, value)
+                )
+                self._conn.commit()
+            return True
+        except Exception:
+            return False
+    
+    def close(self):
+        """Cierra la conexión con la base de datos"""
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
@@ -2,26 +2,205 @@
 Utilidades para obtener metadatos de video usando ffprobe y yt-dlp
 """
 
+import asyncio
+import hashlib
 import json
+import os
 import subprocess
-import time
-from typing import Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Iterable, List, Tuple
+from urllib.parse import urlparse
 from rich.console import Console
 
-from config import REQUEST_DELAY
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:
+    YoutubeDL = None
+
+from config import (
+    PREFILTER_MAX_WORKERS, KEEP_RAW, YT_DLP_OPTIONS, METADATA_CACHE_TTL,
+    METADATA_SOCKET_TIMEOUT, METADATA_RETRIES
+)
+from .scrape_cache import get_cache
+from .rate_limit import get_bucket
 
 console = Console()
 
-def get_video_metadata(url_or_path: str) -> Optional[Dict[str, Any]]:
+# Campos de la respuesta de yt-dlp que se conservan en raw_data salvo KEEP_RAW
+# (el resto ya se copió a otra clave o son formats/thumbnails/subtítulos)
+_RAW_KEYS = ('channel_id', 'availability', 'live_status')
+
+# Opciones de yt-dlp como librería para metadatos completos (sin descargar)
+# (con timeout de red y reintentos cortos, igual que el ejecutable; sin
+# ignoreerrors, para que un fallo del extractor se vea y pase al ejecutable)
+_INFO_OPTS = {
+    **YT_DLP_OPTIONS, 'skip_download': True, 'extract_flat': False, 'noplaylist': True,
+    'ignoreerrors': False,
+    'socket_timeout': METADATA_SOCKET_TIMEOUT,
+    'retries': METADATA_RETRIES, 'extractor_retries': METADATA_RETRIES
+}
+
+# Entradas de ffprobe que usa parse_ffprobe_metadata (sin el resto de la salida)
+_FFPROBE_ENTRIES = (
+    'format=duration,format_name,size,filename:format_tags=title,comment'
+    ':stream=codec_type,width,height,r_frame_rate'
+)
+
+# Partes fijas de las líneas de comandos (solo se añade la URL o la ruta).
+# Las sondas fallan rápido: una URL caída no agota el timeout del proceso
+# reintentando, y el turno por host ya lo marca la cubeta de fichas
+_YTDLP_FAIL_FAST_ARGS = (
+    '--socket-timeout', str(METADATA_SOCKET_TIMEOUT),
+    '--retries', str(METADATA_RETRIES),
+    '--extractor-retries', str(METADATA_RETRIES),
+    '--no-playlist',
+)
+_YTDLP_BASIC_ARGS = (
+    'yt-dlp', '--skip-download', '--no-warnings', '--quiet', *_YTDLP_FAIL_FAST_ARGS,
+    '--print', '%(duration)s|%(width)s|%(height)s',
+)
+_YTDLP_BATCH_ARGS = (
+    'yt-dlp', '--skip-download', '--no-warnings', '--quiet', *_YTDLP_FAIL_FAST_ARGS,
+    '--ignore-errors',
+    '--print', '%(original_url)s\t%(webpage_url)s\t%(duration)s\t%(width)s\t%(height)s',
+)
+_YTDLP_JSON_ARGS = ('yt-dlp', '--dump-json', '--no-warnings', '--quiet', *_YTDLP_FAIL_FAST_ARGS)
+_FFPROBE_ARGS = (
+    'ffprobe',
+    '-v', 'quiet',
+    # Leer solo la cabecera: duración y resolución están en el contenedor
+    '-probesize', '1048576',
+    '-analyzeduration', '1000000',
+    '-print_format', 'json',
+    # Solo los campos que lee parse_ffprobe_metadata, del primer stream de video
+    '-select_streams', 'v:0',
+    '-show_entries', _FFPROBE_ENTRIES,
+)
+
+# Un YoutubeDL por hilo: la instancia no admite llamadas concurrentes
+_ydl_local = threading.local()
+
+# Campos que da la sonda ligera (get_basic_duration_and_resolution)
+_BASIC_FIELDS = frozenset(('duration', 'width', 'height'))
+
+# Metadatos ya obtenidos en este proceso: URL -> metadatos, o
+# (ruta, mtime, tamaño) -> metadatos para archivos locales
+_METADATA_CACHE: Dict[Tuple, Dict[str, Any]] = {}
+_METADATA_CACHE_SIZE = 1024
+_metadata_cache_lock = threading.Lock()
+
+def _to_float(value) -> float:
+    """Convierte a float tolerando vacíos ('NA', None)"""
+    try:
+        return float(value)
+    except Exception:
+        return 0.0
+
+def _to_int(value) -> int:
+    """Convierte a int tolerando vacíos ('NA', None)"""
+    try:
+        return int(float(value))
+    except Exception:
+        return 0
+
+def _loads_json(raw):
+    """Parsea JSON (bytes o str) con orjson si está instalado"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _metadata_key(url_or_path: str) -> Optional[Tuple]:
+    """
+    Clave de caché de un video: la URL, o ruta + mtime + tamaño para archivos
+    
+    Un archivo local reescrito cambia de clave y se vuelve a sondear.
+    """
+    if url_or_path.startswith(('http://', 'https://')):
+        return (url_or_path,)
+    try:
+        stat = os.stat(url_or_path)
+    except OSError:
+        return None
+    return (os.path.abspath(url_or_path), stat.st_mtime_ns, stat.st_size)
+
+def clear_metadata_cache():
+    """Vacía la caché de metadatos del proceso"""
+    with _metadata_cache_lock:
+        _METADATA_CACHE.clear()
+
+def _disk_cache_key(url: str) -> str:
+    """Clave de los metadatos de una URL en la caché en disco"""
+    return hashlib.sha1(f"video-metadata\0{url}".encode('utf-8')).hexdigest()
+
+def get_video_metadata(url_or_path: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
     """
     Obtiene metadatos de un video usando yt-dlp y ffprobe
     
+    Los resultados se cachean en el proceso, así que pedir varias veces el
+    mismo video (duración, dimensiones, resumen...) lanza un solo yt-dlp/ffprobe.
+    Los de URLs se guardan además en la caché en disco de scraping durante
+    METADATA_CACHE_TTL, para reutilizarlos entre ejecuciones. Los fallos no
+    se cachean.
+    
+    Si el llamador solo necesita duración y/o resolución de una URL (y no
+    están ya cacheadas), se usa la sonda ligera de yt-dlp --print; ese
+    resultado parcial no se cachea.
+    
     Args:
         url_or_path: URL o ruta del archivo de video
+        fields: Campos que necesita el llamador (None = todos)
         
     Returns:
         Diccionario con metadatos del video o None si falla
     """
+    key = _metadata_key(url_or_path)
+    if key is not None:
+        with _metadata_cache_lock:
+            cached = _METADATA_CACHE.get(key)
+        if cached is not None:
+            return dict(cached)
+    
+    # Solo URLs en disco: los archivos locales suelen ser temporales
+    is_url = url_or_path.startswith(('http://', 'https://'))
+    disk_cache = get_cache() if is_url else None
+    metadata = disk_cache.get(_disk_cache_key(url_or_path)) if disk_cache is not None else None
+    
+    # Un solo turno de host por consulta, aunque la sonda ligera falle y
+    # haya que pedir los metadatos completos
+    if metadata is None and is_url:
+        _wait_for_host(url_or_path)
+    
+    if metadata is None and is_url and fields is not None and _BASIC_FIELDS.issuperset(fields):
+        basic = get_basic_duration_and_resolution(url_or_path)
+        if basic:
+            return basic
+    
+    if metadata is None:
+        metadata = _fetch_video_metadata(url_or_path)
+        if metadata and disk_cache is not None:
+            disk_cache.set(_disk_cache_key(url_or_path), metadata, METADATA_CACHE_TTL)
+    
+    if metadata and key is not None:
+        with _metadata_cache_lock:
+            if len(_METADATA_CACHE) >= _METADATA_CACHE_SIZE:
+                # Descartar la entrada más antigua
+                _METADATA_CACHE.pop(next(iter(_METADATA_CACHE)))
+            _METADATA_CACHE[key] = metadata
+        return dict(metadata)
+    return metadata
+
+def _fetch_video_metadata(url_or_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Obtiene metadatos sin caché (yt-dlp para URLs, ffprobe como fallback)
+    
+    El turno de host lo toma get_video_metadata antes de llamarla.
+    """
     try:
         # Intentar con yt-dlp primero (para URLs)
         if url_or_path.startswith(('http://', 'https://')):
@@ -40,9 +219,23 @@ def get_video_metadata(url_or_path: str) -> Optional[Dict[str, Any]]:
     except Exception as e:
         console.print(f"    [red]✗ Error obteniendo metadatos: {str(e)}[/red]")
         return None
-    finally:
-        # Delay entre requests
-        time.sleep(REQUEST_DELAY)
+
+def _wait_for_host(url: str):
+    """
+    Espera el turno del host de `url` (una petición cada REQUEST_DELAY segundos)
+    
+    Comparte la cubeta de fichas de los scrapers: las sondas concurrentes se
+    escalonan en lugar de dormir cada una tras su petición, y los archivos
+    locales no esperan.
+    """
+    _host_bucket(url).wait()
+
+def _host_bucket(url: str):
+    """Cubeta de fichas compartida del host de `url` (sin 'www.')"""
+    host = urlparse(url).netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    return get_bucket(host)
 
 def get_basic_duration_and_resolution(url: str) -> Optional[Dict[str, Any]]:
     """
@@ -59,18 +252,10 @@ def get_basic_duration_and_resolution(url: str) -> Optional[Dict[str, Any]]:
             return None
 
         # yt-dlp permite imprimir campos específicos rápidamente
-        cmd = [
-            'yt-dlp',
-            '--skip-download',
-            '--no-warnings',
-            '--quiet',
-            '--print', '%(duration)s|%(width)s|%(height)s',
-            url
-        ]
-
         result = subprocess.run(
-            cmd,
-            capture_output=True,
+            [*_YTDLP_BASIC_ARGS, url],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             text=True,
             timeout=20,
             check=True
@@ -85,18 +270,6 @@ def get_basic_duration_and_resolution(url: str) -> Optional[Dict[str, Any]]:
             return None
 
         # Parsear valores con tolerancia a vacíos
-        def _to_float(v):
-            try:
-                return float(v)
-            except Exception:
-                return 0.0
-
-        def _to_int(v):
-            try:
-                return int(float(v))
-            except Exception:
-                return 0
-
         duration = _to_float(parts[0])
         width = _to_int(parts[1])
         height = _to_int(parts[2])
@@ -114,52 +287,218 @@ def get_basic_duration_and_resolution(url: str) -> Optional[Dict[str, Any]]:
     except Exception:
         return None
 
+def get_metadata_batch(urls: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Obtiene duración y resolución de varios videos con un solo proceso yt-dlp
+    
+    Amortiza el arranque de yt-dlp (fork/exec + imports) entre todas las URLs.
+    
+    Args:
+        urls: URLs de los videos
+        
+    Returns:
+        Diccionario URL -> {'duration', 'width', 'height'} (solo URLs resueltas)
+    """
+    urls = [u for u in urls if u.startswith(('http://', 'https://'))]
+    if not urls:
+        return {}
+    
+    try:
+        # Un turno por host y lote (no por URL)
+        for host_url in {urlparse(u).netloc: u for u in urls}.values():
+            _wait_for_host(host_url)
+        
+        # --ignore-errors: un video caído no invalida el lote (código != 0 tolerado)
+        result = subprocess.run(
+            [*_YTDLP_BATCH_ARGS, *urls],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            timeout=20 + 5 * len(urls)
+        )
+        
+        metadata = {}
+        for line in result.stdout.splitlines():
+            parts = line.split('\t')
+            if len(parts) != 5:
+                continue
+            
+            duration = _to_float(parts[2])
+            width = _to_int(parts[3])
+            height = _to_int(parts[4])
+            if duration <= 0 and (width == 0 or height == 0):
+                continue
+            
+            info = {
+                'duration': duration if duration > 0 else 0,
+                'width': width,
+                'height': height
+            }
+            # Indexar por la URL original y por la canónica
+            for key in parts[:2]:
+                if key and key != 'NA':
+                    metadata[key] = info
+        
+        return metadata
+        
+    except Exception as e:
+        console.print(f"    [red]✗ Error obteniendo metadatos en lote: {str(e)}[/red]")
+        return {}
+
 def get_metadata_with_ytdlp(url: str) -> Optional[Dict[str, Any]]:
     """
     Obtiene metadatos usando yt-dlp
     
+    Con la librería instalada se usa dentro del proceso; si no está o la
+    llamada falla, se recurre al ejecutable en un proceso aparte.
+    
     Args:
         url: URL del video
         
     Returns:
         Diccionario con metadatos o None si falla
     """
+    if YoutubeDL is not None:
+        metadata = _get_metadata_in_process(url)
+        if metadata:
+            return metadata
+    
     try:
-        cmd = [
-            'yt-dlp',
-            '--dump-json',
-            '--no-warnings',
-            '--quiet',
-            url
-        ]
-        
+        # Salida en bytes: se parsea sin decodificarla antes a str
         result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
+            [*_YTDLP_JSON_ARGS, url],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             timeout=30,
             check=True
         )
         
         if result.stdout.strip():
-            data = json.loads(result.stdout)
+            data = _loads_json(result.stdout)
             return parse_ytdlp_metadata(data)
         
         return None
         
     except subprocess.TimeoutExpired:
-        console.print(f"    [yellow]Timeout obteniendo metadatos con yt-dlp[/yellow]")
+        console.print("    [yellow]Timeout obteniendo metadatos con yt-dlp[/yellow]")
         return None
     except subprocess.CalledProcessError as e:
         console.print(f"    [yellow]Error con yt-dlp: {e}[/yellow]")
         return None
     except json.JSONDecodeError:
-        console.print(f"    [yellow]Error parseando JSON de yt-dlp[/yellow]")
+        console.print("    [yellow]Error parseando JSON de yt-dlp[/yellow]")
         return None
     except Exception as e:
         console.print(f"    [yellow]Error inesperado con yt-dlp: {str(e)}[/yellow]")
         return None
 
+def _get_ydl():
+    """YoutubeDL del hilo actual (se crea en su primer uso)"""
+    cached = getattr(_ydl_local, 'ydl', None)
+    if cached is None or cached[0] is not YoutubeDL:
+        cached = _ydl_local.ydl = (YoutubeDL, YoutubeDL(dict(_INFO_OPTS)))
+    return cached[1]
+
+def _get_metadata_in_process(url: str) -> Optional[Dict[str, Any]]:
+    """
+    Metadatos con yt-dlp como librería (sin arrancar un intérprete por URL)
+    
+    Args:
+        url: URL del video
+        
+    Returns:
+        Diccionario con metadatos o None si falla
+    """
+    try:
+        info = _get_ydl().extract_info(url, download=False)
+        return parse_ytdlp_metadata(info) if info else None
+    except Exception as e:
+        console.print(f"    [yellow]Error con yt-dlp: {str(e)}[/yellow]")
+        return None
+
+async def get_metadata_with_ytdlp_async(url: str, semaphore: asyncio.Semaphore) -> Optional[Dict[str, Any]]:
+    """
+    Variante asíncrona de get_metadata_with_ytdlp (proceso sin bloquear el bucle)
+    
+    Args:
+        url: URL del video
+        semaphore: Limita los procesos yt-dlp simultáneos
+        
+    Returns:
+        Diccionario con metadatos o None si falla
+    """
+    async with semaphore:
+        await _host_bucket(url).acquire()
+        
+        proc = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *_YTDLP_JSON_ARGS, url,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=30)
+            
+            if proc.returncode == 0 and stdout.strip():
+                return parse_ytdlp_metadata(_loads_json(stdout))
+            return None
+            
+        except asyncio.TimeoutError:
+            console.print("    [yellow]Timeout obteniendo metadatos con yt-dlp[/yellow]")
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+            return None
+        except json.JSONDecodeError:
+            console.print("    [yellow]Error parseando JSON de yt-dlp[/yellow]")
+            return None
+        except Exception as e:
+            console.print(f"    [yellow]Error inesperado con yt-dlp: {str(e)}[/yellow]")
+            return None
+
+async def gather_metadata(urls: List[str], concurrency: int = PREFILTER_MAX_WORKERS) -> Dict[str, Dict[str, Any]]:
+    """
+    Obtiene los metadatos completos de varias URLs a la vez
+    
+    Las esperas de red de cada yt-dlp se solapan, con como máximo
+    `concurrency` procesos en marcha.
+    
+    Args:
+        urls: URLs de los videos
+        concurrency: Procesos yt-dlp simultáneos
+        
+    Returns:
+        Diccionario URL -> metadatos (solo URLs resueltas)
+    """
+    urls = list(dict.fromkeys(u for u in urls if u.startswith(('http://', 'https://'))))
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = await asyncio.gather(*(get_metadata_with_ytdlp_async(url, semaphore) for url in urls))
+    return {url: metadata for url, metadata in zip(urls, results) if metadata}
+
+def batch_ffprobe(paths: List[str], max_workers: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+    """
+    Obtiene los metadatos de varios archivos locales con ffprobe a la vez
+    
+    Cada ffprobe es un proceso aparte, así que basta con hilos para
+    tener varios en marcha sin esperar uno a uno (los hilos solo esperan al
+    proceso, sin retener el GIL). No se delega en xargs -P/parallel: no
+    existen en Windows y mezclarían las salidas JSON sin saber de qué
+    archivo es cada una.
+    
+    Args:
+        paths: Rutas a los archivos de video
+        max_workers: Procesos ffprobe simultáneos (por defecto, uno por CPU)
+        
+    Returns:
+        Lista de metadatos (o None) en el mismo orden que paths
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    
+    workers = min(len(paths), max_workers or os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(get_metadata_with_ffprobe, paths))
+
 def get_metadata_with_ffprobe(path: str) -> Optional[Dict[str, Any]]:
     """
     Obtiene metadatos usando ffprobe
@@ -171,25 +510,17 @@ def get_metadata_with_ffprobe(path: str) -> Optional[Dict[str, Any]]:
         Diccionario con metadatos o None si falla
     """
     try:
-        cmd = [
-            'ffprobe',
-            '-v', 'quiet',
-            '-print_format', 'json',
-            '-show_format',
-            '-show_streams',
-            path
-        ]
-        
+        # Salida en bytes y stderr descartado (con -v quiet no trae nada útil)
         result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
+            [*_FFPROBE_ARGS, path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             timeout=30,
             check=True
         )
         
         if result.stdout.strip():
-            data = json.loads(result.stdout)
+            data = _loads_json(result.stdout)
             return parse_ffprobe_metadata(data)
         
         return None
@@ -218,21 +549,19 @@ def parse_ytdlp_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
         Diccionario con metadatos parseados
     """
     try:
-        # Obtener stream de video
-        video_stream = None
-        if 'formats' in data:
-            for fmt in data['formats']:
-                if fmt.get('vcodec') != 'none' and fmt.get('acodec') != 'none':
-                    video_stream = fmt
-                    break
-        
         # Extraer información básica
         duration = data.get('duration', 0)
         width = data.get('width', 0)
         height = data.get('height', 0)
         
         # Si no hay width/height en el nivel superior, buscar en streams
+        # (formats puede tener cientos de entradas: solo se recorre si hace falta)
         if not width or not height:
+            video_stream = next(
+                (fmt for fmt in data.get('formats') or ()
+                 if fmt.get('vcodec') != 'none' and fmt.get('acodec') != 'none'),
+                None
+            )
             if video_stream:
                 width = video_stream.get('width', 0)
                 height = video_stream.get('height', 0)
@@ -255,7 +584,8 @@ def parse_ytdlp_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
             'webpage_url': data.get('webpage_url', ''),
             'id': data.get('id', ''),
             'platform': data.get('extractor', 'unknown'),
-            'raw_data': data
+            # Sin KEEP_RAW no se retiene la respuesta completa (formats puede ocupar MB)
+            'raw_data': data if KEEP_RAW else {key: data[key] for key in _RAW_KEYS if key in data}
         }
         
     except Exception as e:
@@ -300,25 +630,29 @@ def parse_ffprobe_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
                 if int(den) > 0:
                     fps = float(num) / float(den)
         
+        filename = format_info.get('filename', '')
+        tags = format_info.get('tags', {})
+        
         return {
             'duration': duration,
             'width': width,
             'height': height,
             'fps': fps,
             'format': format_info.get('format_name', ''),
-            'ext': format_info.get('filename', '').split('.')[-1] if '.' in format_info.get('filename', '') else '',
+            'ext': filename.rpartition('.')[2] if '.' in filename else '',
             'filesize': int(format_info.get('size', 0)),
             'view_count': 0,
             'uploader': '',
             'upload_date': '',
-            'title': format_info.get('tags', {}).get('title', ''),
-            'description': format_info.get('tags', {}).get('comment', ''),
+            'title': tags.get('title', ''),
+            'description': tags.get('comment', ''),
             'tags': [],
             'thumbnail': '',
             'webpage_url': '',
             'id': '',
             'platform': 'local',
-            'raw_data': data
+            # Los campos útiles ya se copiaron arriba; la salida completa solo con KEEP_RAW
+            'raw_data': data if KEEP_RAW else {}
         }
         
     except Exception as e:
@@ -335,7 +669,7 @@ def get_video_duration(url_or_path: str) -> float:
     Returns:
         Duración en segundos o 0 si falla
     """
-    metadata = get_video_metadata(url_or_path)
+    metadata = get_video_metadata(url_or_path, fields=('duration',))
     return metadata.get('duration', 0) if metadata else 0
 
 def get_video_dimensions(url_or_path: str) -> tuple:
@@ -348,7 +682,7 @@ def get_video_dimensions(url_or_path: str) -> tuple:
     Returns:
         Tupla (width, height) o (0, 0) si falla
     """
-    metadata = get_video_metadata(url_or_path)
+    metadata = get_video_metadata(url_or_path, fields=('width', 'height'))
     if metadata:
         return (metadata.get('width', 0), metadata.get('height', 0))
     return (0, 0)
@@ -2,8 +2,11 @@
 Utilidades para manejo de archivos
 """
 
+import fnmatch
+import glob
 import os
 import shutil
+import tempfile
 import time
 from typing import List, Optional
 from rich.console import Console
@@ -43,26 +46,27 @@ def cleanup_files(directory: str, pattern: str = "temp_*", max_age_hours: int =
         if not os.path.exists(directory):
             return 0
         
-        import glob
         current_time = time.time()
         max_age_seconds = max_age_hours * 3600
         deleted_count = 0
         
-        # Buscar archivos que coincidan con el patrón
-        search_pattern = os.path.join(directory, pattern)
-        files = glob.glob(search_pattern)
-        
-        for file_path in files:
-            try:
-                # Verificar edad del archivo
-                file_age = current_time - os.path.getmtime(file_path)
-                if file_age > max_age_seconds:
-                    os.remove(file_path)
-                    deleted_count += 1
-                    console.print(f"    [yellow]🗑️  Eliminado: {os.path.basename(file_path)}[/yellow]")
-            except Exception as e:
-                console.print(f"    [yellow]Error eliminando {file_path}: {str(e)}[/yellow]")
-                continue
+        # Una sola lectura del directorio: cada DirEntry trae nombre, tipo y stat
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not fnmatch.fnmatchcase(entry.name, pattern):
+                    continue
+                try:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    
+                    # Verificar edad del archivo
+                    file_age = current_time - entry.stat(follow_symlinks=False).st_mtime
+                    if file_age > max_age_seconds:
+                        os.unlink(entry.path)
+                        deleted_count += 1
+                except Exception as e:
+                    console.print(f"    [yellow]Error eliminando {entry.path}: {str(e)}[/yellow]")
+                    continue
         
         if deleted_count > 0:
             console.print(f"    [green]✓ Limpiados {deleted_count} archivos temporales[/green]")
@@ -101,16 +105,30 @@ def get_directory_size(directory: str) -> int:
         Tamaño total en bytes
     """
     try:
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(directory):
-            for filename in filenames:
-                file_path = os.path.join(dirpath, filename)
-                if os.path.exists(file_path):
-                    total_size += os.path.getsize(file_path)
-        return total_size
+        return sum(_iter_file_sizes(directory))
     except Exception:
         return 0
 
+def _iter_file_sizes(directory: str):
+    """
+    Tamaños de los archivos bajo `directory`, recursivamente (sin seguir enlaces)
+    
+    Usa el stat que trae cada DirEntry; los archivos o subdirectorios que
+    desaparecen o no se pueden leer se omiten sin cortar el recorrido.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        yield from _iter_file_sizes(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        return
+
 def format_file_size(size_bytes: int) -> str:
     """
     Formatea el tamaño de archivo en una cadena legible
@@ -146,8 +164,6 @@ def find_files_by_extension(directory: str, extensions: List[str]) -> List[str]:
         Lista de rutas de archivos encontrados
     """
     try:
-        import glob
-        
         files = []
         for ext in extensions:
             pattern = os.path.join(directory, f"*{ext}")
@@ -269,8 +285,6 @@ def create_temp_file(prefix: str = "temp_", suffix: str = ".tmp") -> str:
         Ruta del archivo temporal creado
     """
     try:
-        import tempfile
-        
         # Crear archivo temporal
         fd, path = tempfile.mkstemp(prefix=prefix, suffix=suffix)
         os.close(fd)  # Cerrar el descriptor de archivo
@@ -297,14 +311,14 @@ def cleanup_temp_files(temp_dir: str) -> int:
         
         deleted_count = 0
         
-        for filename in os.listdir(temp_dir):
-            if filename.startswith('temp_'):
-                file_path = os.path.join(temp_dir, filename)
-                try:
-                    os.remove(file_path)
-                    deleted_count += 1
-                except Exception:
-                    continue
+        with os.scandir(temp_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('temp_'):
+                    try:
+                        os.unlink(entry.path)
+                        deleted_count += 1
+                    except Exception:
+                        continue
         
         if deleted_count > 0:
             console.print(f"    [green]✓ Limpiados {deleted_count} archivos temporales[/green]")
@@ -0,0 +1,81 @@
+"""
+Límite de peticiones por host compartido entre scrapers y sondas de metadatos
+"""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+from config import REQUEST_DELAY
+
+class TokenBucket:
+    """
+    Cubeta de fichas: como máximo una petición cada `interval` segundos
+
+    Cada llamada reserva el siguiente hueco libre y espera hasta él, así las
+    peticiones concurrentes se escalonan en lugar de dormir todas a la vez.
+    La reserva usa un threading.Lock (no asyncio.Lock) porque la comparten
+    hilos del executor y el bucle del pool de navegadores.
+    """
+
+    def __init__(self, interval: float):
+        """
+        Inicializa la cubeta
+
+        Args:
+            interval: Segundos mínimos entre peticiones
+        """
+        self.interval = max(0.0, interval)
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserva un hueco y devuelve los segundos que faltan para él"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next - now)
+            self._next = max(now, self._next) + self.interval
+            return wait
+
+    def wait(self, cancel: Optional[threading.Event] = None) -> bool:
+        """
+        Espera (bloqueando el hilo) hasta poder hacer una petición
+
+        Args:
+            cancel: Evento que interrumpe la espera (p. ej. un productor detenido)
+
+        Returns:
+            False si `cancel` se activó durante la espera, True en otro caso
+        """
+        delay = self._reserve()
+        if cancel is not None:
+            return not cancel.wait(delay) if delay else not cancel.is_set()
+        if delay:
+            time.sleep(delay)
+        return True
+
+    async def acquire(self):
+        """Espera (sin bloquear el bucle) hasta poder hacer una petición"""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(host: str) -> TokenBucket:
+    """
+    Devuelve la cubeta de un host (una petición cada REQUEST_DELAY segundos)
+
+    Args:
+        host: Nombre del host, p. ej. 'tiktok.com'
+
+    Returns:
+        TokenBucket compartido por todas las peticiones a ese host
+    """
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = _buckets[host] = TokenBucket(REQUEST_DELAY)
+        return bucket
@@ -0,0 +1,163 @@
+"""
+Caché en disco (SQLite) con caducidad para búsquedas y metadatos de scrapers
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+from rich.console import Console
+
+from config import SCRAPE_CACHE, SCRAPE_CACHE_FILE, SCRAPE_CACHE_TTL
+
+console = Console()
+
+class ScrapeCache:
+    """
+    Almacén clave/valor JSON con caducidad por entrada, persistido en SQLite
+    """
+    
+    def __init__(self, path: str):
+        """
+        Inicializa la caché
+        
+        Args:
+            path: Ruta al archivo SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS scrape '
+                '(k TEXT PRIMARY KEY, expires REAL NOT NULL, v TEXT NOT NULL)'
+            )
+            self._conn.commit()
+        except Exception as e:
+            console.print(f"    [yellow]⚠️  Caché de scraping deshabilitada: {str(e)}[/yellow]")
+            self._conn = None
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Obtiene un valor no caducado
+        
+        Args:
+            key: Clave de la entrada
+        
+        Returns:
+            Valor deserializado o None si no existe o caducó
+        """
+        if self._conn is None:
+            return None
+        
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT v FROM scrape WHERE k = ? AND expires > ?', (key, time.time())
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception:
+            return None
+    
+    def set(self, key: str, value: Any, expire: float) -> bool:
+        """
+        Guarda un valor con caducidad
+        
+        Args:
+            key: Clave de la entrada
+            value: Valor serializable a JSON
+            expire: Segundos de validez
+        
+        Returns:
+            True si se guardó correctamente
+        """
+        if self._conn is None:
+            return False
+        
+        try:
+            payload = json.dumps(value, ensure_ascii=False, default=str)
+            with self._lock:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO scrape (k, expires, v) VALUES (?, ?, ?)',
+                    (key, time.time() + expire, payload)
+                )
+                self._conn.commit()
+            return True
+        except Exception:
+            return False
+
+_cache: Optional[ScrapeCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> Optional[ScrapeCache]:
+    """Devuelve la caché compartida, o None si está deshabilitada (SCRAPE_CACHE=false)"""
+    global _cache
+    if not SCRAPE_CACHE or not SCRAPE_CACHE_FILE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ScrapeCache(SCRAPE_CACHE_FILE)
+        return _cache
+
+class Uncached(list):
+    """
+    Resultado que se devuelve al llamador pero no se guarda en caché
+    
+    Para listas incompletas (p. ej. una búsqueda cortada por un timeout):
+    sirven en esta ejecución, pero no deben recordarse durante todo el TTL.
+    """
+
+def cached(namespace: str, ttl: float = SCRAPE_CACHE_TTL, empty_ttl: float = None):
+    """
+    Decorador que cachea en disco el resultado de una función de scraping
+    
+    La clave combina `namespace` con los argumentos (normalizados con los
+    valores por defecto de la firma). Un resultado Uncached se devuelve como
+    lista normal sin guardarse.
+    
+    Args:
+        namespace: Prefijo de la clave (p. ej. 'yt-search')
+        ttl: Segundos de validez de un resultado no vacío
+        empty_ttl: Segundos de validez de un resultado vacío; None = no se
+            cachean (un error de red no se "recuerda")
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            if cache is None:
+                return func(*args, **kwargs)
+            
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            raw_key = json.dumps([namespace, list(bound.arguments.values())], default=str)
+            key = hashlib.sha1(raw_key.encode('utf-8')).hexdigest()
+            
+            value = cache.get(key)
+            if value is not None:
+                return value
+            
+            value = func(*args, **kwargs)
+            if isinstance(value, Uncached):
+                return list(value)
+            if value:
+                cache.set(key, value, ttl)
+            elif empty_ttl and value is not None:
+                cache.set(key, value, empty_ttl)
+            return value
+        
+        return wrapper
+    return decorator